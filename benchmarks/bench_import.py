@@ -0,0 +1,84 @@
+"""
+Import time benchmark - run with: python -m benchmarks.bench_import
+
+Imports each statement in a fresh interpreter a few times and reports the
+median wall time, plus which heavy dependencies were loaded along the way.
+Exits with status 1 when a statement is slower than --max-ms or loads a heavy
+dependency it shouldn't, so it can guard startup latency in CI.
+
+    python -m benchmarks.bench_import --runs 7 --max-ms 50
+"""
+
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from typing import Dict, List
+
+# Dependencies that only network use should pull in
+HEAVY = ("github", "requests", "urllib3", "jwt", "nacl", "cryptography", "numpy", "pyarrow")
+
+# Statements to time: statement -> heavy modules it may load
+STATEMENTS: Dict[str, tuple] = {
+  'import terence': (),
+  'from terence import parse_github_url, should_scan_file': (),
+  'from terence import Terence': (),
+  'from terence import Terence; Terence().auth("token")': (),
+  'from terence import Terence; Terence()._github()': ("github", "requests", "urllib3", "jwt", "nacl", "cryptography"),
+}
+
+_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+exec({statement!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'heavy': [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+# Time one statement in a new interpreter
+def time_statement(statement: str) -> Dict:
+  probe = _PROBE.format(statement=statement, heavy=HEAVY)
+  output = subprocess.run([sys.executable, "-c", probe], check=True, capture_output=True, text=True).stdout
+  return json.loads(output.strip().splitlines()[-1])
+
+def run_benchmark(statements: Dict[str, tuple] = None, runs: int = 5) -> Dict[str, Dict]:
+  """
+  Returns:
+    dict: { statement: {
+      'median_ms': float,   # Median import time over the runs
+      'heavy': list,        # Heavy dependencies loaded by the statement
+      'unexpected': list    # Heavy dependencies loaded that the statement shouldn't need
+    } }
+  """
+  report = {}
+  for statement, allowed in (statements or STATEMENTS).items():
+    samples = [time_statement(statement) for _ in range(runs)]
+    heavy = samples[-1]['heavy']
+    report[statement] = {
+      'median_ms': statistics.median(sample['seconds'] for sample in samples) * 1000,
+      'heavy': heavy,
+      'unexpected': [name for name in heavy if name not in allowed],
+    }
+  return report
+
+def main(argv: List[str] = None):
+  parser = argparse.ArgumentParser(description="Benchmark how long importing Terence takes")
+  parser.add_argument("--runs", type=int, default=5)
+  parser.add_argument("--max-ms", type=float, default=None, help="Fail when a statement without heavy dependencies is slower")
+  args = parser.parse_args(argv)
+
+  report = run_benchmark(runs=args.runs)
+  failed = False
+  for statement, result in report.items():
+    print(f"{result['median_ms']:8.1f} ms  {statement}")
+    if result['unexpected']:
+      print(f"           unexpected imports: {', '.join(result['unexpected'])}")
+      failed = True
+    if args.max_ms is not None and not STATEMENTS[statement] and result['median_ms'] > args.max_ms:
+      print(f"           slower than {args.max_ms} ms")
+      failed = True
+  sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+  main()
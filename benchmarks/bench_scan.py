@@ -0,0 +1,189 @@
+"""
+Offline scan benchmark - run with: python -m benchmarks.bench_scan
+
+Starts the fake GitHub server in a separate process (so its memory does not
+count against the scanner), generates a synthetic repository and reports
+requests per scan, wall time, CPU time and peak memory of
+Terence.scan_repository for each fetch strategy, and response bytes and CPU
+time per file. "rest" reads blobs as base64 JSON, "rest-raw" streams the raw
+media type and "mirror" reads a local git repository with the same files
+through an already cloned mirror (no requests; the git processes' CPU time
+isn't counted). The mirror strategy needs the git executable and is left out
+without it.
+
+    python -m benchmarks.bench_scan --depth 3 --fanout 4 --files-per-dir 10 --latency 0.01
+    python -m benchmarks.bench_scan --strategy rest --strategy rest-raw --file-size 16384
+
+Exits with status 1 when a strategy makes more requests than --max-requests,
+peaks above --max-peak-mb or spends more than --max-cpu-ms-per-file, so it can
+guard scan costs in CI.
+
+    python -m benchmarks.bench_scan --max-requests 128 --max-peak-mb 2 --max-cpu-ms-per-file 50
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import tracemalloc
+import multiprocessing
+import urllib.request
+from typing import Callable, Dict, NamedTuple
+
+from terence import Terence
+
+# Where a strategy finds the benchmark repository
+class BenchRepo(NamedTuple):
+  url: str         # The repository on the fake server
+  path: str        # A local git repository with the same files
+  mirror_dir: str  # Mirror cache directory, shared by the warm-up and the timed run
+
+# Fetch strategies to compare: name -> callable(terence, repo) performing one scan of a BenchRepo
+STRATEGIES: Dict[str, Callable] = {
+  'rest': lambda terence, repo: terence.scan_repository(repo.url, backend="rest"),
+  'rest-raw': lambda terence, repo: terence.blob_format("raw").scan_repository(repo.url, backend="rest"),
+}
+if shutil.which("git") is not None:
+  STRATEGIES['mirror'] = lambda terence, repo: terence.mirror(repo.mirror_dir).scan_repository(repo.path)
+
+REPO_URL = "https://github.com/bench/repo"
+
+def _serve(shape, server_options, ready):
+  # Imported here so the child process owns the server and all of its memory
+  from benchmarks.fake_github import FakeGitHub, synthetic_files
+  server = FakeGitHub(**server_options).start()
+  server.add_repo("bench", "repo", synthetic_files(**shape))
+  ready.put(server.url)
+  while True:
+    time.sleep(3600)
+
+# Commit the synthetic files into a new git repository under directory
+def _local_repo(directory: str, shape: Dict) -> str:
+  from benchmarks.fake_github import synthetic_files
+  path = os.path.join(directory, "repo")
+  for name, data in synthetic_files(**shape).items():
+    os.makedirs(os.path.dirname(os.path.join(path, name)), exist_ok=True)
+    with open(os.path.join(path, name), "wb") as file:
+      file.write(data)
+  git = ["git", "-c", "user.name=bench", "-c", "user.email=bench@example.com", "-c", "init.defaultBranch=main"]
+  for args in (["init", "-q"], ["add", "-A"], ["commit", "-q", "-m", "bench"]):
+    subprocess.run(git + args, cwd=path, check=True, stdout=subprocess.DEVNULL)
+  return path
+
+def _fake_call(url: str, endpoint: str):
+  with urllib.request.urlopen(f"{url}/_fake/{endpoint}") as response:
+    return json.loads(response.read())
+
+# Run every strategy once against a freshly started fake server
+def run_benchmark(shape: Dict, server_options: Dict = None, strategies: Dict[str, Callable] = None) -> Dict[str, Dict]:
+  """
+  Benchmark each strategy against one synthetic repository
+
+  Returns:
+    dict: { strategy: {
+      'files': int,          # Files in terence.results
+      'requests': int,       # Requests served by the fake server (rate limit checks included)
+      'by_endpoint': dict,   # endpoint -> requests
+      'bytes_sent': int,     # Response bytes sent by the fake server
+      'wall_time': float,    # Seconds
+      'cpu_time': float,     # CPU seconds of the scanning process, the server runs in its own
+      'peak_memory': int     # Peak traced bytes in the scanning process
+    } }
+  """
+  strategies = strategies or STRATEGIES
+  ready = multiprocessing.Queue()
+  process = multiprocessing.Process(target=_serve, args=(shape, server_options or {}, ready), daemon=True)
+  process.start()
+  directory = tempfile.mkdtemp(prefix="terence-bench-")
+  try:
+    url = ready.get(timeout=30)
+    local = _local_repo(directory, shape) if 'mirror' in strategies else None
+    repo = BenchRepo(REPO_URL, local, os.path.join(directory, "mirrors"))
+    report = {}
+    for name, strategy in strategies.items():
+      # Untimed first run, so imports and other one-off costs (like cloning a mirror) don't land on the timed one
+      warm_up = Terence(base_url=url, seconds_between_requests=None).auth("benchmark")
+      strategy(warm_up, repo)
+      warm_up.close()
+      _fake_call(url, "reset")
+      terence = Terence(base_url=url, seconds_between_requests=None).auth("benchmark")
+
+      tracemalloc.start()
+      start, cpu_start = time.perf_counter(), time.process_time()
+      strategy(terence, repo)
+      wall_time = time.perf_counter() - start
+      cpu_time = time.process_time() - cpu_start
+      _, peak = tracemalloc.get_traced_memory()
+      tracemalloc.stop()
+
+      served = _fake_call(url, "stats")
+      report[name] = {
+        'files': len(terence.results),
+        'requests': sum(served['requests'].values()),
+        'by_endpoint': served['requests'],
+        'bytes_sent': served['bytes_sent'],
+        'wall_time': wall_time,
+        'cpu_time': cpu_time,
+        'peak_memory': peak,
+      }
+      terence.close()
+    return report
+  finally:
+    process.terminate()
+    process.join()
+    shutil.rmtree(directory, ignore_errors=True)
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description="Benchmark Terence scans against a local fake GitHub server")
+  parser.add_argument("--depth", type=int, default=2)
+  parser.add_argument("--fanout", type=int, default=3)
+  parser.add_argument("--files-per-dir", type=int, default=10)
+  parser.add_argument("--file-size", type=int, default=2048)
+  parser.add_argument("--binary-ratio", type=float, default=0.1)
+  parser.add_argument("--latency", type=float, default=0.0, help="Seconds of injected latency per request")
+  parser.add_argument("--rate-limit", type=int, default=5000)
+  parser.add_argument("--strategy", action="append", choices=sorted(STRATEGIES), help="Strategies to run (default: all)")
+  parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+  parser.add_argument("--max-requests", type=int, default=None, help="Fail when a strategy makes more requests")
+  parser.add_argument("--max-peak-mb", type=float, default=None, help="Fail when a strategy's peak memory is higher")
+  parser.add_argument("--max-cpu-ms-per-file", type=float, default=None, help="Fail when a strategy spends more CPU per file")
+  args = parser.parse_args(argv)
+
+  shape = {
+    'depth': args.depth, 'fanout': args.fanout, 'files_per_dir': args.files_per_dir,
+    'file_size': args.file_size, 'binary_ratio': args.binary_ratio,
+  }
+  strategies = {name: STRATEGIES[name] for name in (args.strategy or STRATEGIES)}
+  report = run_benchmark(shape, {'latency': args.latency, 'rate_limit': args.rate_limit}, strategies)
+
+  if args.json:
+    print(json.dumps(report, indent=2))
+  else:
+    print(f"{'strategy':<12} {'files':>7} {'requests':>9} {'wall (s)':>9} {'cpu (s)':>8} {'peak MB':>8} {'bytes/file':>11} {'cpu ms/file':>12}")
+    for name, row in report.items():
+      files = max(row['files'], 1)
+      print(f"{name:<12} {row['files']:>7} {row['requests']:>9} {row['wall_time']:>9.3f} {row['cpu_time']:>8.3f} "
+            f"{row['peak_memory'] / 1e6:>8.2f} {row['bytes_sent'] / files:>11.0f} {row['cpu_time'] * 1000 / files:>12.3f}")
+
+  failed = False
+  for name, row in report.items():
+    cpu_ms_per_file = row['cpu_time'] * 1000 / max(row['files'], 1)
+    if args.max_requests is not None and row['requests'] > args.max_requests:
+      print(f"{name}: {row['requests']} requests, more than {args.max_requests}")
+      failed = True
+    if args.max_peak_mb is not None and row['peak_memory'] / 1e6 > args.max_peak_mb:
+      print(f"{name}: peak memory {row['peak_memory'] / 1e6:.2f} MB, more than {args.max_peak_mb} MB")
+      failed = True
+    if args.max_cpu_ms_per_file is not None and cpu_ms_per_file > args.max_cpu_ms_per_file:
+      print(f"{name}: {cpu_ms_per_file:.3f} CPU ms per file, more than {args.max_cpu_ms_per_file}")
+      failed = True
+  if failed:
+    sys.exit(1)
+  return report
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,457 @@
+"""
+Local fake GitHub API server for offline tests and benchmarks
+
+Serves synthetic repositories over the REST contents/git/commits/pulls endpoints
+and the Git LFS batch API, with optional injected latency and X-RateLimit-* accounting.
+
+Usage:
+    from benchmarks.fake_github import FakeGitHub, synthetic_files
+
+    with FakeGitHub() as server:
+      server.add_repo("owner", "repo", synthetic_files(depth=2, fanout=3))
+      terence = Terence(base_url=server.url, seconds_between_requests=None).auth("fake")
+      terence.scan_repository("https://github.com/owner/repo")
+      print(server.requests)
+"""
+
+import re
+import json
+import time
+import base64
+import random
+import hashlib
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import urlsplit, parse_qs, quote, unquote
+
+TEXT_EXTENSIONS = ['.py', '.js', '.ts', '.go', '.rs', '.java', '.c', '.html', '.css']
+BINARY_EXTENSIONS = ['.png', '.jpg', '.pdf', '.zip']
+
+# Deterministic repository contents of a configurable shape, as { path: bytes }
+def synthetic_files(depth: int = 2, fanout: int = 3, files_per_dir: int = 5, file_size: int = 1024,
+                    binary_ratio: float = 0.1, seed: int = 0) -> Dict[str, bytes]:
+  rng = random.Random(seed)
+  files = {}
+
+  def fill(prefix, level):
+    for i in range(files_per_dir):
+      if rng.random() < binary_ratio:
+        ext = rng.choice(BINARY_EXTENSIONS)
+        data = bytes([0x89, 0x50, 0x4e, 0x47, 0xff, 0x00]) + bytes(rng.getrandbits(8) for _ in range(max(file_size - 6, 0)))
+      else:
+        ext = rng.choice(TEXT_EXTENSIONS)
+        line = f"# {prefix or 'root'} file {i}\n"
+        data = (line * (file_size // len(line) + 1))[:file_size].encode('utf-8')
+      files[f"{prefix}file_{i}{ext}"] = data
+    if level < depth:
+      for d in range(fanout):
+        fill(f"{prefix}dir_{level}_{d}/", level + 1)
+
+  fill("", 0)
+  return files
+
+# Git object id of a blob, so SHAs match what real GitHub would report
+def git_blob_sha(data: bytes) -> str:
+  return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+class _Snapshot:
+  """Trees, blobs and commit of one ref of a fake repository"""
+
+  def __init__(self, files: Dict[str, bytes], ref: str, submodules: Optional[Dict[str, str]] = None):
+    self.files = dict(files)
+    self.submodules = dict(submodules or {})  # path -> pinned commit sha
+    self.blobs = {}   # sha -> bytes
+    self.trees = {}   # tree sha -> [entry]
+    self.dirs = {}    # dir path -> tree sha
+    self.paths = {}   # path -> blob sha
+
+    children = {"": {}}
+    for path in self.files:
+      parts = path.split("/")
+      for i in range(1, len(parts)):
+        parent, child = "/".join(parts[:i - 1]), "/".join(parts[:i])
+        children.setdefault(child, {})
+        children.setdefault(parent, {})[parts[i - 1]] = ("tree", child)
+      children.setdefault("/".join(parts[:-1]), {})[parts[-1]] = ("blob", path)
+    for path in self.submodules:
+      parts = path.split("/")
+      for i in range(1, len(parts)):
+        parent, child = "/".join(parts[:i - 1]), "/".join(parts[:i])
+        children.setdefault(child, {})
+        children.setdefault(parent, {})[parts[i - 1]] = ("tree", child)
+      children.setdefault("/".join(parts[:-1]), {})[parts[-1]] = ("commit", path)
+
+    def build(dir_path):
+      entries = []
+      for name in sorted(children[dir_path]):
+        kind, full = children[dir_path][name]
+        if kind == "tree":
+          sha = build(full)
+          entries.append({'name': name, 'path': full, 'type': "tree", 'mode': "040000", 'sha': sha})
+        elif kind == "commit":
+          entries.append({'name': name, 'path': full, 'type': "commit", 'mode': "160000", 'sha': self.submodules[full]})
+        else:
+          data = self.files[full]
+          sha = git_blob_sha(data)
+          self.blobs[sha] = data
+          self.paths[full] = sha
+          entries.append({'name': name, 'path': full, 'type': "blob", 'mode': "100644", 'sha': sha, 'size': len(data)})
+      sha = hashlib.sha1(json.dumps([(e['name'], e['sha']) for e in entries]).encode()).hexdigest()
+      self.trees[sha] = entries
+      self.dirs[dir_path] = sha
+      return sha
+
+    self.tree_sha = build("")
+    self.commit_sha = hashlib.sha1(f"commit {ref} {self.tree_sha}".encode()).hexdigest()
+
+# Files changed from one snapshot to another, in the shape of the pull request files listing
+def _diff(old: _Snapshot, new: _Snapshot):
+  removed = {path: sha for path, sha in old.paths.items() if path not in new.paths}
+  changed = []
+  for path in sorted(new.paths):
+    sha = new.paths[path]
+    entry = {'filename': path, 'sha': sha, 'additions': 0, 'deletions': 0, 'changes': 0}
+    if path in old.paths:
+      if old.paths[path] == sha:
+        continue
+      entry['status'] = "modified"
+    else:
+      # Same content at a removed path is reported as a rename
+      previous = next((p for p, s in removed.items() if s == sha), None)
+      if previous is not None:
+        del removed[previous]
+        entry.update({'status': "renamed", 'previous_filename': previous})
+      else:
+        entry['status'] = "added"
+    changed.append(entry)
+  for path, sha in sorted(removed.items()):
+    changed.append({'filename': path, 'sha': sha, 'status': "removed", 'additions': 0, 'deletions': 0, 'changes': 0})
+  return changed
+
+class FakeGitHub:
+  """
+  Threaded HTTP server imitating the parts of the GitHub API Terence uses
+
+  latency: seconds slept before answering each request
+  rate_limit: requests allowed before answering 403, reported through X-RateLimit-* headers
+  truncate_trees_over: recursive tree listings with more entries report truncated=true
+  """
+
+  def __init__(self, latency: float = 0.0, rate_limit: int = 5000, truncate_trees_over: Optional[int] = None):
+    self.latency = latency
+    self.rate_limit = rate_limit
+    self.truncate_trees_over = truncate_trees_over
+    self.repos = {}  # (owner, name) -> {'default_branch': str, 'refs': {ref: _Snapshot}, 'pulls': {number: (base, head)}}
+    self.requests = Counter()  # endpoint -> number of requests served
+    self.bytes_sent = 0
+    self.remaining = rate_limit
+    self.rejected = 0  # requests answered 403 because the rate limit was exhausted
+    self.lfs_objects = {}  # oid -> bytes served by the LFS batch API
+    self._lock = threading.Lock()
+    self._server = None
+    self._thread = None
+
+  def __enter__(self):
+    return self.start()
+
+  def __exit__(self, *exc):
+    self.stop()
+
+  @property
+  def url(self) -> str:
+    host, port = self._server.server_address[:2]
+    return f"http://{host}:{port}"
+
+  # submodules maps paths to the commit SHA each submodule is pinned to (the .gitmodules file goes in files)
+  def add_repo(self, owner: str, name: str, files: Dict[str, bytes], ref: str = "main", default: bool = True,
+               submodules: Optional[Dict[str, str]] = None):
+    repo = self.repos.setdefault((owner, name), {'default_branch': ref, 'refs': {}, 'pulls': {}})
+    repo['refs'][ref] = _Snapshot(files, ref, submodules)
+    if default:
+      repo['default_branch'] = ref
+    return self
+
+  # Store data on the LFS server and return the pointer file to commit in its place
+  def add_lfs_object(self, data: bytes) -> bytes:
+    oid = hashlib.sha256(data).hexdigest()
+    self.lfs_objects[oid] = data
+    return f"version https://git-lfs.github.com/spec/v1\noid sha256:{oid}\nsize {len(data)}\n".encode()
+
+  # Open pull request `number` merging head into base, both refs added with add_repo
+  def add_pull(self, owner: str, name: str, number: int, head: str, base: Optional[str] = None):
+    repo = self.repos[(owner, name)]
+    repo['pulls'][number] = (base or repo['default_branch'], head)
+    return self
+
+  def reset_counters(self):
+    with self._lock:
+      self.requests = Counter()
+      self.bytes_sent = 0
+      self.remaining = self.rate_limit
+      self.rejected = 0
+
+  def start(self):
+    fake = self
+
+    class Handler(_Handler):
+      server_state = fake
+
+    self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    self._server.daemon_threads = True
+    self._thread = threading.Thread(target=self._server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    self._thread.start()
+    return self
+
+  def stop(self):
+    if self._server:
+      self._server.shutdown()
+      self._server.server_close()
+      self._server = None
+
+  # Resolve a branch name, commit SHA or tree SHA to the snapshot that owns it
+  def _snapshot(self, repo, ref):
+    if ref in (None, ""):
+      ref = repo['default_branch']
+    if ref in repo['refs']:
+      return repo['refs'][ref]
+    for snapshot in repo['refs'].values():
+      if ref == snapshot.commit_sha or ref in snapshot.trees or ref in snapshot.blobs:
+        return snapshot
+    return None
+
+class _Handler(BaseHTTPRequestHandler):
+  server_state = None  # FakeGitHub, set by FakeGitHub.start
+  protocol_version = "HTTP/1.1"
+  disable_nagle_algorithm = True
+
+  def log_message(self, format, *args):
+    pass  # Keep test and benchmark output quiet
+
+  def do_GET(self):
+    self._dispatch("GET")
+
+  def do_POST(self):
+    self._dispatch("POST")
+
+  def _dispatch(self, verb):
+    fake = self.server_state
+    parts = urlsplit(self.path)
+    path = unquote(parts.path)
+    query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+    body = self.rfile.read(int(self.headers.get('Content-Length') or 0)) if verb == "POST" else b""
+
+    if path == "/_fake/stats":
+      return self._json(200, {'requests': dict(fake.requests), 'bytes_sent': fake.bytes_sent, 'remaining': fake.remaining}, count=None)
+    if path == "/_fake/reset":
+      fake.reset_counters()
+      return self._json(200, {}, count=None)
+    if path == "/rate_limit":
+      return self._json(200, self._rate_limit_body(), count="rate_limit")
+
+    if fake.latency:
+      time.sleep(fake.latency)
+
+    if re.match(r"^/[^/]+/[^/]+\.git/info/lfs/objects/batch$", path) and verb == "POST":
+      return self._lfs_batch(json.loads(body or b"{}"))
+    if path.startswith("/_lfs/"):
+      data = fake.lfs_objects.get(path[len("/_lfs/"):])
+      if data is None:
+        return self._json(404, {'message': "Not Found"}, count="lfs")
+      return self._raw(data, count="lfs", content_type="application/octet-stream")
+
+    match = re.match(r"^/repos/([^/]+)/([^/]+)(?:/(.*))?$", path)
+    if not match or (match.group(1), match.group(2)) not in fake.repos:
+      return self._json(404, {'message': "Not Found"}, count="repos")
+    owner, name, rest = match.group(1), match.group(2), match.group(3) or ""
+    repo = fake.repos[(owner, name)]
+    base = f"{fake.url}/repos/{owner}/{name}"
+
+    if rest == "":
+      return self._json(200, {
+        'id': abs(hash((owner, name))) % 10 ** 8, 'name': name, 'full_name': f"{owner}/{name}",
+        'owner': {'login': owner}, 'default_branch': repo['default_branch'], 'url': base, 'private': False,
+      }, count="repos")
+
+    if rest == "contents" or rest.startswith("contents/"):
+      return self._contents(repo, base, rest[len("contents/"):] if "/" in rest else "", query.get('ref'))
+    if rest.startswith("git/trees/"):
+      return self._tree(repo, base, rest[len("git/trees/"):], query.get('recursive'))
+    if rest.startswith("git/blobs/"):
+      return self._blob(repo, base, rest[len("git/blobs/"):])
+    if rest.startswith("commits/"):
+      snapshot = fake._snapshot(repo, rest[len("commits/"):])
+      if snapshot is None:
+        return self._json(404, {'message': "No commit found"}, count="commits")
+      return self._json(200, {
+        'sha': snapshot.commit_sha, 'url': f"{base}/commits/{snapshot.commit_sha}",
+        'commit': {'tree': {'sha': snapshot.tree_sha, 'url': f"{base}/git/trees/{snapshot.tree_sha}"}},
+      }, count="commits")
+    if rest.startswith("pulls/"):
+      return self._pull(repo, base, rest[len("pulls/"):], query)
+    return self._json(404, {'message': "Not Found"}, count="other")
+
+  def _contents(self, repo, base, path, ref):
+    snapshot = self.server_state._snapshot(repo, ref)
+    if snapshot is None:
+      return self._json(404, {'message': f"No commit found for the ref {ref}"}, count="contents")
+    suffix = f"?ref={quote(ref)}" if ref else ""
+    path = path.strip("/")
+
+    if path in snapshot.files:
+      data = snapshot.files[path]
+      if self._wants_raw():
+        return self._raw(data, count="contents")
+      return self._json(200, self._content_entry(base, path, snapshot, suffix, data), count="contents")
+    if path in snapshot.dirs:
+      entries = []
+      for entry in snapshot.trees[snapshot.dirs[path]]:
+        full = f"{path}/{entry['name']}" if path else entry['name']
+        if entry['type'] == "tree":
+          entries.append({
+            'type': "dir", 'name': entry['name'], 'path': full, 'sha': entry['sha'], 'size': 0,
+            'url': f"{base}/contents/{quote(full)}{suffix}",
+          })
+        elif entry['type'] == "commit":
+          # Like GitHub, directory listings show submodules as files whose git_url is a tree
+          entries.append({
+            'type': "file", 'name': entry['name'], 'path': full, 'sha': entry['sha'], 'size': 0,
+            'url': f"{base}/contents/{quote(full)}{suffix}", 'git_url': f"{base}/git/trees/{entry['sha']}",
+          })
+        else:
+          entry_json = self._content_entry(base, full, snapshot, suffix, None)
+          entries.append(entry_json)
+      return self._json(200, entries, count="contents")
+    if path in snapshot.submodules:
+      # Asked for directly, a submodule is its own type pinned at a commit
+      return self._json(200, {
+        'type': "submodule", 'name': path.rsplit("/", 1)[-1], 'path': path, 'sha': snapshot.submodules[path],
+        'size': 0, 'url': f"{base}/contents/{quote(path)}{suffix}", 'git_url': f"{base}/git/trees/{snapshot.submodules[path]}",
+      }, count="contents")
+    return self._json(404, {'message': "Not Found"}, count="contents")
+
+  def _content_entry(self, base, path, snapshot, suffix, data):
+    sha = snapshot.paths[path]
+    entry = {
+      'type': "file", 'name': path.rsplit("/", 1)[-1], 'path': path, 'sha': sha,
+      'size': len(snapshot.files[path]), 'url': f"{base}/contents/{quote(path)}{suffix}",
+      'git_url': f"{base}/git/blobs/{sha}",
+    }
+    if data is not None:
+      # Like GitHub, files over 1 MB come back without inline content
+      if len(data) > 1024 * 1024:
+        entry.update({'encoding': "none", 'content': ""})
+      else:
+        entry.update({'encoding': "base64", 'content': base64.encodebytes(data).decode('ascii')})
+    return entry
+
+  def _tree(self, repo, base, sha, recursive):
+    fake = self.server_state
+    snapshot = fake._snapshot(repo, sha)
+    if snapshot is None:
+      return self._json(404, {'message': "Not Found"}, count="trees")
+    tree_sha = sha if sha in snapshot.trees else snapshot.tree_sha
+
+    entries = []
+    # Paths are built from names relative to the requested tree, like the real endpoint.
+    # Identical directories share one tree SHA, so stored paths can't be used here
+    def walk(current, prefix):
+      for entry in snapshot.trees[current]:
+        item = {key: entry[key] for key in ('mode', 'type', 'sha', 'size') if key in entry}
+        item['path'] = prefix + entry['name']
+        item['url'] = f"{base}/git/{'trees' if entry['type'] == 'tree' else 'blobs'}/{entry['sha']}"
+        entries.append(item)
+        if recursive and entry['type'] == "tree":
+          walk(entry['sha'], item['path'] + "/")
+
+    walk(tree_sha, "")
+    truncated = fake.truncate_trees_over is not None and len(entries) > fake.truncate_trees_over
+    if truncated:
+      entries = entries[:fake.truncate_trees_over]
+    return self._json(200, {'sha': tree_sha, 'url': f"{base}/git/trees/{tree_sha}", 'tree': entries, 'truncated': truncated}, count="trees")
+
+  def _blob(self, repo, base, sha):
+    snapshot = self.server_state._snapshot(repo, sha)
+    if snapshot is None or sha not in snapshot.blobs:
+      return self._json(404, {'message': "Not Found"}, count="blobs")
+    data = snapshot.blobs[sha]
+    if self._wants_raw():
+      return self._raw(data, count="blobs")
+    return self._json(200, {
+      'sha': sha, 'size': len(data), 'url': f"{base}/git/blobs/{sha}",
+      'content': base64.encodebytes(data).decode('ascii'), 'encoding': "base64",
+    }, count="blobs")
+
+  def _pull(self, repo, base, rest, query):
+    number, _, files = rest.partition("/")
+    if not number.isdigit() or int(number) not in repo['pulls'] or files not in ("", "files"):
+      return self._json(404, {'message': "Not Found"}, count="pulls")
+    base_ref, head_ref = repo['pulls'][int(number)]
+    old, new = repo['refs'][base_ref], repo['refs'][head_ref]
+    changed = _diff(old, new)
+    if files:
+      # Paginated like the real endpoint (30 per page by default, 100 at most)
+      per_page = min(int(query.get('per_page', 30)), 100)
+      page = int(query.get('page', 1))
+      return self._json(200, changed[(page - 1) * per_page:page * per_page], count="pulls")
+    return self._json(200, {
+      'number': int(number), 'state': "open", 'url': f"{base}/pulls/{number}", 'changed_files': len(changed),
+      'head': {'ref': head_ref, 'sha': new.commit_sha}, 'base': {'ref': base_ref, 'sha': old.commit_sha},
+    }, count="pulls")
+
+  # Download actions for every requested object the server has, pointing at /_lfs/<oid>
+  def _lfs_batch(self, payload):
+    fake = self.server_state
+    objects = []
+    for item in payload.get('objects', []):
+      if item['oid'] in fake.lfs_objects:
+        objects.append(dict(item, actions={'download': {'href': f"{fake.url}/_lfs/{item['oid']}", 'header': {}}}))
+      else:
+        objects.append(dict(item, error={'code': 404, 'message': "Object does not exist"}))
+    self._json(200, {'transfer': "basic", 'objects': objects}, count="lfs_batch")
+
+  def _wants_raw(self) -> bool:
+    return "raw" in (self.headers.get('Accept') or "")
+
+  def _rate_limit_body(self):
+    fake = self.server_state
+    rate = {'limit': fake.rate_limit, 'remaining': fake.remaining, 'reset': int(time.time()) + 3600, 'used': fake.rate_limit - fake.remaining}
+    return {'resources': {'core': rate}, 'rate': rate}
+
+  # Count the request against the rate limit; returns False once the budget is exhausted
+  def _spend(self, count) -> bool:
+    fake = self.server_state
+    with fake._lock:
+      if count:
+        fake.requests[count] += 1
+      if count and count != "rate_limit":
+        if fake.remaining <= 0:
+          fake.rejected += 1
+          return False
+        fake.remaining -= 1
+    return True
+
+  def _send(self, status, payload: bytes, content_type, count):
+    fake = self.server_state
+    if not self._spend(count):
+      status, content_type = 403, "application/json"
+      payload = json.dumps({'message': "API rate limit exceeded"}).encode()
+    self.send_response(status)
+    self.send_header("Content-Type", content_type)
+    self.send_header("Content-Length", str(len(payload)))
+    self.send_header("X-RateLimit-Limit", str(fake.rate_limit))
+    self.send_header("X-RateLimit-Remaining", str(fake.remaining))
+    self.send_header("X-RateLimit-Reset", str(int(time.time()) + 3600))
+    self.send_header("X-RateLimit-Used", str(fake.rate_limit - fake.remaining))
+    self.send_header("X-RateLimit-Resource", "core")
+    self.end_headers()
+    self.wfile.write(payload)
+    with fake._lock:
+      fake.bytes_sent += len(payload)
+
+  def _json(self, status, body, count):
+    self._send(status, json.dumps(body).encode('utf-8'), "application/json; charset=utf-8", count)
+
+  def _raw(self, data: bytes, count, content_type="application/vnd.github.raw"):
+    self._send(200, data, content_type, count)
@@ -12,7 +12,7 @@ setup(
     url="https://github.com/GarfieldFluffJr/Terence",
 
     # Package discovery
-    packages=find_packages(exclude=["tests", "tests.*"]),
+    packages=find_packages(exclude=["tests", "tests.*", "benchmarks", "benchmarks.*"]),
 
     # Dependencies required to run the package
     install_requires=[
@@ -24,7 +24,19 @@ setup(
     extras_require={
         "dev": [
             "pytest>=7.4.0",
-        ]
+        ],
+        # Columnar file metadata tables (Terence.file_table)
+        "table": [
+            "numpy>=1.20",
+        ],
+        # Near-duplicate detection (Terence.index_near_duplicates)
+        "similarity": [
+            "numpy>=1.20",
+        ],
+        # Parquet export (terence.export.export_parquet)
+        "parquet": [
+            "pyarrow>=8.0",
+        ],
     },
 
     # Python version requirement
@@ -13,8 +13,30 @@ Usage:
     print(f"Found {len(terence.results)} files")
 """
 
-from terence.client import Terence, RateLimitException
+from terence.exceptions import PathNotFoundException, RateLimitException, ScanCancelledException
 from terence.utils import parse_github_url, should_scan_file
+from terence.stats import ScanStats
+from terence.progress import ScanProgress, CancelToken
+
+# Imported on first access, so `from terence import parse_github_url` stays cheap for short-lived processes
+_LAZY = {
+  'Terence': "terence.client",
+  'ScanResult': "terence.result",
+  'ResultView': "terence.views",
+  'PullRequestScan': "terence.pulls",
+  'ChangedFile': "terence.pulls",
+}
+
+def __getattr__(name):
+  if name not in _LAZY:
+    raise AttributeError(f"module 'terence' has no attribute '{name}'")
+  import importlib
+  value = getattr(importlib.import_module(_LAZY[name]), name)
+  globals()[name] = value  # Later lookups skip __getattr__
+  return value
+
+def __dir__():
+  return sorted(set(globals()) | set(_LAZY))
 
 __version__ = "1.0.3"
-__all__ = ["Terence", "RateLimitException", "parse_github_url", "should_scan_file"]
+__all__ = ["Terence", "RateLimitException", "ScanCancelledException", "PathNotFoundException", "ScanStats", "ScanProgress", "CancelToken", "ScanResult", "ResultView", "PullRequestScan", "ChangedFile", "parse_github_url", "should_scan_file"]
@@ -0,0 +1,23 @@
+import sqlite3
+
+# One connection per call, so SQLite stores can be used from any thread or process
+# Used as `with connect(path) as db:`, committing or rolling back an explicit BEGIN on exit
+def connect(path: str):
+  db = sqlite3.connect(path, timeout=30, isolation_level=None)
+  db.row_factory = sqlite3.Row
+  return Transaction(db)
+
+# Commits (or rolls back an explicit BEGIN) and closes a connection
+class Transaction:
+  def __init__(self, db):
+    self.db = db
+
+  def __enter__(self):
+    return self.db
+
+  def __exit__(self, exc_type, *exc):
+    try:
+      if self.db.in_transaction:
+        self.db.execute("ROLLBACK" if exc_type else "COMMIT")
+    finally:
+      self.db.close()
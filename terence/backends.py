@@ -0,0 +1,383 @@
+import base64
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+from terence.utils import parse_github_url
+from terence.mirror import GitMirror
+from terence.exceptions import PathNotFoundException, RateLimitException
+from terence.progress import ScanContext
+from terence.pulls import ChangedFile
+
+# One file in a repository tree
+class TreeEntry(NamedTuple):
+  path: str
+  sha: str      # Git blob SHA
+  size: int     # Bytes, -1 if the backend doesn't know
+
+# Common interface every source of repository contents implements
+class SourceBackend:
+  """
+  Lists trees, fetches blobs and resolves refs for one repository during one scan
+
+  Filtering, decoding, telemetry and progress are handled by Terence on top of
+  these methods, so a new backend only has to know how to talk to its source.
+  Backends are used as context managers. They get the Terence instance running
+  the scan for its configuration, and the scan's ScanContext to record requests
+  in context.stats and report progress, so concurrent scans stay separate
+  """
+
+  name = None
+  requires_auth = True  # Whether Terence.auth() must be called before scanning with this backend
+  lazy = False          # Set by Terence to skip requests for repository metadata the scan doesn't need
+
+  def __init__(self, terence, repo_url: str, context: Optional[ScanContext] = None):
+    self.terence = terence
+    self.repo_url = repo_url
+    self.context = context if context is not None else ScanContext()
+    self.gitlinks = []  # Submodules seen by list_tree, as TreeEntry(path, pinned commit SHA, -1)
+
+  def __enter__(self):
+    self.open()
+    return self
+
+  def __exit__(self, *exc):
+    self.close()
+
+  def open(self):
+    pass
+
+  def close(self):
+    pass
+
+  # Commit SHA the ref (branch, tag or commit, None for the default branch) points to
+  def resolve_ref(self, ref: Optional[str] = None) -> str:
+    raise NotImplementedError
+
+  # Every file in the tree at ref, or only those under `path` (a directory or a single file)
+  def list_tree(self, ref: Optional[str] = None, path: str = "") -> List[TreeEntry]:
+    raise NotImplementedError
+
+  # Branch scanned when no ref is given, None if the backend can't tell
+  def default_branch(self) -> Optional[str]:
+    return None
+
+  # Raw bytes of one file
+  def fetch_blob(self, entry: TreeEntry) -> bytes:
+    raise NotImplementedError
+
+  # Tree entry and raw bytes of the file at path, without listing the rest of the tree
+  def fetch_file(self, ref: Optional[str], path: str) -> Tuple[TreeEntry, bytes]:
+    entry = next((entry for entry in self.list_tree(ref, path) if entry.path == path), None)
+    if entry is None:
+      raise PathNotFoundException(f"Path '{path}' not found in the repository.")
+    return entry, self.fetch_blob(entry)
+
+  # Head commit SHA, base commit SHA and changed files of pull request `number`
+  def pull_request(self, number: int) -> Tuple[str, str, List[ChangedFile]]:
+    raise NotImplementedError(f"The {self.name} backend can't list pull requests.")
+
+  # Yields (entry, bytes) for each entry, or (entry, exception) when that file couldn't be fetched
+  def fetch_blobs(self, entries: List[TreeEntry]) -> Iterator[Tuple[TreeEntry, Union[bytes, Exception]]]:
+    for entry in entries:
+      try:
+        yield entry, self.fetch_blob(entry)
+      except Exception as e:
+        yield entry, e
+
+# The GitHub REST API through PyGithub
+class RestBackend(SourceBackend):
+  """
+  Lists the whole tree with one recursive git/trees request and fetches files
+  through the git/blobs endpoint. When GitHub truncates the tree listing,
+  falls back to walking directories through the contents endpoint. Files over
+  large_file_size, or every file with Terence.blob_format("raw"), are streamed
+  in their raw form rather than read as base64 JSON
+  """
+
+  name = "rest"
+  listing_workers = 8  # Directories listed at the same time when walking the contents endpoint
+  large_file_size = 1024 * 1024  # Files above this are streamed through RawClient, see fetch_blob
+
+  def open(self):
+    owner, repo_name = parse_github_url(self.repo_url)
+    self.api_path = f"/repos/{owner}/{repo_name}"
+    stats = self.context.stats
+    # Shared by every scan of the instance, so connections and rate limit state are reused
+    self.github = self.terence._github(lazy=self.lazy)
+
+    ledger = self.terence._ledger
+    self.budget_key = self.terence._budget_key if ledger is not None else None
+    # A shared ledger that knows the current budget checks every request anyway
+    if ledger is None or not ledger.current(self.budget_key):
+      # Check rate limit before starting scan
+      with stats.request("rate_limit", "rate_limit"):
+        rate_limit = self.github.get_rate_limit()
+      remaining = rate_limit.rate.remaining
+      reset_time = rate_limit.rate.reset
+      if ledger is not None:
+        ledger.sync(self.budget_key, remaining, rate_limit.rate.limit, reset_time.timestamp())
+
+      # Need at least 10 requests to scan anything useful
+      if remaining < 10:
+        raise RateLimitException(f"Rate limit too low: {remaining} requests remaining. Resets at {reset_time.strftime('%Y-%m-%d %H:%M:%S UTC')}")
+
+    if self.lazy:
+      # Repository object without the request, for operations that only need its URL
+      if hasattr(self.github, "withLazy"):
+        self.repo = self.github.get_repo(f"{owner}/{repo_name}")  # The lazy client's objects are lazy already
+      else:
+        self.repo = self.github.get_repo(f"{owner}/{repo_name}", lazy=True)
+      return
+    with self._request("repos", "listing"):
+      self.repo = self.github.get_repo(f"{owner}/{repo_name}")
+
+  # Time one API request and, with a shared ledger, reserve it first and sync the budget from its response
+  # client is whatever sends the request, the PyGithub client unless given
+  @contextmanager
+  def _request(self, endpoint: str, phase: str, client=None):
+    ledger = self.terence._ledger
+    if ledger is not None:
+      ledger.reserve(self.budget_key)
+    with self.context.stats.request(endpoint, phase):
+      yield
+    if ledger is not None:
+      # Headers of the client's latest response, which may be another thread's
+      client = client or self.github
+      remaining, limit = client.rate_limiting
+      ledger.sync(self.budget_key, remaining, limit, client.rate_limiting_resettime)
+
+  # The client belongs to the Terence instance and stays open for the next scan
+  def close(self):
+    self.github = None
+
+  def resolve_ref(self, ref: Optional[str] = None) -> str:
+    with self._request("commits", "listing"):
+      # raw_data makes a lazily opened repository actually request the commit
+      return self.repo.get_commit(ref or self.repo.default_branch).raw_data['sha']
+
+  def default_branch(self) -> Optional[str]:
+    return self.repo.default_branch
+
+  def list_tree(self, ref: Optional[str] = None, path: str = "") -> List[TreeEntry]:
+    tree_sha, prefix = ref or self.repo.default_branch, ""
+    path = path.strip("/")
+    if path:
+      # Only the subtree is listed, so find its SHA first
+      element = self._find_path(tree_sha, path)
+      if element.type == "blob":
+        return [TreeEntry(path, element.sha, element.size if element.size is not None else -1)]
+      tree_sha, prefix = element.sha, path + "/"
+
+    with self._request("trees", "listing"):
+      tree = self.repo.get_git_tree(tree_sha, recursive=True)
+
+    if tree.raw_data.get('truncated'):
+      # Too many entries for one response, list directory by directory instead
+      files = self._get_files_recursive(self.repo, path, ref, self.github)
+      # Listings finish in any order, sort so scans stay deterministic
+      return [files[file_path] for file_path in sorted(files)]
+    self.context.report_progress(directories=1 + sum(1 for element in tree.tree if element.type == "tree"))
+    self.gitlinks.extend(TreeEntry(prefix + element.path, element.sha, -1) for element in tree.tree if element.type == "commit")
+    return [TreeEntry(prefix + element.path, element.sha, element.size if element.size is not None else -1)
+            for element in tree.tree if element.type == "blob"]
+
+  # Tree element at path, found by listing one (non-recursive) tree per path segment
+  def _find_path(self, tree_sha: str, path: str):
+    element = None
+    for part in path.split("/"):
+      if element is not None and element.type != "tree":
+        element = None
+        break
+      with self._request("trees", "listing"):
+        tree = self.repo.get_git_tree(element.sha if element is not None else tree_sha)
+      element = next((item for item in tree.tree if item.path == part), None)
+      if element is None:
+        break
+    if element is None:
+      raise PathNotFoundException(f"Path '{path}' not found in the repository.")
+    return element
+
+  # One request for the pull request, then one per page of its files listing
+  def pull_request(self, number: int) -> Tuple[str, str, List[ChangedFile]]:
+    from github import UnknownObjectException
+    try:
+      with self._request("pulls", "listing"):
+        pull = self.repo.get_pull(number)
+    except UnknownObjectException:
+      raise Exception(f"Pull request #{number} not found in the repository.")
+
+    files, pages, per_page = [], pull.get_files(), self.github.per_page
+    page = 0
+    while len(files) < pull.changed_files:
+      with self._request("pulls", "listing"):
+        batch = pages.get_page(page)
+      files.extend(ChangedFile(f.filename, f.status, f.sha, f.previous_filename) for f in batch)
+      # GitHub lists at most 3000 files, so changed_files can be larger than what is returned
+      if len(batch) < per_page:
+        break
+      page += 1
+    return pull.head.sha, pull.base.sha, files
+
+  def fetch_blob(self, entry: TreeEntry) -> bytes:
+    if entry.size > self.large_file_size or self.terence._blob_format == "raw":
+      return self._stream_blob(entry)
+    with self._request("blobs", "download"):
+      blob = self.repo.get_git_blob(entry.sha)
+    with self.context.stats.phase("decode"):
+      return base64.b64decode(blob.content) if blob.encoding == "base64" else blob.content.encode('utf-8')
+
+  # Raw bytes of a blob, streamed into one buffer and stopped at the instance's max_file_size
+  def _stream_blob(self, entry: TreeEntry) -> bytes:
+    raw = self.terence._raw_client()
+    with self._request("blobs", "download", raw):
+      return raw.download(f"{self.api_path}/git/blobs/{entry.sha}", entry.size, self.terence._max_file_size)
+
+  # One contents request returns the blob SHA and the content together
+  def fetch_file(self, ref: Optional[str], path: str) -> Tuple[TreeEntry, bytes]:
+    from github import UnknownObjectException
+    try:
+      with self._request("contents", "download"):
+        content = self.repo.get_contents(path, ref=ref) if ref else self.repo.get_contents(path)
+    except UnknownObjectException:
+      raise PathNotFoundException(f"Path '{path}' not found in the repository.")
+    if not isinstance(content, list) and content.type == "submodule":
+      self.gitlinks.append(TreeEntry(path, content.sha, -1))
+    if isinstance(content, list) or content.type != "file":
+      raise Exception(f"Path '{path}' is not a file.")
+    entry = TreeEntry(path, content.sha, content.size)
+    if content.encoding != "base64":
+      # Files over 1 MB come back without inline content
+      return entry, self.fetch_blob(entry)
+    with self.context.stats.phase("decode"):
+      return entry, base64.b64decode(content.content)
+
+  # List all files under path into a flat dictionary of { path: TreeEntry }, one contents request per directory
+  def _get_files_recursive(self, repo, path="", ref=None, github_instance=None) -> Dict[str, TreeEntry]:
+    """
+    Walks the tree breadth first from a work queue rather than by recursion, so
+    depth is only limited by memory. Every directory found is queued and listed by
+    a pool of listing_workers threads, so siblings are listed in parallel, and each
+    file is written once into the same dictionary however deeply it is nested
+    """
+    from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+    results = {}
+    context = self.context
+    context.check_cancelled({})  # Nothing fetched yet, only listed
+
+    with ThreadPoolExecutor(max_workers=self.listing_workers) as pool:
+      pending = {pool.submit(self._list_directory, repo, path, ref, github_instance)}
+      try:
+        while pending:
+          done, pending = wait(pending, return_when=FIRST_COMPLETED)
+          for future in done:
+            contents = future.result()
+            context.report_progress(directories=1)
+            for content in contents:
+              # Check if type is directory or file
+              if content.type == "dir":
+                context.check_cancelled({})
+                pending.add(pool.submit(self._list_directory, repo, content.path, ref, github_instance))
+              elif content.type == "submodule" or "/git/trees/" in (content.git_url or ""):
+                # Directory listings show submodules as files pointing at a tree
+                self.gitlinks.append(TreeEntry(content.path, content.sha, -1))
+              elif content.type == "file":
+                results[content.path] = TreeEntry(content.path, content.sha, content.size)
+      finally:
+        # Listings not started yet are dropped when the walk stops early
+        for future in pending:
+          future.cancel()
+
+    return results
+
+  # Contents of one directory, called from the listing threads
+  def _list_directory(self, repo, path, ref, github_instance) -> list:
+    if github_instance:
+      # Remaining requests as of the last response, so checking costs no request of its own
+      remaining, _ = github_instance.rate_limiting
+      # If we're running low on requests, stop the scan
+      if remaining < 10:
+        reset_time = datetime.fromtimestamp(github_instance.rate_limiting_resettime, timezone.utc)
+        raise RateLimitException(f"Rate limit reached during scan: {remaining} requests remaining. Resets at {reset_time.strftime('%Y-%m-%d %H:%M:%S UTC')}")
+
+    # Get contents at the current path from GitHub in the specified branch
+    with self._request("contents", "listing"):
+      contents = repo.get_contents(path, ref=ref) if ref else repo.get_contents(path)
+
+    # Take care of edge case where contents is one object file, so wrap it in a single-element list
+    return contents if isinstance(contents, list) else [contents]
+
+# A local bare mirror read through the git CLI, see terence.mirror
+class MirrorBackend(SourceBackend):
+  """Reads trees and blobs from a `git clone --mirror` under the directory given to Terence.mirror()"""
+
+  name = "mirror"
+  requires_auth = False
+
+  def open(self):
+    if self.terence._mirror_dir is None:
+      raise Exception("No mirror directory set. Call Terence.mirror(cache_dir) first.")
+    self.mirror = GitMirror(self.terence._mirror_dir, self.repo_url, token=self.terence.token,
+                            token_host=urlsplit(self.terence.base_url).netloc)
+    self._synced = False
+
+  # Fetch before the first lookup, unless the ref is a commit that is already mirrored and so can't change
+  def _sync(self, ref):
+    if self._synced:
+      return
+    pinned = bool(ref) and self.mirror.has_commit(ref) and self.mirror.resolve(ref).startswith(ref)
+    with self.context.stats.phase("sync"):
+      if not self.mirror.exists or (self.terence._mirror_fetch and not pinned):
+        self.mirror.sync()
+    self._synced = True
+
+  def resolve_ref(self, ref: Optional[str] = None) -> str:
+    self._sync(ref)
+    return self.mirror.resolve(ref)
+
+  def default_branch(self) -> Optional[str]:
+    self._sync(None)
+    return self.mirror.default_branch()
+
+  def list_tree(self, ref: Optional[str] = None, path: str = "") -> List[TreeEntry]:
+    commit = self.resolve_ref(ref)
+    with self.context.stats.phase("listing"):
+      entries = self.mirror.list_entries(commit, path)
+    # Git has no empty directories, so nothing listed means the path doesn't exist
+    if path.strip("/") and not entries:
+      raise PathNotFoundException(f"Path '{path}' not found in the repository.")
+    self.context.report_progress(directories=1)
+    self.gitlinks.extend(TreeEntry(path, sha, size) for kind, path, sha, size in entries if kind == "commit")
+    return [TreeEntry(path, sha, size) for kind, path, sha, size in entries if kind == "blob"]
+
+  def fetch_blob(self, entry: TreeEntry) -> bytes:
+    for _, data in self.fetch_blobs([entry]):
+      if isinstance(data, Exception):
+        raise data
+      return data
+
+  # One cat-file process for the whole batch, reading each distinct blob once
+  def fetch_blobs(self, entries: List[TreeEntry]) -> Iterator[Tuple[TreeEntry, Union[bytes, Exception]]]:
+    by_sha = {}
+    for entry in entries:
+      by_sha.setdefault(entry.sha, []).append(entry)
+
+    blobs = self.mirror.read_blobs(list(by_sha))
+    try:
+      for sha, data in blobs:
+        for entry in by_sha.get(sha, []):
+          yield entry, data if data is not None else Exception("missing object")
+    finally:
+      blobs.close()
+
+# Backends selectable by name with scan_repository(..., backend=name)
+BACKENDS = {
+  RestBackend.name: RestBackend,
+  MirrorBackend.name: MirrorBackend,
+}
+
+# Make a SourceBackend subclass selectable by name
+def register_backend(name: str, backend_class):
+  BACKENDS[name] = backend_class
+  return backend_class
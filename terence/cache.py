@@ -0,0 +1,159 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from typing import Dict, List, NamedTuple, Optional
+from urllib.parse import quote
+
+from terence.utils import parse_github_url
+from terence.mirror import is_local_repository, local_path
+
+# What a saved scan remembers about one repository and ref
+class CachedScan(NamedTuple):
+  repo_url: str
+  ref: str
+  commit: str                       # Commit SHA the files were read at
+  files: Dict[str, str]             # { path: blob sha } of every file in the results
+  extensions: Optional[List[str]]   # Filters the scan was run with, reapplied to pushed files
+  path: str
+  include: Optional[List[str]]
+
+# Key a repository the same way whether it comes from a scan URL or a webhook payload
+def repo_key(repo_url: str) -> str:
+  if is_local_repository(repo_url):
+    return "local/" + hashlib.sha1(local_path(repo_url).encode('utf-8')).hexdigest()[:16]
+  owner, repo_name = parse_github_url(repo_url)
+  return f"{owner.lower()}/{repo_name.lower()}"
+
+# Key of the filters a scan ran with, "" for a scan of the whole repository
+def scan_scope(extensions: Optional[List[str]] = None, path: str = "", include: Optional[List[str]] = None) -> str:
+  if extensions is None and not path and not include:
+    return ""
+  extensions = None if extensions is None else sorted(ext if ext.startswith(".") else "." + ext for ext in extensions)
+  scope = [extensions, path.strip("/"), sorted(include or [])]
+  return hashlib.sha1(json.dumps(scope).encode('utf-8')).hexdigest()[:12]
+
+# Scan snapshots and file contents persisted on local disk
+class ScanCache:
+  """
+  Keeps the file list of the last scan of each repository and ref, and the
+  raw bytes of every blob seen, under one directory:
+
+    blobs/<sha[:2]>/<sha[2:]>                content-addressed file contents
+    scans/<owner>/<repo>/<ref>.json          CachedScan of the last full scan of that ref
+    scans/<owner>/<repo>/<ref>@<scope>.json  the same for a subpath, include or extension scope
+    scans/<owner>/<repo>/repo.json           default branch of the repository
+
+  Writes go through a temporary file and a rename, so several processes can share a directory
+  """
+
+  def __init__(self, directory: str):
+    self.directory = os.path.abspath(os.path.expanduser(directory))
+    self._lock = threading.Lock()
+
+  def __repr__(self):
+    return f"ScanCache({self.directory!r})"
+
+  def _blob_path(self, sha: str) -> str:
+    return os.path.join(self.directory, "blobs", sha[:2], sha[2:])
+
+  def _repo_dir(self, repo_url: str) -> str:
+    return os.path.join(self.directory, "scans", *repo_key(repo_url).split("/"))
+
+  # quote() escapes "@" in the ref, so the scope suffix can't be mistaken for part of it
+  def _scan_path(self, repo_url: str, ref: str, scope: str = "") -> str:
+    return os.path.join(self._repo_dir(repo_url), quote(ref, safe="") + (f"@{scope}" if scope else "") + ".json")
+
+  def has_blob(self, sha: str) -> bool:
+    return os.path.isfile(self._blob_path(sha))
+
+  # Raw bytes of a blob, None if it isn't cached
+  def read_blob(self, sha: str) -> Optional[bytes]:
+    try:
+      with open(self._blob_path(sha), "rb") as blob:
+        return blob.read()
+    except FileNotFoundError:
+      return None
+
+  def write_blob(self, sha: str, data: bytes):
+    path = self._blob_path(sha)
+    if not os.path.exists(path):
+      self._write(path, data)
+
+  # Data computed from a blob (e.g. its MinHash signature) under name, None if it isn't cached
+  def read_derived(self, name: str, sha: str) -> Optional[bytes]:
+    try:
+      with open(os.path.join(self.directory, name, sha[:2], sha[2:]), "rb") as derived:
+        return derived.read()
+    except FileNotFoundError:
+      return None
+
+  def write_derived(self, name: str, sha: str, data: bytes):
+    path = os.path.join(self.directory, name, sha[:2], sha[2:])
+    if not os.path.exists(path):
+      self._write(path, data)
+
+  # Default branch recorded by the last scan without a ref
+  def default_ref(self, repo_url: str) -> Optional[str]:
+    try:
+      with open(os.path.join(self._repo_dir(repo_url), "repo.json"), encoding="utf-8") as info:
+        return json.load(info).get('default_branch')
+    except FileNotFoundError:
+      return None
+
+  # The last scan of ref with exactly these filters, the full scan without any
+  def load(self, repo_url: str, ref: Optional[str] = None, extensions: Optional[List[str]] = None, path: str = "",
+           include: Optional[List[str]] = None) -> Optional[CachedScan]:
+    ref = ref or self.default_ref(repo_url)
+    if ref is None:
+      return None
+    return self._read(self._scan_path(repo_url, ref, scan_scope(extensions, path, include)))
+
+  # Every saved scan of ref, whatever its filters
+  def snapshots(self, repo_url: str, ref: str) -> List[CachedScan]:
+    directory, name = self._repo_dir(repo_url), quote(ref, safe="")
+    try:
+      files = sorted(os.listdir(directory))
+    except FileNotFoundError:
+      return []
+    scans = [self._read(os.path.join(directory, file)) for file in files
+             if file == name + ".json" or (file.startswith(name + "@") and file.endswith(".json"))]
+    return [scan for scan in scans if scan is not None]
+
+  def _read(self, path: str) -> Optional[CachedScan]:
+    try:
+      with open(path, encoding="utf-8") as snapshot:
+        return CachedScan(**json.load(snapshot))
+    except FileNotFoundError:
+      return None
+
+  def save(self, scan: CachedScan, default: bool = False):
+    with self._lock:
+      path = self._scan_path(scan.repo_url, scan.ref, scan_scope(scan.extensions, scan.path, scan.include))
+      self._write(path, json.dumps(scan._asdict()).encode('utf-8'))
+      if default:
+        self._write(os.path.join(self._repo_dir(scan.repo_url), "repo.json"),
+                    json.dumps({'default_branch': scan.ref}).encode('utf-8'))
+
+  # Forget a ref in every scope, e.g. after it was deleted, or only the scope of scan
+  def drop(self, repo_url: str, ref: str, scan: Optional[CachedScan] = None):
+    scans = [scan] if scan is not None else self.snapshots(repo_url, ref)
+    for scan in scans:
+      try:
+        os.remove(self._scan_path(repo_url, ref, scan_scope(scan.extensions, scan.path, scan.include)))
+      except FileNotFoundError:
+        pass
+
+  # Atomically replace path with data
+  def _write(self, path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+      with os.fdopen(handle, "wb") as output:
+        output.write(data)
+      os.replace(temporary, path)
+    except BaseException:
+      if os.path.exists(temporary):
+        os.remove(temporary)
+      raise
@@ -0,0 +1,136 @@
+import os
+from collections import deque
+from typing import Container, Iterable, Iterator, List, NamedTuple, Optional
+
+from terence.content import ScannedFile
+
+# One piece of a file, ready for embedding
+class Chunk(NamedTuple):
+  id: str           # "<blob sha>:<start>-<end>", the same for the same content and chunking options
+  path: str
+  sha: str          # Git blob SHA of the file
+  start: int        # Character offsets into the file, end exclusive
+  end: int
+  start_line: int   # 1-based, inclusive
+  end_line: int
+  text: str
+
+# Pieces where a chunk would rather start: top-level code after an indented block or a blank line
+def _break_score(piece: str, previous: str, at_line_start: bool) -> int:
+  if not at_line_start:
+    return 0
+  if piece.strip() and not piece[0].isspace():
+    return 2 if not previous.strip() or previous[0].isspace() else 1
+  return 1 if not previous.strip() else 0
+
+# Split one file into chunks of at most size characters overlapping by about overlap characters
+def chunk_text(path: str, sha: str, text: str, size: int = 1500, overlap: int = 200) -> List[Chunk]:
+  """
+  Chunks end on line boundaries, preferring the start of a top-level definition
+  or a blank line in the second half of the window, so functions and classes stay
+  together when they fit. Lines longer than size are split at size characters.
+  Consecutive chunks share whole lines adding up to at most overlap characters
+  """
+  if size <= 0 or not 0 <= overlap < size:
+    raise ValueError("size must be positive and overlap between 0 and size.")
+
+  # (start, end, line index, starts a line) for every line, lines longer than size cut into pieces
+  pieces, position = [], 0
+  for number, line in enumerate(text.splitlines(keepends=True)):
+    for offset in range(0, len(line), size):
+      pieces.append((position + offset, position + min(offset + size, len(line)), number, offset == 0))
+    position += len(line)
+
+  chunks, first, reach = [], 0, 0  # reach: first piece the next chunk must include to move past the last one
+  while first < len(pieces):
+    start = pieces[first][0]
+    # Last piece that still fits in the window
+    last = first
+    while last + 1 < len(pieces) and pieces[last + 1][1] - start <= size:
+      last += 1
+
+    if last + 1 < len(pieces):
+      # Prefer a syntax-aware break in the second half of the window
+      best, best_score = last, 0
+      for following in range(last + 1, max(first, reach), -1):
+        if pieces[following][0] - start < size // 2:
+          break
+        piece, previous = pieces[following], pieces[following - 1]
+        score = _break_score(text[piece[0]:piece[1]], text[previous[0]:previous[1]], piece[3])
+        if score > best_score:
+          best, best_score = following - 1, score
+          if score == 2:
+            break
+      last = best
+
+    end = pieces[last][1]
+    chunks.append(Chunk(f"{sha}:{start}-{end}", path, sha, start, end,
+                        pieces[first][2] + 1, pieces[last][2] + 1, text[start:end]))
+    if last + 1 >= len(pieces):
+      break
+
+    # Step back over whole pieces for the overlap, as long as the next chunk still reaches past this one
+    following = last + 1
+    while (following - 1 > first and end - pieces[following - 1][0] <= overlap
+           and pieces[last + 1][1] - pieces[following - 1][0] <= size):
+      following -= 1
+    first, reach = following, last + 1
+  return chunks
+
+# Worker entry point, must be importable for the process pool
+def _chunk_batch(batch, size, overlap) -> List[Chunk]:
+  chunks = []
+  for path, sha, text in batch:
+    chunks.extend(chunk_text(path, sha, text, size, overlap))
+  return chunks
+
+# Chunk a stream of files across a process pool
+def chunk_files(files: Iterable[ScannedFile], size: int = 1500, overlap: int = 200, workers: Optional[int] = None,
+                known: Optional[Container[str]] = None, batch_chars: int = 256 * 1024) -> Iterator[Chunk]:
+  """
+  Chunk files (Terence.iter_files(...) or Terence.scanned_files()) as they arrive,
+  yielding chunks as soon as their batch is done (not in file order).
+
+  Files are grouped into batches of about batch_chars characters and handed to a
+  pool of `workers` processes (os.cpu_count() by default, 0 to chunk in this
+  process); at most two batches per worker are queued, so a streaming scan is never
+  read far ahead. Files whose blob SHA is in `known` are skipped: their chunk IDs
+  would be exactly the ones produced last time
+  """
+  if size <= 0 or not 0 <= overlap < size:
+    raise ValueError("size must be positive and overlap between 0 and size.")
+
+  def batches():
+    batch, chars = [], 0
+    for file in files:
+      if known is not None and file.sha in known:
+        continue
+      batch.append((file.path, file.sha, file.content))
+      chars += len(file.content)
+      if chars >= batch_chars:
+        yield batch
+        batch, chars = [], 0
+    if batch:
+      yield batch
+
+  if workers == 0:
+    for batch in batches():
+      yield from _chunk_batch(batch, size, overlap)
+    return
+
+  from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+  workers = workers or os.cpu_count() or 1
+  with ProcessPoolExecutor(max_workers=workers) as pool:
+    pending = deque()
+    for batch in batches():
+      pending.append(pool.submit(_chunk_batch, batch, size, overlap))
+      if len(pending) >= workers * 2:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+          pending.remove(future)
+          yield from future.result()
+    while pending:
+      done, _ = wait(pending, return_when=FIRST_COMPLETED)
+      for future in done:
+        pending.remove(future)
+        yield from future.result()
@@ -1,23 +1,87 @@
-from github import Github, Auth, GithubException, BadCredentialsException, UnknownObjectException
-from terence.utils import parse_github_url, should_scan_file
+import os
+import sys
+import itertools
+import posixpath
+import threading
+from contextlib import contextmanager
+from terence.utils import parse_github_url, parse_github_location, should_scan_file, scan_roots, in_scope
+from terence.exceptions import PathNotFoundException, RateLimitException, ScanCancelledException
+from terence.stats import ScanStats
+from terence.content import ContentStore, ScannedFile
+from terence.cache import ScanCache, CachedScan, repo_key
+from terence.table import FileTable
+from terence.views import PathIndex, ResultView
+from terence.symbols import SymbolIndex
+from terence.similarity import MinHashIndex
+from terence.progress import ScanContext, CancelToken
+from terence.mirror import is_local_repository, local_path
+from terence.backends import BACKENDS, SourceBackend, TreeEntry
+from terence.pulls import PullRequestScan
+from terence.result import ScanResult, scanned_files
+from terence.submodules import parse_gitmodules, resolve_submodule_url
+from terence.raw import RawClient
+from terence.lfs import MAX_POINTER_SIZE, POINTER_PREFIX, LFSClient, is_lfs_path, is_pointer, lfs_endpoint, lfs_patterns, parse_pointer
 
-# Custom exception for rate limiting
-class RateLimitException(Exception):
-  """Raised when GitHub API rate limit is reached"""
-  pass
+MAX_FILE_SIZE = 100 * 1024 * 1024  # GitHub's own limit for the blobs endpoint
+_LFS_POINTER = POINTER_PREFIX.decode('ascii')  # Start of the text of an LFS pointer file
+# Most commits a push webhook payload lists. GitHub cuts longer pushes off without a flag,
+# so a payload listing this many may be missing changes and can't be replayed
+MAX_PUSH_COMMITS = 2048
+
+# PyGithub pulls in requests, urllib3, jwt, nacl and cryptography, so it is only imported on first network use
+def _pygithub():
+  import github
+  return github
+
+# Terence's message for a PyGithub error, None for any other exception
+def _github_error_message(error, repo_url):
+  # Nothing can have raised a PyGithub error before PyGithub was imported
+  github = sys.modules.get("github")
+  if github is None or not isinstance(error, github.GithubException):
+    return None
+  if isinstance(error, github.BadCredentialsException):
+    return "Invalid GitHub token. Please check your token and try again."
+  if isinstance(error, github.UnknownObjectException):
+    owner, repo_name = parse_github_url(repo_url)
+    return f"Repository '{owner}/{repo_name}' not found. Check the URL or access permissions."
+  return f"GitHub API error: {error.data.get('message', str(error))}"
 
 class Terence:
 
-  def __init__(self):
+  submodule_workers = 4  # Submodules scanned at the same time, see Terence.submodules()
+
+  # base_url points at GitHub Enterprise or a local fake server, other keyword arguments go to PyGithub's Github (timeout, per_page, ...)
+  def __init__(self, base_url: str = "https://api.github.com", **github_options):
+    self.base_url = base_url
+    self._github_options = github_options
     self.token = None
-    self._auth = None # private variable
+    self._token_auth = None # private variable, PyGithub's auth for self.token, see _auth
     self.results = {}
     self.last_repo_url = None
     self._branch = None  # Private variable for branch/commit
+    self.stats = None  # ScanStats of the most recent scan, scan() leaves it alone
+    self._stats_hooks = []
+    self._clients = {}  # Shared PyGithub clients by laziness and the RawClient under "raw", see _github() and _raw_client()
+    self._lock = threading.Lock()
+    self._mirror_dir = None  # Set by mirror() to scan from local bare mirrors instead of the API
+    self._mirror_fetch = True
+    self.content = ContentStore()  # File contents interned by blob SHA, shared by every scan
+    self._cache = None  # ScanCache persisting scans and blobs on disk, see Terence.cache()
+    self._ledger = None  # RateLimitLedger shared with other processes, see Terence.share_rate_limit()
+    self._submodule_depth = 0  # Levels of submodules scanned, see Terence.submodules()
+    self._lfs = "skip"  # What happens to Git LFS files, see Terence.lfs()
+    self._max_file_size = MAX_FILE_SIZE  # Larger files are skipped, see Terence.max_file_size()
+    self._blob_format = "json"  # How the REST backend downloads files, see Terence.blob_format()
+    self.shas = {}  # { path: blob SHA } for self.results
+    self._entries = {}  # { path: TreeEntry } of every file fetched by the last scan, binary ones included
+    self._table = None  # (results, FileTable) of the last scan, built on first use
+    self._index = None  # (results, PathIndex) of the last scan, built by the first view()
+    self.symbols = SymbolIndex()  # Filled by index_symbols()
+    self.minhash = MinHashIndex()  # Filled by index_near_duplicates()
 
   # Representation method so when user performs print(terence), they see info rather than memory address
   def __repr__(self):
-    auth_status = "authenticated" if self._auth else "not authenticated"
+    auth_status = "authenticated" if self.token else "not authenticated"
     branch_info = f", branch={self._branch}" if self._branch else ""
     if self.results:
         return f"Terence({auth_status}{branch_info}, files={len(self.results)})"
@@ -26,61 +90,974 @@ class Terence:
 
   def auth(self, token: str):
     self.token = token
-    self._auth = Auth.Token(self.token)
+    self._token_auth = None
+    self.close()  # Clients of the previous token
     return self # Allows for chaining on initialization
-  
-  def scan_repository(self, repo_url: str, extensions: list = None):
-    if not self._auth or not self.token:
-      raise Exception("Not authenticated. Call Terence.auth(token) first.")
 
-    owner, repo_name = parse_github_url(repo_url)
+  # PyGithub's token auth, built on first use so authenticating doesn't import PyGithub
+  @property
+  def _auth(self):
+    if self.token and self._token_auth is None:
+      self._token_auth = _pygithub().Auth.Token(self.token)
+    return self._token_auth
+  
+  def scan_repository(self, repo_url: str, extensions: list = None, on_progress=None, cancel: CancelToken = None, timeout: float = None, backend=None, include: list = None):
+    """
+    Scan a repository into self.results
 
+    on_progress is called with a ScanProgress after every directory listing and file.
+    The scan stops before its next request once `cancel` is cancelled or `timeout`
+    seconds have passed, raising ScanCancelledException with the partial results,
+    which are also left in self.results.
+    backend selects where files come from: a name in terence.backends.BACKENDS
+    ("rest", "mirror") or a SourceBackend subclass. Defaults to "mirror" after
+    Terence.mirror() was called and "rest" otherwise.
+    URLs pointing into a repository (/tree/<ref>/<path> or /blob/<ref>/<path>) only scan
+    that subtree or file, at that ref unless branch() was set. include is a list of globs
+    relative to the repository root (e.g. "services/*/src/**"); only matching files and
+    the subtrees that can contain them are listed and fetched
+    """
+    context = self._context(on_progress, cancel, timeout)
     try:
-      # Opens new Github instance, automatically closes at the end
-      with Github(auth=self._auth) as g:
-        # Check rate limit before starting scan
-        rate_limit = g.get_rate_limit()
-        remaining = rate_limit.rate.remaining
-        reset_time = rate_limit.rate.reset
-
-        # Need at least 10 requests to scan anything useful
-        if remaining < 10:
-          raise RateLimitException(f"Rate limit too low: {remaining} requests remaining. Resets at {reset_time.strftime('%Y-%m-%d %H:%M:%S UTC')}")
-
-        repo = g.get_repo(f"{owner}/{repo_name}")
-        # Pass Github instance to check rate limit during recursion
-        self.results = self._get_files_recursive(repo, "", extensions, g)
-        # Returns a flat dictionary of every file specified by the user so not nested
-        self.last_repo_url = repo_url
-    except RateLimitException as e:
-      self.results = {}  # Clear results on rate limit error
-      raise  # Re-raise the RateLimitException as-is
-    except BadCredentialsException:
-      self.results = {}  # Clear results on error
-      raise Exception("Invalid GitHub token. Please check your token and try again.")
-    except UnknownObjectException:
-      self.results = {}  # Clear results on error
-      raise Exception(f"Repository '{owner}/{repo_name}' not found. Check the URL or access permissions.")
-    except GithubException as e:
-      self.results = {}  # Clear results on error
-      raise Exception(f"GitHub API error: {e.data.get('message', str(e))}")
+      result = self._scan(context, repo_url, self._branch, extensions, include, backend)
+    except ScanCancelledException as e:
+      self.results = e.results  # Keep partial results so the caller can checkpoint them
+      self.shas = context.shas
+      self._entries = context.entries
+      self.last_repo_url = repo_url
+      raise
     except Exception as e:
       self.results = {}  # Clear results on any error
+      self.shas = {}
+      self._entries = {}
       raise
-  
+    self.results, self.shas, self._entries = result.files, result.shas, result.entries
+    self.last_repo_url = repo_url
+
+  # Scan a repository without touching the instance's results, safe to call from several threads at once
+  def scan(self, repo_url: str, ref: str = None, extensions: list = None, include: list = None, backend=None,
+           on_progress=None, cancel: CancelToken = None, timeout: float = None, intern: bool = True) -> ScanResult:
+    """
+    Scan a repository like scan_repository and return its files as a ScanResult
+    instead of storing them on the instance. ref defaults to the ref in the URL and
+    then the default branch; branch() isn't used.
+
+    Concurrent scans share the instance's connection pool, rate limit state, content
+    store and scan cache, but each gets its own results, stats, progress and
+    cancellation, so one authenticated instance can serve a threaded server.
+    A cancelled or timed out scan raises ScanCancelledException with its partial results.
+    With intern=False the files are only held by the returned ScanResult and nothing
+    new is kept in self.content, for long-running processes that scan many repositories
+
+    Returns:
+      ScanResult: (repo_url, ref, commit, files, shas, entries, stats)
+    """
+    context = ScanContext(ScanStats(hooks=self._stats_hooks).start(), on_progress, cancel, timeout)
+    context.intern = intern
+    return self._scan(context, repo_url, ref, extensions, include, backend)
+
+  def _scan(self, context, repo_url, ref=None, extensions=None, include=None, backend=None) -> ScanResult:
+    url_ref, subpath = None, ""
+    if not is_local_repository(repo_url):
+      _, _, url_ref, subpath = parse_github_location(repo_url)
+
+    ref, commit = ref or url_ref, None
+    # Backends close their connections automatically at the end
+    with self._open_source(repo_url, backend, context) as source:
+      if self._cache is None:
+        # Returns a flat dictionary of every file specified by the user so not nested
+        files = self._scan_source(source, extensions, ref, subpath, include)
+      else:
+        # Pin the commit so the saved scan can be matched against later pushes
+        commit = source.resolve_ref(ref)
+        files = self._scan_source(source, extensions, commit, subpath, include)
+        self._cache.save(CachedScan(repo_url, ref or source.default_branch() or commit, commit, dict(context.shas),
+                                    extensions, subpath, include), default=ref is None)
+      if self._submodule_depth > 0:
+        # Saved scans only hold the repository's own files, submodules are pinned separately
+        self._scan_submodules(source, commit or ref, files, subpath, include, extensions, backend)
+    return ScanResult(repo_url, ref, commit, files, context.shas, context.entries, context.stats)
+
+  # Stream the files of a scan instead of collecting them in self.results
+  def iter_files(self, repo_url: str, extensions: list = None, include: list = None, backend=None, on_progress=None, cancel: CancelToken = None, timeout: float = None):
+    """
+    Scan a repository like scan_repository, yielding a ScannedFile(path, sha, size, content)
+    for each text file as soon as it is fetched. Nothing is added to self.results or
+    self.content, so memory stays bounded by one file regardless of repository size.
+    Stopping the iteration early closes the backend
+    """
+    url_ref, subpath = None, ""
+    if not is_local_repository(repo_url):
+      _, _, url_ref, subpath = parse_github_location(repo_url)
+
+    with self._open_source(repo_url, backend, self._context(on_progress, cancel, timeout)) as source:
+      wanted = self._list_wanted(source, extensions, self._branch or url_ref, subpath, include)
+      source.context.report_progress(total=len(wanted))
+      for entry, text in self._fetch_texts(source, wanted, {}, intern=False):
+        size = entry.size if entry.size >= 0 else len(text.encode('utf-8'))
+        yield ScannedFile(entry.path, entry.sha, size, text)
+    self.last_repo_url = repo_url
+
+  # Scan several refs of one repository, downloading each distinct file content only once
+  def scan_refs(self, repo_url: str, refs: list, extensions: list = None, include: list = None, backend=None, on_progress=None, cancel: CancelToken = None, timeout: float = None):
+    """
+    Scan several branches, tags or commits of the same repository
+
+    Every ref's tree is listed, then each distinct blob SHA is fetched once and
+    shared between refs, so N refs cost one scan plus the files that differ.
+    Takes the same filtering, backend, progress and cancellation options as
+    scan_repository. self.results is left untouched
+
+    Returns:
+      dict: { ref: { path: content } }, with identical files sharing the same string object
+    """
+    subpath = ""
+    if not is_local_repository(repo_url):
+      _, _, _, subpath = parse_github_location(repo_url)
+
+    with self._open_source(repo_url, backend, self._context(on_progress, cancel, timeout)) as source:
+      listed = {ref: self._list_wanted(source, extensions, ref, subpath, include) for ref in refs}
+
+      everything = [entry for entries in listed.values() for entry in entries]
+      source.context.report_progress(total=len(everything))
+
+      contents = {}  # sha -> decoded text
+      def per_ref():
+        return {ref: {entry.path: contents[entry.sha] for entry in entries if entry.sha in contents}
+                for ref, entries in listed.items()}
+
+      # _fetch_texts downloads each distinct blob SHA once
+      for entry, text in self._fetch_texts(source, everything, per_ref):
+        contents[entry.sha] = text
+
+      self.last_repo_url = repo_url
+      return per_ref()
+
+  # Scan only the files a pull request adds or modifies
+  def scan_pull_request(self, repo_url: str, number: int, extensions: list = None, include: list = None, base: bool = False, backend=None, on_progress=None, cancel: CancelToken = None, timeout: float = None):
+    """
+    Scan the files changed by pull request `number` into self.results
+
+    The pull request's files listing (one request per page) replaces the tree listing,
+    and only added, modified, renamed and copied files are fetched at the head commit,
+    with the same subpath, extension, include and max_file_size filtering as scan_repository.
+    The listing has no sizes, so head files over max_file_size are left out once fetched.
+    With base=True the versions of those files at the base commit are fetched too
+    (one extra tree listing), keyed by their path at head
+
+    Returns:
+      PullRequestScan: (number, head_sha, base_sha, files, head, base, removed)
+    """
+    subpath = ""
+    if not is_local_repository(repo_url):
+      _, _, _, subpath = parse_github_location(repo_url)
+
+    context = self._context(on_progress, cancel, timeout)
+    try:
+      with self._open_source(repo_url, backend, context) as source:
+        head_sha, base_sha, files = source.pull_request(number)
+
+        wanted = []
+        for changed in files:
+          if not changed.in_head:
+            context.stats.record_skip(changed.path, "removed")
+          elif not in_scope(changed.path, subpath, include):
+            context.stats.record_skip(changed.path, "out_of_scope")
+          elif not should_scan_file(changed.path, extensions):
+            context.stats.record_skip(changed.path, "filtered")
+          else:
+            wanted.append(changed)
+
+        heads = [TreeEntry(changed.path, changed.sha, -1) for changed in wanted]
+        bases = {}  # base entry -> path at head
+        if base and any(changed.in_base for changed in wanted):
+          base_tree = {entry.path: entry for entry in source.list_tree(base_sha)}
+          for changed in wanted:
+            entry = base_tree.get(changed.previous_path or changed.path)
+            if not changed.in_base or entry is None:
+              continue
+            if self._max_file_size is not None and entry.size > self._max_file_size:
+              context.stats.record_skip(entry.path, "too_large")
+            else:
+              bases[entry] = changed.path
+
+        head_results, base_results = {}, {}
+        context.entries = {entry.path: entry for entry in heads}
+        context.report_progress(total=len(heads) + len(bases))
+        # Unchanged content between base and head is only fetched once
+        for entry, text in self._fetch_texts(source, heads + list(bases), head_results):
+          if entry in bases:
+            base_results[bases[entry]] = text
+          else:
+            head_results[entry.path] = text
+            context.shas[entry.path] = entry.sha
+
+      self.results, self.shas, self._entries = head_results, context.shas, context.entries
+      self.last_repo_url = repo_url
+    except ScanCancelledException as e:
+      self.results = e.results  # Keep partial results so the caller can checkpoint them
+      self.shas, self._entries = context.shas, context.entries
+      self.last_repo_url = repo_url
+      raise
+    except Exception:
+      self.results = {}
+      self.shas = {}
+      self._entries = {}
+      raise
+
+    removed = [changed.path for changed in files if not changed.in_head]
+    return PullRequestScan(number, head_sha, base_sha, files, head_results, base_results, removed)
+
+  # Fresh telemetry, progress and cancellation for a scan keeping its results on the instance
+  # Its stats become self.stats right away, so they are there even if the scan fails
+  def _context(self, on_progress=None, cancel=None, timeout=None):
+    context = ScanContext(ScanStats(hooks=self._stats_hooks).start(), on_progress, cancel, timeout)
+    self.stats = context.stats
+    return context
+
+  # Open the backend for one scan with its context, turning GitHub errors into readable ones
+  @contextmanager
+  def _open_source(self, repo_url, backend=None, context=None, lazy=False):
+    backend_class = self._backend_class(backend)
+    # Mirrors of local repositories (and public ones) don't need a token
+    if backend_class.requires_auth and not self.token:
+      raise Exception("Not authenticated. Call Terence.auth(token) first.")
+
+    if not is_local_repository(repo_url):
+      parse_github_url(repo_url)  # Invalid URLs fail before any request
+    context = context if context is not None else self._context()
+
+    try:
+      source = backend_class(self, repo_url, context)
+      source.lazy = lazy
+      with source:
+        yield source
+    except Exception as e:
+      message = _github_error_message(e, repo_url)
+      if message is None:
+        raise
+      raise Exception(message)
+    finally:
+      context.stats.finish()
+
+  # PyGithub client shared by every scan of this instance and thread, so the connection pool
+  # and the rate limit state read from response headers are shared too
+  def _github(self, lazy=False):
+    with self._lock:
+      if lazy not in self._clients:
+        if not lazy:
+          self._clients[lazy] = _pygithub().Github(auth=self._auth, base_url=self.base_url, **self._github_options)
+        else:
+          client = self._clients.get(False) or _pygithub().Github(auth=self._auth, base_url=self.base_url, **self._github_options)
+          self._clients[False] = client
+          # Older PyGithub without withLazy asks for lazy repositories per call instead
+          self._clients[lazy] = client.withLazy(True) if hasattr(client, "withLazy") else client
+      return self._clients[lazy]
+
+  # RawClient streaming raw file bodies, shared like the PyGithub clients and closed with them
+  def _raw_client(self):
+    with self._lock:
+      if "raw" not in self._clients:
+        self._clients["raw"] = RawClient(self.base_url, self.token, timeout=self._github_options.get('timeout', 15))
+      return self._clients["raw"]
+
+  # Close the shared PyGithub and raw clients, the next scan opens new ones
+  def close(self):
+    with self._lock:
+      clients, self._clients = self._clients, {}
+    for client in {id(client): client for client in clients.values()}.values():
+      client.close()
+
+  # Scan from a local bare mirror under cache_dir rather than the GitHub API
+  def mirror(self, cache_dir: str, fetch: bool = True):
+    """
+    Enable mirror scans: every scanned repository is cloned once with `git clone --mirror`
+    into cache_dir and then read straight from its object store, so repeated scans
+    make no API calls. With fetch=True the mirror is updated before each scan
+    (skipped when the branch is a commit already in the mirror).
+    Accepts GitHub URLs, owner/repo, file:// URLs and local paths. Pass None to disable
+    """
+    self._mirror_dir = cache_dir
+    self._mirror_fetch = fetch
+    return self  # Allow chaining
+
+  # Backend class for a scan from a name, a SourceBackend subclass or the instance default
+  def _backend_class(self, backend=None):
+    if backend is None:
+      backend = "mirror" if self._mirror_dir is not None else "rest"
+    if isinstance(backend, type) and issubclass(backend, SourceBackend):
+      return backend
+    if backend not in BACKENDS:
+      raise ValueError(f"Unknown backend '{backend}'. Available backends: {', '.join(sorted(BACKENDS))}")
+    return BACKENDS[backend]
+
+  # List the tree at ref (only the subtrees needed for path and include) and fetch every file that passes the filters
+  def _scan_source(self, source: SourceBackend, extensions=None, ref=None, path="", include=None):
+    results, context = {}, source.context
+    context.check_cancelled(results)
+
+    wanted = self._list_wanted(source, extensions, ref, path, include)
+    context.entries = {entry.path: entry for entry in wanted}
+    context.report_progress(total=len(wanted))
+    for entry, text in self._fetch_texts(source, wanted, results, intern=context.intern):
+      results[entry.path] = text
+      context.shas[entry.path] = entry.sha
+
+    return results
+
+  # Entries of the tree at ref that are in scope and pass the extension filters
+  def _list_wanted(self, source: SourceBackend, extensions=None, ref=None, path="", include=None):
+    entries = []
+    for root in scan_roots(path, include):
+      if not root:
+        entries.extend(source.list_tree(ref))
+        continue
+      try:
+        entries.extend(source.list_tree(ref, root))
+      except PathNotFoundException:
+        # The subpath of a /tree/ or /blob/ URL has to exist, an include glob that matches nothing adds nothing
+        if path:
+          raise
+    wanted, stats = [], source.context.stats
+    for entry in entries:
+      if not in_scope(entry.path, path, include):
+        stats.record_skip(entry.path, "out_of_scope")
+      elif not should_scan_file(entry.path, extensions):
+        stats.record_skip(entry.path, "filtered")
+      elif self._max_file_size is not None and entry.size > self._max_file_size:
+        stats.record_skip(entry.path, "too_large")
+      else:
+        wanted.append(entry)
+    return self._without_lfs_pointers(source, entries, wanted)
+
+  # Submodules found by the last listing of source as (path, repository URL, pinned commit)
+  # Submodules whose URL in .gitmodules isn't a GitHub or local repository are skipped
+  def _list_submodules(self, source: SourceBackend, ref=None):
+    if not source.gitlinks:
+      return []
+    try:
+      _, data = source.fetch_file(ref, ".gitmodules")
+      urls = parse_gitmodules(data.decode('utf-8', 'replace'))
+    except Exception:
+      urls = {}
+    submodules = []
+    for entry in source.gitlinks:
+      url = urls.get(entry.path)
+      url = resolve_submodule_url(url, source.repo_url) if url else None
+      if url is None:
+        source.context.stats.record_skip(entry.path, "submodule")
+      else:
+        submodules.append((entry.path, url, entry.sha))
+    return submodules
+
+  # Files of one submodule at its pinned commit, and its own submodules
+  def _scan_submodule(self, context, repo_url, commit, extensions=None, backend=None):
+    with self._open_source(repo_url, backend, context, lazy=True) as source:
+      files = self._scan_source(source, extensions, commit)
+      return files, self._list_submodules(source, commit)
+
+  # Scan the submodules of source level by level, up to self._submodule_depth levels, and merge their files
+  # into files (and the scan's shas and entries) under their paths
+  def _scan_submodules(self, source: SourceBackend, ref, files, path="", include=None, extensions=None, backend=None):
+    """
+    Every submodule of a level is scanned at the same time by submodule_workers
+    threads, sharing the scan's stats and cancellation. A repository pinned at the
+    same commit in several places (or levels) is scanned once and merged under
+    each path. Submodules that fail are recorded in stats.files_failed under their
+    path and leave the rest of the scan alone
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    context = source.context
+    stats = context.stats
+    # include globs match files, not the submodule directories, so they're applied to the merged files below
+    pending = [submodule for submodule in self._list_submodules(source, ref) if in_scope(submodule[0], path)]
+    scanned = {}  # (repository, commit) -> (files, shas, entries, submodules) or the exception it failed with
+
+    with ThreadPoolExecutor(max_workers=self.submodule_workers) as pool:
+      for _ in range(self._submodule_depth):
+        if not pending:
+          break
+        running = {}
+        for _, url, commit in pending:
+          key = (repo_key(url), commit)
+          if key not in scanned and key not in running:
+            sub_context = ScanContext(stats, None, context.cancel)
+            sub_context.intern = context.intern
+            sub_context.read_cached = context.read_cached
+            sub_context.deadline = context.deadline
+            running[key] = (sub_context, pool.submit(self._scan_submodule, sub_context, url, commit, extensions, backend))
+        for key, (sub_context, future) in running.items():
+          try:
+            sub_files, submodules = future.result()
+            scanned[key] = (sub_files, sub_context.shas, sub_context.entries, submodules)
+          except ScanCancelledException as e:
+            raise ScanCancelledException(str(e), files)
+          except Exception as e:
+            scanned[key] = e
+
+        nested = []
+        for prefix, url, commit in pending:
+          scan = scanned[(repo_key(url), commit)]
+          if isinstance(scan, Exception):
+            stats.record_failure(prefix, str(scan) or type(scan).__name__)
+            continue
+          sub_files, shas, entries, submodules = scan
+          for sub_path, entry in entries.items():
+            merged = f"{prefix}/{sub_path}"
+            if not in_scope(merged, path, include):
+              stats.record_skip(merged, "out_of_scope")
+              continue
+            context.entries[merged] = entry._replace(path=merged)
+            if sub_path in sub_files:
+              files[merged] = sub_files[sub_path]
+              context.shas[merged] = shas[sub_path]
+          nested.extend((f"{prefix}/{sub_path}", sub_url, sub_commit) for sub_path, sub_url, sub_commit in submodules)
+        pending = nested
+
+    for prefix, _, _ in pending:
+      stats.record_skip(prefix, "submodule_depth")
+
+  # wanted without the Git LFS pointers .gitattributes gives away, which lfs("skip") leaves out without a request
+  # Tracked paths come from the .gitattributes files in the listing, which are only read
+  # when some wanted file is small enough to be a pointer. With lfs("fetch") every file is
+  # kept and pointers are recognised from their content once downloaded, wherever they are
+  def _without_lfs_pointers(self, source: SourceBackend, entries, wanted):
+    if self._lfs == "fetch" or not any(entry.size <= MAX_POINTER_SIZE for entry in wanted):
+      return wanted
+    attributes = {}
+    for entry in entries:
+      if posixpath.basename(entry.path) != ".gitattributes":
+        continue
+      found, text = self._known_text(entry.sha, source.context.intern)
+      if not found:
+        try:
+          data = source.fetch_blob(entry)
+        except Exception:
+          continue
+        if self._cache is not None:
+          self._cache.write_blob(entry.sha, data)
+        text = data.decode('utf-8', 'replace')
+      patterns = lfs_patterns(text or "")
+      if patterns:
+        attributes[posixpath.dirname(entry.path)] = patterns
+    if not attributes:
+      return wanted
+
+    kept, stats = [], source.context.stats
+    for entry in wanted:
+      if entry.size > MAX_POINTER_SIZE or not is_lfs_path(entry.path, attributes):
+        kept.append(entry)
+      else:
+        stats.record_skip(entry.path, "lfs")
+    return kept
+
+  # source.fetch_blobs(entries) as (entry, data, oid), saving each blob to the disk cache under its SHA
+  # With lfs("fetch") the LFS pointers among them, and those already known in pointers as (entry, pointer bytes),
+  # are replaced by their objects from the batch API, 100 per request. oid is the object's SHA-256 for
+  # LFS objects (which are cached under it, never under the pointer's SHA) and None for blobs
+  def _fetch_blobs(self, source: SourceBackend, entries, pointers=()):
+    objects = []
+    for entry, data in itertools.chain(source.fetch_blobs(entries), pointers):
+      if isinstance(data, Exception):
+        yield entry, data, None
+        continue
+      if entry.size < 0 and self._max_file_size is not None and len(data) > self._max_file_size:
+        # Listed without a size (pull request files), so the limit could only be checked now
+        yield entry, Exception(f"File is larger than the {self._max_file_size} byte limit."), None
+        continue
+      if self._cache is not None:
+        self._cache.write_blob(entry.sha, data)
+      pointer = parse_pointer(data) if self._lfs == "fetch" else None
+      if pointer is None:
+        yield entry, data, None
+      elif is_local_repository(source.repo_url):
+        yield entry, Exception("LFS objects of local repositories can't be fetched."), None
+      elif self._max_file_size is not None and pointer[1] > self._max_file_size:
+        yield entry, Exception(f"File is larger than the {self._max_file_size} byte limit."), None
+      else:
+        cached = self._cache.read_blob(pointer[0]) if self._cache is not None else None
+        if cached is not None:
+          yield entry, cached, pointer[0]  # Downloaded by an earlier scan
+        else:
+          objects.append(((entry, pointer[0]), *pointer))
+    if objects:
+      owner, repo_name = parse_github_url(source.repo_url)
+      client = LFSClient(lfs_endpoint(self.base_url, owner, repo_name), self.token)
+      try:
+        for (entry, oid), data in client.fetch(objects, source.context.stats):
+          if self._cache is not None and not isinstance(data, Exception):
+            self._cache.write_blob(oid, data)
+          yield entry, data, oid
+      finally:
+        client.close()
+
+  # Fetch and decode entries, yielding (entry, text) for every text file
+  # Each distinct blob SHA is fetched at most once, and never if self.content already has it
+  # partial is the results dict (or a callable building it) handed to ScanCancelledException
+  # With intern=False nothing new is kept in self.content, so memory stays bounded for streaming
+  def _fetch_texts(self, source: SourceBackend, entries, partial, intern=True):
+    context = source.context
+    stats = context.stats
+    context.check_cancelled(partial)
+
+    by_sha = {}
+    for entry in entries:
+      by_sha.setdefault(entry.sha, []).append(entry)
+      if intern:
+        self.content.record_location(entry.sha, source.repo_url, entry.path)
+
+    # Blobs on disk are only looked up here, and read below when their text is needed
+    hits, to_fetch, pointers = [], [], []
+    for sha, group in by_sha.items():
+      if self._is_known(sha):
+        hits.append(group)
+      else:
+        to_fetch.append(group[0])
+
+    for group in hits:
+      sha = group[0].sha
+      # Only filling the cache: a blob on disk is left unread unless it is small enough to be an LFS pointer
+      if not context.read_cached and sha not in self.content and not 0 <= group[0].size <= MAX_POINTER_SIZE:
+        for entry in group:
+          stats.record_cache_hit(entry.path)
+          context.shas[entry.path] = sha
+        context.report_progress(done=len(group))
+        context.check_cancelled(partial)
+        continue
+      found, text = self._known_text(sha, intern)
+      if not found:
+        to_fetch.append(group[0])  # Removed from the disk cache since it was looked up
+        continue
+      if self._lfs == "fetch" and text is not None and text.startswith(_LFS_POINTER):
+        # A pointer seen before, whose object an earlier scan may have downloaded too
+        data = text.encode('utf-8')
+        pointer = parse_pointer(data)
+        if pointer is not None:
+          found, text = self._known_text(pointer[0], intern)
+          if not found:
+            pointers.append((group[0], data))
+            continue
+      # Already interned by an earlier scan, or saved on disk by one
+      for entry in group:
+        stats.record_cache_hit(entry.path)
+        if text is None or text.startswith(_LFS_POINTER):
+          stats.record_skip(entry.path, "binary" if text is None else "lfs")
+          context.report_progress(done=1)
+        else:
+          context.report_progress(done=1)
+          yield entry, text
+          # A large cached repository can't outlast a cancel or timeout either
+          context.check_cancelled(partial)
+
+    fetched = self._fetch_blobs(source, to_fetch, pointers)
+    try:
+      for entry, data, oid in fetched:
+        group = by_sha[entry.sha]
+        if isinstance(data, Exception):
+          # Skip files that couldn't be fetched but remember why
+          for duplicate in group:
+            stats.record_failure(duplicate.path, str(data) or type(data).__name__)
+          context.report_progress(done=len(group))
+        elif is_pointer(data):
+          # LFS pointers .gitattributes didn't give away, with lfs("skip")
+          for duplicate in group:
+            stats.record_skip(duplicate.path, "lfs")
+          context.report_progress(done=len(group))
+        else:
+          try:
+            # Decode the content of the file into readable string
+            with stats.phase("decode"):
+              text = data.decode('utf-8')
+            if intern:
+              # LFS objects are interned under their oid, the pointer's SHA stays the pointer's
+              text = self.content.add(oid or entry.sha, text)
+            stats.record_fetch(entry.path, len(data))
+            context.report_progress(fetched=1, size=len(data))
+            yield entry, text
+            # Other paths with the same content reuse the interned string
+            for duplicate in group[1:]:
+              stats.record_cache_hit(duplicate.path)
+              context.report_progress(done=1)
+              yield duplicate, text
+          except UnicodeDecodeError:
+            # Binary content that isn't text (images, PDFs, etc)
+            self.content.add_binary(oid or entry.sha)
+            for duplicate in group:
+              stats.record_skip(duplicate.path, "binary")
+            context.report_progress(done=len(group))
+        # Stop before the next file is requested
+        context.check_cancelled(partial)
+    finally:
+      fetched.close()
+
+  # Register a callback receiving (event, payload) for every telemetry event of later scans
+  def add_stats_hook(self, hook):
+    self._stats_hooks.append(hook)
+    return self  # Allow chaining
+
   # Reset results but stay authenticated
+  # Interned contents in self.content are kept so the next scan can reuse them
   def clear_results(self):
     self.results = {}
+    self.shas = {}
+    self._entries = {}
     self.last_repo_url = None
     self._branch = None
+    self.stats = None
 
-  # Deauthenticate as well
+  # Deauthenticate and drop the content store as well
   def clear_all(self):
     self.token = None
-    self._auth = None
+    self._token_auth = None
+    self.close()
     self.results = {}
+    self.shas = {}
+    self._entries = {}
     self.last_repo_url = None
     self._branch = None
+    self.stats = None
+    self.content.clear()
+    self.symbols.clear()
+    self.minhash.clear()
+
+  # Whether a blob is in the content store or the disk cache, without reading it
+  def _is_known(self, sha):
+    return sha in self.content or (self._cache is not None and self._cache.has_blob(sha))
+
+  # Content of a blob already in the content store or the disk cache, as (found, text)
+  # text is None for binary blobs; blobs read from disk are interned unless intern=False
+  def _known_text(self, sha, intern=True):
+    if sha in self.content:
+      return True, self.content.get(sha)
+    data = self._cache.read_blob(sha) if self._cache is not None else None
+    if data is None:
+      return False, None
+    try:
+      text = data.decode('utf-8')
+    except UnicodeDecodeError:
+      self.content.add_binary(sha)
+      return True, None
+    return True, self.content.add(sha, text) if intern else text
+
+  # Persist scans and file contents under directory
+  def cache(self, directory: str):
+    """
+    Enable the on-disk scan cache: file contents are saved under directory by blob SHA
+    and reused by every later scan (also from other processes), and every scan
+    (scan_repository, scan, workers) saves its file list under its ref and scope, so
+    load_cached() with the same subpath, include and extensions and apply_push() can
+    use it. A scoped scan never replaces the full scan of a ref. Pass None to disable
+    """
+    self._cache = ScanCache(directory) if directory is not None else None
+    return self  # Allow chaining
+
+  # Scan submodules as nested repositories
+  def submodules(self, depth: int = 1):
+    """
+    Scan the submodules of each repository (and theirs, up to `depth` levels) at
+    the commits they are pinned to, with their files under the submodule's path
+    in the results. Submodules of a level are scanned concurrently and a
+    repository pinned at the same commit in several places is scanned once.
+    Submodules outside GitHub are skipped. Applies to scan_repository and scan.
+    Pass 0 to stop scanning submodules
+    """
+    self._submodule_depth = depth
+    return self  # Allow chaining
+
+  # What happens to files tracked by Git LFS
+  def lfs(self, mode: str = "skip"):
+    """
+    Files tracked by Git LFS are stored in the repository as small pointer files.
+    "skip" leaves them out (skip reason "lfs"), without a request when .gitattributes
+    and their size in the tree listing give them away;
+    "fetch" downloads the real contents of every pointer through the LFS batch API,
+    asking for up to 100 objects per batch request
+    """
+    if mode not in ("skip", "fetch"):
+      raise ValueError(f"Unknown LFS mode '{mode}'. Use 'skip' or 'fetch'.")
+    self._lfs = mode
+    return self  # Allow chaining
+
+  # Largest file fetched, in bytes
+  def max_file_size(self, size: int = MAX_FILE_SIZE):
+    """
+    Files larger than size are skipped without a request (skip reason "too_large"),
+    going by the size in the tree listing. Defaults to 100 MB, the most the blobs
+    endpoint serves; pass None for no limit
+    """
+    if size is not None and size < 0:
+      raise ValueError(f"max_file_size must be at least 0, got {size}.")
+    self._max_file_size = size
+    return self  # Allow chaining
+
+  # How the REST backend downloads files
+  def blob_format(self, mode: str = "json"):
+    """
+    "json" reads each file as base64 inside the blobs endpoint's JSON response,
+    through PyGithub. "raw" asks for the raw media type instead and streams the
+    body straight into a buffer, which saves the base64 overhead (a third of
+    every file) and the JSON parse and base64 decode per file. Files over 1 MB
+    are streamed raw either way
+    """
+    if mode not in ("json", "raw"):
+      raise ValueError(f"Unknown blob format '{mode}'. Use 'json' or 'raw'.")
+    self._blob_format = mode
+    return self  # Allow chaining
+
+  # Share the token's rate limit budget with every Terence instance using the same ledger file
+  def share_rate_limit(self, path: str, floor: int = 10):
+    """
+    Coordinate the rate limit with other instances and processes on the host: every
+    API request reserves its budget in the SQLite ledger at path before it is sent,
+    and the X-RateLimit-* headers of each response are synced back, so workers
+    sharing a token stop at `floor` remaining requests together instead of each
+    running into 403s. Scans also skip their rate_limit request while the ledger
+    knows the current budget. Pass None to stop sharing
+    """
+    from terence.ratelimit import RateLimitLedger
+    self._ledger = RateLimitLedger(path, floor) if path is not None else None
+    return self  # Allow chaining
+
+  # Key of this token's budget in the shared ledger
+  @property
+  def _budget_key(self):
+    from terence.ratelimit import budget_key
+    return budget_key(self.token, self.base_url)
+
+  # Load the last cached scan of a repository into self.results without any request
+  def load_cached(self, repo_url: str, ref: str = None, extensions: list = None, include: list = None):
+    if self._cache is None:
+      raise Exception("No scan cache set. Call Terence.cache(directory) first.")
+    url_ref, subpath = None, ""
+    if not is_local_repository(repo_url):
+      _, _, url_ref, subpath = parse_github_location(repo_url)
+    ref = ref or self._branch or url_ref
+    # Only a scan with the same subpath, include globs and extensions matches
+    cached = self._cache.load(repo_url, ref, extensions, subpath, include)
+    if cached is None:
+      raise Exception(f"No cached scan of '{repo_url}' at {ref or 'the default branch'}.")
+
+    results = {}
+    for path, sha in cached.files.items():
+      _, text = self._known_text(sha)
+      if text is not None and text.startswith(_LFS_POINTER):
+        # Saved by a scan with lfs("fetch"), whose object is cached under its oid
+        pointer = parse_pointer(text.encode('utf-8'))
+        _, text = self._known_text(pointer[0]) if pointer is not None else (False, None)
+      if text is not None:
+        results[path] = text
+    self.results = results
+    self.shas = {path: cached.files[path] for path in results}
+    self._entries = {path: TreeEntry(path, sha, -1) for path, sha in self.shas.items()}
+    self.last_repo_url = repo_url
+    return cached
+
+  # Commit SHA a ref points to, in one request when ref is given
+  def head_commit(self, repo_url: str, ref: str = None, backend=None):
+    """
+    Resolve a branch, tag or commit (the default branch if None) to its commit SHA.
+    With a ref this costs a single commits request, which makes it a cheap way to
+    check whether a cached scan is still current
+    """
+    with self._open_source(repo_url, backend, lazy=ref is not None) as source:
+      return source.resolve_ref(ref)
+
+  # Update the cached scan of a repository from a GitHub push webhook payload
+  def apply_push(self, payload: dict, backend=None):
+    """
+    Bring the cached scans of the pushed repository and ref (the full scan and
+    every scoped one) up to date from a `push` webhook payload, fetching each
+    added and modified file in some scan's scope once.
+    Files are filtered like in a scan: max_file_size, lfs() and submodules apply.
+    Pushes that can't be applied on top of a cached commit (force pushes, or
+    more commits than the payload lists) drop that scan so the next one is full
+
+    Returns:
+      dict: {
+        'repo': str, 'ref': str, 'commit': str,
+        'status': str,     # updated, ignored (nothing cached), stale or deleted
+        'updated': list,   # Paths fetched
+        'removed': list    # Paths removed from the cached scan
+      }
+    """
+    if self._cache is None:
+      raise Exception("No scan cache set. Call Terence.cache(directory) first.")
+    repository = payload.get('repository') or {}
+    repo_url = repository.get('full_name') or repository.get('html_url')
+    ref = payload.get('ref', "")
+    for prefix in ("refs/heads/", "refs/tags/"):
+      if ref.startswith(prefix):
+        ref = ref[len(prefix):]
+    after = payload.get('after')
+    summary = {'repo': repo_url, 'ref': ref, 'commit': after, 'status': "ignored", 'updated': [], 'removed': []}
+
+    # Full and scoped scans of the ref are all brought up to date
+    snapshots = self._cache.snapshots(repo_url, ref) if repo_url and ref else []
+    if not snapshots:
+      return summary
+    if payload.get('deleted'):
+      self._cache.drop(repo_url, ref)
+      summary['status'] = "deleted"
+      return summary
+    commits = payload.get('commits') or []
+    # Push events from the Events API count every commit in 'size' but list only the first 20
+    truncated = len(commits) >= MAX_PUSH_COMMITS or payload.get('size', len(commits)) > len(commits)
+    current = []
+    for cached in snapshots:
+      if payload.get('forced') or payload.get('before') != cached.commit or truncated:
+        self._cache.drop(repo_url, ref, cached)
+      else:
+        current.append(cached)
+    if not current:
+      summary['status'] = "stale"
+      return summary
+
+    # Replay the commits in order, so a file added then removed ends up removed
+    changed, removed = set(), set()
+    for commit in commits:
+      for path in commit.get('added', []) + commit.get('modified', []):
+        changed.add(path)
+        removed.discard(path)
+      for path in commit.get('removed', []):
+        removed.add(path)
+        changed.discard(path)
+
+    def wanted_by(cached, path):
+      return in_scope(path, cached.path, cached.include) and should_scan_file(path, cached.extensions)
+
+    fetched = {}  # path -> blob sha of the changed text files, fetched once for every snapshot
+    wanted = [path for path in sorted(changed) if any(wanted_by(cached, path) for cached in current)]
+    # Lazy: no repository metadata request, only one request per changed file
+    with self._open_source(repo_url, backend, lazy=True) as source:
+      stats = source.context.stats
+      downloaded = []
+      for path in wanted:
+        try:
+          entry, data = source.fetch_file(after, path)
+        except Exception as e:
+          if any(gitlink.path == path for gitlink in source.gitlinks):
+            # A submodule bump, saved scans only hold the repository's own files
+            stats.record_skip(path, "submodule")
+          else:
+            stats.record_failure(path, str(e))
+          continue
+        # The contents endpoint gives no size before the download, so the limit is applied after it
+        if self._max_file_size is not None and entry.size > self._max_file_size:
+          stats.record_skip(path, "too_large")
+        else:
+          downloaded.append((entry, data))
+
+      # LFS pointers are left out or replaced by their objects, like in a scan
+      for entry, data, oid in self._fetch_blobs(source, [], downloaded):
+        if isinstance(data, Exception):
+          stats.record_failure(entry.path, str(data) or type(data).__name__)
+          continue
+        if is_pointer(data):
+          stats.record_skip(entry.path, "lfs")
+          continue
+        try:
+          self.content.add(oid or entry.sha, data.decode('utf-8'))
+          fetched[entry.path] = entry.sha
+          stats.record_fetch(entry.path, len(data))
+          summary['updated'].append(entry.path)
+        except UnicodeDecodeError:
+          self.content.add_binary(oid or entry.sha)
+          stats.record_skip(entry.path, "binary")
+    summary['updated'].sort()
+
+    dropped = set()
+    for cached in current:
+      files = dict(cached.files)
+      for path in wanted:
+        if not wanted_by(cached, path):
+          continue
+        if path in fetched:
+          files[path] = fetched[path]
+        else:
+          files.pop(path, None)  # Failed, skipped, or binary now
+      for path in removed:
+        if files.pop(path, None) is not None:
+          dropped.add(path)
+      self._cache.save(cached._replace(commit=after, files=files))
+    summary['removed'] = sorted(dropped)
+    summary['status'] = "updated"
+    return summary
+
+  # The last scan's results as ScannedFile objects, the same shape iter_files streams
+  def scanned_files(self):
+    return scanned_files(self.results, self.shas, self._entries)
+
+  # Extract the top-level symbols of the last scan into self.symbols
+  def index_symbols(self, workers: int = None):
+    """
+    Index the functions, classes and imports of every file in self.results so
+    self.symbols.find(name) can look them up. Files are parsed across `workers`
+    processes (os.cpu_count() by default, 0 for none), and files whose content
+    was indexed by an earlier call are not parsed again
+    """
+    return self.symbols.update(self.scanned_files(), workers=workers)
+
+  # Add the last scan to the near-duplicate index
+  def index_near_duplicates(self):
+    """
+    MinHash the files of the last scan (or load_cached) into self.minhash under
+    its repository URL, replacing that repository's earlier files, so
+    self.minhash.pairs() finds copied code across every repository indexed so far.
+    Signatures are kept in the scan cache when one is set. Requires NumPy
+    (pip install terence[similarity])
+    """
+    if self.last_repo_url is None:
+      raise Exception("No scan results. Call Terence.scan_repository(url) first.")
+    return self.minhash.add(self.scanned_files(), self.last_repo_url, cache=self._cache)
+
+  # Columnar metadata of the last scan
+  def file_table(self):
+    """
+    Per-file metadata of the last scan as a FileTable of NumPy columns
+    (path, dir, ext, size, sha, lines, is_binary, language), binary files included.
+    Built once per scan and reused until the next one. Requires NumPy
+    (pip install terence[table])
+    """
+    # Every scan assigns a new results dictionary, so its identity tells whether the table is current
+    if self._table is None or self._table[0] is not self.results:
+      entries = [entry for path, entry in self._entries.items()
+                 if path in self.results or self.content.is_binary(entry.sha)]
+      self._table = (self.results, FileTable.from_scan(entries, self.results))
+    return self._table[1]
+
+  # Lazy filtered view of the last scan's results
+  def view(self) -> ResultView:
+    """
+    Every file of the last scan as a read-only ResultView, to narrow without
+    copying: view().directory("src").extension("ts"), .glob("**/*_test.go"),
+    .size(max_size=10_000), .where(lambda file: ...). Directory and extension
+    filters are ranges of a sorted path index, built once per scan, so they
+    only touch the files they match
+    """
+    # Like file_table, the results dictionary's identity tells whether the index is current
+    if self._index is None or self._index[0] is not self.results:
+      self._index = (self.results, PathIndex(self.results, self.shas, self._entries))
+    return ResultView(self._index[1])
+
+  # Paths in self.results whose content is identical: { blob sha: [path, ...] }
+  def duplicate_paths(self):
+    """
+    Group the paths of the last scan that hold identical content
+
+    Returns:
+      dict: { blob_sha: [path, ...] } for every content found under more than one path
+    """
+    groups = {}
+    for path in self.results:
+      groups.setdefault(self.shas[path], []).append(path)
+    return {sha: sorted(paths) for sha, paths in groups.items() if len(paths) > 1}
+
+  # Other paths in self.results with the same content as path
+  def paths_sharing(self, path):
+    if path not in self.shas:
+      raise KeyError(f"'{path}' is not in the scan results.")
+    sha = self.shas[path]
+    return sorted(other for other, other_sha in self.shas.items() if other_sha == sha and other != path)
 
   # Check current rate limit status
   def get_rate_limit(self):
@@ -94,16 +1071,17 @@ class Terence:
         'reset': datetime  # When the limit resets
       }
     """
-    if not self._auth or not self.token:
+    if not self.token:
       raise Exception("Not authenticated. Call Terence.auth(token) first.")
 
-    with Github(auth=self._auth) as g:
-      rate_limit = g.get_rate_limit()
-      return {
-        'remaining': rate_limit.rate.remaining,
-        'limit': rate_limit.rate.limit,
-        'reset': rate_limit.rate.reset
-      }
+    rate_limit = self._github().get_rate_limit()
+    if self._ledger is not None:
+      self._ledger.sync(self._budget_key, rate_limit.rate.remaining, rate_limit.rate.limit, rate_limit.rate.reset.timestamp())
+    return {
+      'remaining': rate_limit.rate.remaining,
+      'limit': rate_limit.rate.limit,
+      'reset': rate_limit.rate.reset
+    }
 
   # Get repository owner and name from last scanned repo
   def get_repo_info(self):
@@ -112,7 +1090,7 @@ class Terence:
 
     Returns:
       dict: {
-        'owner': str,
+        'owner': str,      # None for local repositories
         'repo': str,
         'url': str
       } or None if no repository has been scanned yet
@@ -120,56 +1098,18 @@ class Terence:
     if not self.last_repo_url:
       return None
 
-    owner, repo_name = parse_github_url(self.last_repo_url)
+    if is_local_repository(self.last_repo_url):
+      # Local paths have no owner, the repository is named after its directory
+      name = os.path.basename(local_path(self.last_repo_url).rstrip(os.sep))
+      owner, repo_name = None, name[:-len(".git")] if name.endswith(".git") else name
+    else:
+      owner, repo_name = parse_github_url(self.last_repo_url)
     return {
       'owner': owner,
       'repo': repo_name,
       'url': self.last_repo_url
     }
   
-  # Recursively get all files into a flat dictionary
-  def _get_files_recursive(self, repo, path="", extensions=None, github_instance=None):
-    results = {}
-
-    # Check rate limit before making API call
-    if github_instance:
-      rate_limit = github_instance.get_rate_limit()
-      remaining = rate_limit.rate.remaining
-      reset_time = rate_limit.rate.reset
-
-      # If we're running low on requests, stop the scan
-      if remaining < 10:
-        raise RateLimitException(f"Rate limit reached during scan: {remaining} requests remaining. Resets at {reset_time.strftime('%Y-%m-%d %H:%M:%S UTC')}")
-
-    # Get contents at the current path from GitHub in the specified branch
-    if self._branch:
-      contents = repo.get_contents(path, ref=self._branch)
-    else:
-      contents = repo.get_contents(path)
-
-    # Take care of edge case where contents is one object file, so wrap it in a single-element list
-    if not isinstance(contents, list):
-      contents = [contents]
-
-    for content in contents:
-      # Check if type is directory or file
-      if content.type == "dir":
-        # Pass github_instance to recursive call
-        subdir_results = self._get_files_recursive(repo, content.path, extensions, github_instance)
-        results.update(subdir_results) # Merge dictionaries together, in the format { path: content }
-      elif content.type == "file":
-        # Check if we should scan the file
-        if should_scan_file(content.path, extensions):
-          try:
-            #  Decode the content of the file into readable string since GitHub encodes it as base64
-            file_content = content.decoded_content.decode('utf-8')
-            results[content.path] = file_content # Add entry to dictionary
-          except (UnicodeDecodeError, Exception):
-            # Anything that is an exception, just skip the file (images, PDFs, etc)
-            pass
-
-    return results
-  
   # Set the branch property
   def branch(self, branch_name: str):
     self._branch = branch_name
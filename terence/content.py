@@ -0,0 +1,78 @@
+import threading
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+# One text file of a streamed scan, see Terence.iter_files
+class ScannedFile(NamedTuple):
+  path: str
+  sha: str      # Git blob SHA
+  size: int     # Bytes
+  content: str
+
+# Decoded file contents interned by git blob SHA
+class ContentStore:
+  """
+  Holds each distinct file content once, keyed by its git blob SHA
+
+  Every scan of a Terence instance goes through the same store, so a file that
+  appears under many paths, in many refs or in many repositories is fetched and
+  kept in memory once, and every results dictionary shares the same string.
+  Blob SHAs are content hashes, so sharing across repositories is always safe.
+  Binary blobs are remembered too, so they aren't downloaded again just to be skipped
+  """
+
+  def __init__(self):
+    self._texts = {}       # sha -> str
+    self._binary = set()   # shas of blobs that aren't UTF-8 text
+    self._locations = {}   # sha -> {(repo_url, path)}
+    self._lock = threading.Lock()
+
+  def __repr__(self):
+    return f"ContentStore(blobs={len(self._texts)}, binary={len(self._binary)})"
+
+  def __len__(self):
+    return len(self._texts)
+
+  def __contains__(self, sha: str) -> bool:
+    return sha in self._texts or sha in self._binary
+
+  def get(self, sha: str) -> Optional[str]:
+    return self._texts.get(sha)
+
+  def is_binary(self, sha: str) -> bool:
+    return sha in self._binary
+
+  # Store text for sha and return the interned copy (the one already stored if there is one)
+  def add(self, sha: str, text: str) -> str:
+    with self._lock:
+      return self._texts.setdefault(sha, text)
+
+  def add_binary(self, sha: str):
+    with self._lock:
+      self._binary.add(sha)
+
+  # Remember that sha was seen at path in repo_url
+  def record_location(self, sha: str, repo_url: str, path: str):
+    with self._lock:
+      self._locations.setdefault(sha, set()).add((repo_url, path))
+
+  # Every (repo_url, path) the content was seen at, across all scans
+  def locations(self, sha: str) -> Set[Tuple[str, str]]:
+    with self._lock:
+      return set(self._locations.get(sha, ()))
+
+  # Contents seen at more than one location: { sha: [(repo_url, path), ...] }
+  def duplicates(self) -> Dict[str, List[Tuple[str, str]]]:
+    with self._lock:
+      return {sha: sorted(places) for sha, places in self._locations.items() if len(places) > 1}
+
+  # Characters held by the store, against what separate copies at every location would hold
+  def memory_saved(self) -> int:
+    with self._lock:
+      return sum(len(self._texts[sha]) * (len(places) - 1)
+                 for sha, places in self._locations.items() if sha in self._texts)
+
+  def clear(self):
+    with self._lock:
+      self._texts.clear()
+      self._binary.clear()
+      self._locations.clear()
@@ -0,0 +1,16 @@
+# Custom exception for rate limiting
+class RateLimitException(Exception):
+  """Raised when GitHub API rate limit is reached"""
+  pass
+
+# Raised when a scan is cancelled or times out, carrying whatever was fetched before it stopped
+class ScanCancelledException(Exception):
+  """Raised when a scan is stopped through its CancelToken or timeout"""
+  def __init__(self, message: str, results: dict = None):
+    super().__init__(message)
+    self.results = results if results is not None else {}
+
+# Raised when a path asked for doesn't exist at the scanned ref
+class PathNotFoundException(Exception):
+  """Raised when a subtree or file to scan isn't in the repository"""
+  pass
@@ -0,0 +1,116 @@
+import os
+import bz2
+import gzip
+import json
+import lzma
+from typing import Dict, Iterable, Optional
+
+from terence.content import ScannedFile
+from terence.table import LANGUAGES
+
+# Compressed file openers by name, also inferred from the destination's suffix
+COMPRESSIONS = {
+  'gzip': gzip.open,
+  'bz2': bz2.open,
+  'xz': lzma.open,
+}
+_SUFFIXES = {'.gz': "gzip", '.bz2': "bz2", '.xz': "xz"}
+
+# Metadata and content of one file as an output row
+def file_row(file: ScannedFile) -> Dict:
+  directory, _, name = file.path.rpartition("/")
+  stem, dot, suffix = name.rpartition(".")
+  ext = f".{suffix.lower()}" if dot and stem else ""
+  return {
+    'path': file.path,
+    'dir': directory,
+    'ext': ext,
+    'language': LANGUAGES.get(ext, ""),
+    'size': file.size,
+    'sha': file.sha,
+    'lines': file.content.count("\n") + (not file.content.endswith("\n")) if file.content else 0,
+    'content': file.content,
+  }
+
+# Write one JSON object per file as the files arrive
+def export_jsonl(files: Iterable[ScannedFile], destination, compression: Optional[str] = None) -> int:
+  """
+  Write files (e.g. Terence.iter_files(...)) as JSON Lines, one row per file with
+  path, dir, ext, language, size, sha, lines and content. Only one file is held in
+  memory at a time.
+
+  destination is a path or a text file object. For paths, compression ("gzip",
+  "bz2" or "xz") is inferred from a .gz/.bz2/.xz suffix when not given
+
+  Returns:
+    int: Rows written
+  """
+  if not isinstance(destination, (str, os.PathLike)):
+    if compression:
+      raise ValueError("Compression needs a destination path, not a file object.")
+    return _write_jsonl(files, destination)
+
+  if compression is None:
+    compression = _SUFFIXES.get(os.path.splitext(os.fspath(destination))[1])
+  if compression is not None and compression not in COMPRESSIONS:
+    raise ValueError(f"Unknown compression '{compression}'. Available: {', '.join(sorted(COMPRESSIONS))}")
+  opener = COMPRESSIONS[compression] if compression else open
+  with opener(destination, "wt", encoding="utf-8") as output:
+    return _write_jsonl(files, output)
+
+def _write_jsonl(files, output) -> int:
+  rows = 0
+  for file in files:
+    output.write(json.dumps(file_row(file), ensure_ascii=False))
+    output.write("\n")
+    rows += 1
+  return rows
+
+# Write files into a Parquet file one row group at a time
+def export_parquet(files: Iterable[ScannedFile], destination, row_group_size: int = 1000,
+                   row_group_bytes: int = 64 * 1024 * 1024, compression: Optional[str] = "snappy") -> int:
+  """
+  Write files (e.g. Terence.iter_files(...)) to Parquet with the same columns as
+  export_jsonl. Rows are buffered until row_group_size files or row_group_bytes of
+  content have arrived and then written as one row group, so memory is bounded by
+  one row group. compression is any Parquet codec ("snappy", "gzip", "zstd", None).
+  Requires pyarrow (pip install terence[parquet])
+
+  Returns:
+    int: Rows written
+  """
+  try:
+    import pyarrow
+    import pyarrow.parquet
+  except ImportError:
+    raise ImportError("pyarrow is required for Parquet export. Install it with: pip install terence[parquet]") from None
+
+  schema = pyarrow.schema([
+    ('path', pyarrow.string()),
+    ('dir', pyarrow.string()),
+    ('ext', pyarrow.string()),
+    ('language', pyarrow.string()),
+    ('size', pyarrow.int64()),
+    ('sha', pyarrow.string()),
+    ('lines', pyarrow.int64()),
+    ('content', pyarrow.large_string()),
+  ])
+
+  rows, buffered, batch = 0, 0, {name: [] for name in schema.names}
+  with pyarrow.parquet.ParquetWriter(destination, schema, compression=compression or "none") as writer:
+    def flush():
+      writer.write_table(pyarrow.table(batch, schema=schema))
+      for column in batch.values():
+        column.clear()
+
+    for file in files:
+      for name, value in file_row(file).items():
+        batch[name].append(value)
+      rows += 1
+      buffered += file.size
+      if len(batch['path']) >= row_group_size or buffered >= row_group_bytes:
+        flush()
+        buffered = 0
+    if batch['path']:
+      flush()
+  return rows
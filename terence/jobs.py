@@ -0,0 +1,342 @@
+import os
+import json
+import time
+import uuid
+import socket
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from terence._sqlite import connect
+from terence.progress import CancelToken
+from terence.exceptions import RateLimitException, ScanCancelledException
+
+# One repository scan waiting in a JobQueue
+class Job(NamedTuple):
+  id: int
+  repo_url: str
+  ref: Optional[str]
+  extensions: Optional[List[str]]
+  include: Optional[List[str]]
+  attempts: int   # Claims so far, this one included
+
+# Common interface of the queues ScanWorker pulls jobs from
+class JobQueue:
+  """
+  Hands out scan jobs to workers under a lease: a claimed job belongs to its
+  worker until the lease runs out, after which any worker may claim it again.
+  Failed jobs are retried up to max_attempts times with exponential backoff.
+  A store shared between hosts (Redis and the like) only has to implement these
+  methods atomically to be used by ScanWorker in place of SQLiteJobQueue
+  """
+
+  max_attempts = 3
+  retry_delay = 30.0  # Seconds before the first retry, doubled for every later one
+
+  # Queue a scan and return its job id
+  def submit(self, repo_url: str, ref: Optional[str] = None, extensions: Optional[List[str]] = None,
+             include: Optional[List[str]] = None) -> int:
+    raise NotImplementedError
+
+  # Lease the oldest available job to worker for `lease` seconds, None if there is none
+  def claim(self, worker: str, lease: float) -> Optional[Job]:
+    raise NotImplementedError
+
+  # Push the lease of a claimed job `lease` seconds into the future, False if worker lost it
+  def extend(self, job_id: int, worker: str, lease: float) -> bool:
+    raise NotImplementedError
+
+  # Mark a claimed job done with its result, False if worker lost the lease
+  def complete(self, job_id: int, worker: str, result: Dict) -> bool:
+    raise NotImplementedError
+
+  # Give a claimed job back without counting the attempt, available again after delay seconds
+  def release(self, job_id: int, worker: str, delay: float = 0.0) -> bool:
+    raise NotImplementedError
+
+  # Give a claimed job back: queued again after a delay while attempts remain, failed otherwise
+  def fail(self, job_id: int, worker: str, error: str, retry: bool = True, delay: Optional[float] = None) -> bool:
+    raise NotImplementedError
+
+  # Everything known about one job as a dict (status, attempts, error, result, ...), None if unknown
+  def get(self, job_id: int) -> Optional[Dict]:
+    raise NotImplementedError
+
+  # Number of jobs by status: queued, leased, done, failed
+  def counts(self) -> Dict[str, int]:
+    raise NotImplementedError
+
+# Job queue in one SQLite file, shared by every process that can open it
+class SQLiteJobQueue(JobQueue):
+  """
+  Jobs in a SQLite database, so workers in any number of processes on one host
+  (or hosts sharing a file system with working locks) can pull from the same
+  queue. Claims run in an IMMEDIATE transaction, so a job is never handed to two
+  workers at once
+  """
+
+  def __init__(self, path: str, max_attempts: int = 3, retry_delay: float = 30.0):
+    self.path = os.path.expanduser(path)
+    self.max_attempts = max_attempts
+    self.retry_delay = retry_delay
+    directory = os.path.dirname(self.path)
+    if directory:
+      os.makedirs(directory, exist_ok=True)
+    with self._connect() as db:
+      # WAL lets workers read the queue while another one is claiming
+      db.execute("PRAGMA journal_mode=WAL")
+      db.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          repo_url TEXT NOT NULL,
+          ref TEXT,
+          extensions TEXT,
+          include TEXT,
+          status TEXT NOT NULL DEFAULT 'queued',
+          attempts INTEGER NOT NULL DEFAULT 0,
+          worker TEXT,
+          available_at REAL NOT NULL,
+          lease_until REAL,
+          error TEXT,
+          result TEXT,
+          created_at REAL NOT NULL,
+          updated_at REAL NOT NULL
+        )""")
+      db.execute("CREATE INDEX IF NOT EXISTS jobs_available ON jobs (status, available_at)")
+
+  def __repr__(self):
+    return f"SQLiteJobQueue({self.path!r}, {self.counts()})"
+
+  # One connection per call, so the queue can be used from any thread or process
+  def _connect(self):
+    return connect(self.path)
+
+  def submit(self, repo_url: str, ref: Optional[str] = None, extensions: Optional[List[str]] = None,
+             include: Optional[List[str]] = None) -> int:
+    now = time.time()
+    with self._connect() as db:
+      cursor = db.execute(
+        "INSERT INTO jobs (repo_url, ref, extensions, include, available_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (repo_url, ref, _dumps(extensions), _dumps(include), now, now, now))
+      return cursor.lastrowid
+
+  def claim(self, worker: str, lease: float) -> Optional[Job]:
+    now = time.time()
+    with self._connect() as db:
+      db.execute("BEGIN IMMEDIATE")
+      # Leases that ran out on their last attempt won't be retried
+      db.execute("UPDATE jobs SET status = 'failed', error = 'Lease expired', updated_at = ? "
+                 "WHERE status = 'leased' AND lease_until < ? AND attempts >= ?", (now, now, self.max_attempts))
+      row = db.execute(
+        "SELECT * FROM jobs WHERE (status = 'queued' AND available_at <= ?) OR (status = 'leased' AND lease_until < ?) "
+        "ORDER BY available_at, id LIMIT 1", (now, now)).fetchone()
+      if row is None:
+        return None
+      db.execute("UPDATE jobs SET status = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1, updated_at = ? "
+                 "WHERE id = ?", (worker, now + lease, now, row['id']))
+      return Job(row['id'], row['repo_url'], row['ref'], _loads(row['extensions']), _loads(row['include']),
+                 row['attempts'] + 1)
+
+  def extend(self, job_id: int, worker: str, lease: float) -> bool:
+    now = time.time()
+    with self._connect() as db:
+      cursor = db.execute("UPDATE jobs SET lease_until = ?, updated_at = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+                          (now + lease, now, job_id, worker))
+      return cursor.rowcount == 1
+
+  def complete(self, job_id: int, worker: str, result: Dict) -> bool:
+    now = time.time()
+    with self._connect() as db:
+      cursor = db.execute("UPDATE jobs SET status = 'done', result = ?, error = NULL, lease_until = NULL, updated_at = ? "
+                          "WHERE id = ? AND worker = ? AND status = 'leased'", (json.dumps(result), now, job_id, worker))
+      return cursor.rowcount == 1
+
+  def release(self, job_id: int, worker: str, delay: float = 0.0) -> bool:
+    now = time.time()
+    with self._connect() as db:
+      cursor = db.execute("UPDATE jobs SET status = 'queued', attempts = attempts - 1, available_at = ?, lease_until = NULL, "
+                          "updated_at = ? WHERE id = ? AND worker = ? AND status = 'leased'", (now + delay, now, job_id, worker))
+      return cursor.rowcount == 1
+
+  def fail(self, job_id: int, worker: str, error: str, retry: bool = True, delay: Optional[float] = None) -> bool:
+    now = time.time()
+    with self._connect() as db:
+      db.execute("BEGIN IMMEDIATE")
+      row = db.execute("SELECT attempts FROM jobs WHERE id = ? AND worker = ? AND status = 'leased'",
+                       (job_id, worker)).fetchone()
+      if row is None:
+        return False
+      if retry and row['attempts'] < self.max_attempts:
+        delay = delay if delay is not None else self.retry_delay * 2 ** (row['attempts'] - 1)
+        db.execute("UPDATE jobs SET status = 'queued', available_at = ?, lease_until = NULL, error = ?, updated_at = ? "
+                   "WHERE id = ?", (now + delay, error, now, job_id))
+      else:
+        db.execute("UPDATE jobs SET status = 'failed', lease_until = NULL, error = ?, updated_at = ? WHERE id = ?",
+                   (error, now, job_id))
+      return True
+
+  def get(self, job_id: int) -> Optional[Dict]:
+    with self._connect() as db:
+      row = db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    if row is None:
+      return None
+    job = dict(row)
+    for name in ("extensions", "include", "result"):
+      job[name] = _loads(job[name])
+    return job
+
+  def counts(self) -> Dict[str, int]:
+    counts = {'queued': 0, 'leased': 0, 'done': 0, 'failed': 0}
+    with self._connect() as db:
+      for row in db.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"):
+        counts[row['status']] = row['n']
+    return counts
+
+def _dumps(value):
+  return json.dumps(value) if value is not None else None
+
+def _loads(value):
+  return json.loads(value) if value is not None else None
+
+# Pulls scan jobs from a JobQueue and scans them into a shared scan cache
+class ScanWorker:
+  """
+  Runs queued scans with one Terence instance. Start as many workers as the
+  tokens allow, in as many processes or hosts as needed, all pointing at the same
+  queue and the same scan cache directory: each claimed job is scanned with
+  Terence.scan, which saves the files to the cache, and the job is completed with
+  a small summary. Anyone with the cache directory then loads the files with
+  Terence().cache(directory).load_cached(repo_url, ref, extensions, include),
+  with the job's filters, without any request.
+
+  The lease is renewed while the scan makes progress; a worker that loses its
+  lease (it stalled and another worker took the job over) cancels its scan.
+  Rate limit errors put the job back until the limit resets, other errors are
+  retried with backoff by the queue:
+
+    worker = ScanWorker(Terence().auth(token).cache("/shared/cache"), SQLiteJobQueue("/shared/jobs.db"))
+    worker.run()
+  """
+
+  def __init__(self, terence, queue: JobQueue, worker_id: Optional[str] = None, lease: float = 300.0,
+               poll_interval: float = 1.0, backend=None, on_job: Optional[Callable] = None):
+    if terence._cache is None:
+      raise Exception("No scan cache set. Call Terence.cache(directory) first.")
+    self.terence = terence
+    self.queue = queue
+    self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    self.lease = lease
+    self.poll_interval = poll_interval
+    self.backend = backend
+    self.on_job = on_job
+    self._stop = threading.Event()
+    self._thread = None
+    self._cancel = None
+
+  def __repr__(self):
+    return f"ScanWorker({self.worker_id!r})"
+
+  def __enter__(self):
+    return self.start()
+
+  def __exit__(self, *exc):
+    self.stop()
+
+  # Run in a background thread
+  def start(self):
+    self._stop.clear()
+    self._thread = threading.Thread(target=self.run, daemon=True)
+    self._thread.start()
+    return self
+
+  # Stop after the job in flight, which is given back to the queue
+  def stop(self):
+    self._stop.set()
+    if self._cancel is not None:
+      self._cancel.cancel()
+    if self._thread is not None:
+      self._thread.join()
+      self._thread = None
+
+  # Process jobs until stopped, or until the queue has nothing available with idle_exit=True
+  def run(self, idle_exit: bool = False) -> int:
+    """
+    Returns:
+      int: Jobs processed
+    """
+    processed = 0
+    while not self._stop.is_set():
+      outcome = self.run_once()
+      if outcome is None:
+        if idle_exit:
+          break
+        self._stop.wait(self.poll_interval)
+      else:
+        processed += 1
+    return processed
+
+  # Claim and scan one job
+  def run_once(self) -> Optional[Dict]:
+    """
+    Returns:
+      dict: { 'job': int, 'repo_url': str, 'ref': str, 'status': str, ... }, None when no job was available.
+      status is done (with commit, files, requests, wall_time and worker), retry or failed
+      (with error), released (stopped, or rate limited until the reset) or lost (the lease
+      went to another worker)
+    """
+    job = self.queue.claim(self.worker_id, self.lease)
+    if job is None:
+      return None
+
+    self._cancel = CancelToken()
+    renew_at = time.time() + self.lease / 2
+    def on_progress(progress):
+      nonlocal renew_at
+      if time.time() >= renew_at:
+        renew_at = time.time() + self.lease / 2
+        if not self.queue.extend(job.id, self.worker_id, self.lease):
+          self._cancel.cancel()
+
+    outcome = {'job': job.id, 'repo_url': job.repo_url, 'ref': job.ref}
+    try:
+      # Results go to the shared cache, so the worker doesn't keep every file it has seen in memory
+      result = self.terence.scan(job.repo_url, job.ref, job.extensions, job.include, self.backend,
+                                 on_progress=on_progress, cancel=self._cancel, intern=False)
+      summary = {
+        'commit': result.commit,
+        'files': len(result.files),
+        'requests': result.stats.total_requests,
+        'wall_time': result.stats.wall_time,
+        'worker': self.worker_id,
+      }
+      outcome.update(summary, status="done" if self.queue.complete(job.id, self.worker_id, summary) else "lost")
+    except ScanCancelledException as e:
+      # Stopped by stop() or by losing the lease, in which case releasing does nothing
+      released = self.queue.release(job.id, self.worker_id)
+      outcome.update(status="released" if released else "lost", error=str(e))
+    except RateLimitException as e:
+      # Not the job's fault, so it doesn't cost an attempt: try again once the limit has reset
+      self.queue.release(job.id, self.worker_id, self._until_reset())
+      outcome.update(status="released", error=str(e))
+    except Exception as e:
+      self.queue.fail(job.id, self.worker_id, str(e))
+      record = self.queue.get(job.id) or {}
+      outcome.update(status="retry" if record.get('status') == "queued" else "failed", error=str(e))
+    finally:
+      self._cancel = None
+
+    if self.on_job:
+      self.on_job(outcome)
+    return outcome
+
+  # Seconds until the rate limit resets, read from the shared ledger without a request when there is one,
+  # the queue's retry delay when it can't be read
+  def _until_reset(self):
+    ledger = self.terence._ledger
+    status = ledger.status(self.terence._budget_key) if ledger is not None else None
+    if status is not None:
+      return max(0.0, status['reset'].timestamp() - time.time())
+    try:
+      reset = self.terence.get_rate_limit()['reset']
+      return max(0.0, reset.timestamp() - time.time())
+    except Exception:
+      return self.queue.retry_delay
@@ -0,0 +1,115 @@
+import re
+import posixpath
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from terence.utils import match_glob
+
+POINTER_PREFIX = b"version https://git-lfs.github.com/spec/v1"
+MAX_POINTER_SIZE = 1024  # Git LFS never writes larger pointer files
+BATCH_SIZE = 100         # Objects per batch request, GitHub's limit
+
+_POINTER = re.compile(rb"^oid sha256:([0-9a-f]{64})$.*?^size (\d+)$", re.M | re.S)
+
+# Patterns with filter=lfs in one .gitattributes file
+def lfs_patterns(text: str) -> List[str]:
+  patterns = []
+  for line in text.splitlines():
+    parts = line.split()
+    if len(parts) >= 2 and not parts[0].startswith("#") and "filter=lfs" in parts[1:]:
+      patterns.append(parts[0])
+  return patterns
+
+# Whether path is tracked by LFS under { directory of a .gitattributes: [patterns] }
+def is_lfs_path(path: str, attributes: Dict[str, List[str]]) -> bool:
+  for directory, patterns in attributes.items():
+    if directory and not path.startswith(directory + "/"):
+      continue
+    relative = path[len(directory) + 1:] if directory else path
+    for pattern in patterns:
+      # Like .gitignore, a pattern without a slash matches the name at any depth
+      if "/" not in pattern.rstrip("/"):
+        if match_glob(posixpath.basename(relative), pattern):
+          return True
+      elif match_glob(relative, pattern.lstrip("/")):
+        return True
+  return False
+
+def is_pointer(data: bytes) -> bool:
+  return len(data) <= MAX_POINTER_SIZE and data.startswith(POINTER_PREFIX)
+
+# (oid, size) of an LFS pointer file, None if data isn't one
+def parse_pointer(data: bytes) -> Optional[Tuple[str, int]]:
+  if not is_pointer(data):
+    return None
+  match = _POINTER.search(data)
+  return (match.group(1).decode(), int(match.group(2))) if match else None
+
+# LFS server of a repository: github.com/<owner>/<repo>.git/info/lfs for api.github.com,
+# the same path on the host for GitHub Enterprise (<host>/api/v3) and under base_url otherwise
+def lfs_endpoint(base_url: str, owner: str, repo_name: str) -> str:
+  parts = urlsplit(base_url)
+  if parts.hostname == "api.github.com":
+    root = "https://github.com"
+  elif parts.path.rstrip("/").endswith("/api/v3"):
+    root = f"{parts.scheme}://{parts.netloc}"
+  else:
+    root = base_url.rstrip("/")
+  return f"{root}/{owner}/{repo_name}.git/info/lfs"
+
+# Downloads LFS objects through the batch API: one request per BATCH_SIZE objects, then one per object
+class LFSClient:
+  def __init__(self, endpoint: str, token: Optional[str] = None, timeout: float = 60):
+    import requests  # Installed with PyGithub, only needed once LFS objects are fetched
+    self.endpoint = endpoint
+    self.session = requests.Session()
+    # Only the batch request is authenticated, downloads carry their own headers (and go to storage hosts)
+    self.auth = ("x-access-token", token) if token else None
+    self.timeout = timeout
+
+  def close(self):
+    self.session.close()
+
+  # { oid: (href, headers) } to download each object from, or the error GitHub gave for it
+  def batch(self, objects: List[Tuple[str, int]]) -> Dict[str, object]:
+    response = self.session.post(
+      f"{self.endpoint}/objects/batch", auth=self.auth, timeout=self.timeout,
+      headers={'Accept': "application/vnd.git-lfs+json", 'Content-Type': "application/vnd.git-lfs+json"},
+      json={'operation': "download", 'transfers': ["basic"], 'objects': [{'oid': oid, 'size': size} for oid, size in objects]})
+    if response.status_code != 200:
+      raise Exception(f"LFS batch request failed with status {response.status_code}.")
+    actions = {}
+    for item in response.json().get('objects', []):
+      download = (item.get('actions') or {}).get('download')
+      if download:
+        actions[item['oid']] = (download['href'], download.get('header') or {})
+      else:
+        actions[item['oid']] = Exception((item.get('error') or {}).get('message', "LFS object not available"))
+    return actions
+
+  def download(self, href: str, headers: Dict[str, str]) -> bytes:
+    response = self.session.get(href, headers=headers, timeout=self.timeout)
+    if response.status_code != 200:
+      raise Exception(f"LFS download failed with status {response.status_code}.")
+    return response.content
+
+  # Yields (key, bytes) for each (key, oid, size), or (key, exception) for objects that couldn't be downloaded
+  def fetch(self, objects: List[Tuple[object, str, int]], stats) -> Iterator[Tuple[object, object]]:
+    for start in range(0, len(objects), BATCH_SIZE):
+      chunk = objects[start:start + BATCH_SIZE]
+      try:
+        with stats.request("lfs", "listing"):
+          actions = self.batch([(oid, size) for _, oid, size in chunk])
+      except Exception as e:
+        for key, _, _ in chunk:
+          yield key, e
+        continue
+      for key, oid, _ in chunk:
+        action = actions.get(oid, Exception("LFS object not available"))
+        if not isinstance(action, Exception):
+          try:
+            with stats.request("lfs", "download"):
+              action = self.download(*action)
+          except Exception as e:
+            action = e
+        yield key, action
@@ -0,0 +1,193 @@
+import os
+import base64
+import shutil
+import hashlib
+import threading
+import subprocess
+from typing import Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from terence.utils import parse_github_url
+
+GITHUB_HOST = "github.com"
+
+# True for file:// URLs and explicit paths to repositories on this machine
+# Only absolute paths, ~, ./ and ../ paths and paths ending in .git count, so owner/repo is
+# always a GitHub repository even when a directory of that name exists here
+def is_local_repository(repo_url: str) -> bool:
+  if repo_url.startswith("file://"):
+    return True
+  explicit = (os.path.isabs(repo_url) or repo_url in (".", "..")
+              or repo_url.startswith(("~", "./", "../", "." + os.sep, ".." + os.sep))
+              or repo_url.rstrip("/" + os.sep).endswith(".git"))
+  return explicit and "://" not in repo_url and os.path.isdir(os.path.expanduser(repo_url))
+
+# Absolute path of a local repository given as a path or a file:// URL
+def local_path(repo_url: str) -> str:
+  local = repo_url[len("file://"):] if repo_url.startswith("file://") else repo_url
+  return os.path.abspath(os.path.expanduser(local))
+
+# (scheme, host, repository path) of a remote URL, owner/repo without a scheme is on github.com
+def remote_location(source: str) -> Tuple[str, str, str]:
+  if "://" not in source:
+    owner, repo_name = parse_github_url(source)
+    return "https", GITHUB_HOST, f"{owner}/{repo_name}"
+
+  url = urlsplit(source)
+  host = url.netloc.rsplit("@", 1)[-1].lower()  # Credentials in the URL aren't part of the location
+  parts = [part for part in url.path.split("/") if part]
+  if host == GITHUB_HOST:
+    parts = parts[:2]
+  else:
+    # Other hosts can nest groups (GitLab), so the path runs up to the tree and blob views
+    # ("/tree/<ref>" on GitHub Enterprise, "/-/tree/<ref>" on GitLab)
+    for i in range(2, len(parts)):
+      if parts[i] in ("-", "tree", "blob"):
+        parts = parts[:i]
+        break
+  if len(parts) < 2:
+    raise ValueError(f"Invalid repository URL: {source}")
+  if parts[-1].endswith(".git"):
+    parts[-1] = parts[-1][:-4]
+  return url.scheme, host, "/".join(parts)
+
+# Bare mirror of one repository on local disk, read through the git CLI
+class GitMirror:
+  """
+  Keeps `git clone --mirror` of a repository under cache_dir and reads trees and
+  blobs straight from its object store, so scans make no GitHub API calls
+
+  source can be a GitHub URL, owner/repo, a file:// URL or a local path, or the
+  URL of a repository on another git host. token is only sent to github.com and
+  token_host (the host of Terence.base_url, for GitHub Enterprise)
+  """
+
+  def __init__(self, cache_dir: str, source: str, token: Optional[str] = None, token_host: Optional[str] = None):
+    if shutil.which("git") is None:
+      raise Exception("git executable not found. Install git to use mirror scans.")
+    self.cache_dir = os.path.abspath(os.path.expanduser(cache_dir))
+    self.token = None
+
+    if is_local_repository(source):
+      local = local_path(source)
+      self.remote = local
+      digest = hashlib.sha1(local.encode('utf-8')).hexdigest()[:12]
+      self.path = os.path.join(self.cache_dir, "local", f"{os.path.basename(local.rstrip(os.sep))}-{digest}.git")
+    else:
+      scheme, host, repo_path = remote_location(source)
+      self.remote = f"{scheme}://{host}/{repo_path}.git"
+      self.path = os.path.join(self.cache_dir, host, *repo_path.split("/")[:-1], f"{repo_path.rsplit('/', 1)[-1]}.git")
+      # Never hand a GitHub token to a host it wasn't issued for
+      if host == GITHUB_HOST or (token_host and host == token_host.lower()):
+        self.token = token
+
+  def __repr__(self):
+    return f"GitMirror({self.remote!r} -> {self.path!r})"
+
+  @property
+  def exists(self) -> bool:
+    return os.path.isfile(os.path.join(self.path, "HEAD"))
+
+  # Clone the mirror if it doesn't exist yet, otherwise fetch new objects and refs
+  def sync(self):
+    if self.exists:
+      self._git("fetch", "--prune", "--tags", "origin", network=True)
+    else:
+      os.makedirs(os.path.dirname(self.path), exist_ok=True)
+      self._run(["git", "clone", "--mirror", "--quiet", self.remote, self.path], network=True)
+    return self
+
+  # Whether `ref` already resolves locally, so a fetch can be skipped for pinned commits
+  def has_commit(self, ref: str) -> bool:
+    if not self.exists:
+      return False
+    try:
+      self.resolve(ref)
+      return True
+    except Exception:
+      return False
+
+  # Commit SHA for a branch, tag or commit (HEAD when ref is None)
+  def resolve(self, ref: Optional[str] = None) -> str:
+    try:
+      return self._git("rev-parse", "--verify", "--quiet", f"{ref or 'HEAD'}^{{commit}}").decode().strip()
+    except Exception:
+      raise Exception(f"Git error: ref '{ref or 'HEAD'}' not found in {self.remote}")
+
+  # Branch HEAD points to in the mirror, None if HEAD is detached
+  def default_branch(self) -> Optional[str]:
+    try:
+      return self._git("symbolic-ref", "--short", "HEAD").decode().strip() or None
+    except Exception:
+      return None
+
+  # Every blob in the commit's tree (or under path) as (path, blob sha, size), submodules excluded
+  def list_files(self, commit: str, path: str = "") -> List[Tuple[str, str, int]]:
+    return [(path, sha, size) for kind, path, sha, size in self.list_entries(commit, path) if kind == "blob"]
+
+  # Blobs and submodules (kind "commit", sha the pinned commit, size -1) as (kind, path, sha, size)
+  def list_entries(self, commit: str, path: str = "") -> List[Tuple[str, str, str, int]]:
+    path = path.strip("/")
+    output = self._git("ls-tree", "-r", "-l", "-z", "--full-tree", commit, *(["--", path] if path else []))
+    entries = []
+    for record in output.split(b"\0"):
+      if not record:
+        continue
+      meta, path = record.split(b"\t", 1)
+      mode, kind, sha, size = meta.split()
+      if kind in (b"blob", b"commit"):
+        entries.append((kind.decode(), path.decode('utf-8', 'surrogateescape'), sha.decode(),
+                        int(size) if kind == b"blob" else -1))
+    return entries
+
+  # Stream blob contents for the given SHAs through one `git cat-file --batch` process
+  def read_blobs(self, shas: List[str]) -> Iterator[Tuple[str, bytes]]:
+    process = subprocess.Popen(["git", "cat-file", "--batch"], cwd=self.path,
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+    # Feed requests from a thread so a large batch can't deadlock against the output pipe
+    def feed():
+      try:
+        for sha in shas:
+          process.stdin.write(f"{sha}\n".encode())
+        process.stdin.close()
+      except (BrokenPipeError, ValueError):
+        pass
+
+    writer = threading.Thread(target=feed, daemon=True)
+    writer.start()
+    try:
+      for _ in shas:
+        header = process.stdout.readline().split()
+        if len(header) < 3:
+          # "<sha> missing"
+          yield header[0].decode() if header else "", None
+          continue
+        size = int(header[2])
+        data = process.stdout.read(size)
+        process.stdout.read(1)  # Trailing newline after each object
+        yield header[0].decode(), data
+    finally:
+      process.stdout.close()
+      process.kill()
+      process.wait()
+      writer.join()
+
+  def _git(self, *args, network=False) -> bytes:
+    return self._run(["git", "--git-dir", self.path, *args], network=network)
+
+  def _run(self, command, network=False) -> bytes:
+    env = dict(os.environ, GIT_TERMINAL_PROMPT="0")
+    if network and self.token:
+      # Pass the token through the environment so it is never written to the mirror's config
+      credentials = base64.b64encode(f"x-access-token:{self.token}".encode()).decode()
+      env.update({
+        'GIT_CONFIG_COUNT': "1",
+        'GIT_CONFIG_KEY_0': "http.extraHeader",
+        'GIT_CONFIG_VALUE_0': f"Authorization: Basic {credentials}",
+      })
+    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env)
+    if result.returncode != 0:
+      message = result.stderr.decode('utf-8', 'replace').strip() or f"exit status {result.returncode}"
+      raise Exception(f"Git error: {message}")
+    return result.stdout
@@ -0,0 +1,113 @@
+import time
+import threading
+from typing import Callable, Optional
+
+from terence.stats import ScanStats
+from terence.exceptions import ScanCancelledException
+
+# Snapshot of how far a scan has got, passed to on_progress callbacks
+class ScanProgress:
+  """
+  Progress of a running scan
+
+  files_total counts the files discovered so far that will be fetched, so it
+  grows while directories are still being listed and the ETA firms up with it
+  """
+
+  def __init__(self):
+    self.directories_listed = 0
+    self.files_total = 0     # Files discovered that pass the filters
+    self.files_done = 0      # Files fetched, skipped as binary or failed
+    self.files_fetched = 0
+    self.bytes_fetched = 0
+    self.started_at = time.time()
+
+  def __repr__(self):
+    return (f"ScanProgress(dirs={self.directories_listed}, files={self.files_done}/{self.files_total}, "
+            f"bytes={self.bytes_fetched})")
+
+  @property
+  def elapsed(self) -> float:
+    return time.time() - self.started_at
+
+  # Estimated seconds remaining from the average time per file so far, None until a file is done
+  @property
+  def eta(self) -> Optional[float]:
+    if self.files_done == 0:
+      return None
+    remaining = max(self.files_total - self.files_done, 0)
+    return self.elapsed / self.files_done * remaining
+
+# Cooperative cancellation shared between a scan and whoever wants to stop it
+class CancelToken:
+  """
+  Cancels a scan from another thread, or automatically after `timeout` seconds
+
+  Scans check the token before every request, so they stop within one request
+  """
+
+  def __init__(self, timeout: Optional[float] = None):
+    self._event = threading.Event()
+    self.deadline = time.time() + timeout if timeout is not None else None
+
+  def __repr__(self):
+    return f"CancelToken(cancelled={self.cancelled})"
+
+  def cancel(self):
+    self._event.set()
+
+  @property
+  def cancelled(self) -> bool:
+    if self.deadline is not None and time.time() >= self.deadline:
+      self._event.set()
+    return self._event.is_set()
+
+  @property
+  def reason(self) -> str:
+    if self.deadline is not None and time.time() >= self.deadline:
+      return "Scan timed out"
+    return "Scan cancelled"
+
+# Telemetry, progress and cancellation of one running scan
+class ScanContext:
+  """
+  State of one scan while it runs, handed to its backend as backend.context.
+  Every scan gets its own, so scans running at the same time on one Terence
+  instance never share counters, progress or cancellation
+  """
+
+  def __init__(self, stats: Optional[ScanStats] = None, on_progress: Optional[Callable] = None,
+               cancel: Optional[CancelToken] = None, timeout: Optional[float] = None):
+    self.stats = stats if stats is not None else ScanStats()
+    self.progress = ScanProgress()
+    self.on_progress = on_progress
+    self.cancel = cancel
+    # Kept here rather than on the token, which the caller may reuse for other scans
+    self.deadline = time.time() + timeout if timeout is not None else None
+    self.shas = {}     # { path: blob SHA } of the text files fetched so far
+    self.entries = {}  # { path: TreeEntry } of every file picked for fetching, binary ones included
+    self.intern = True # Whether fetched contents are kept in the instance's ContentStore, see Terence.scan()
+    self.read_cached = True  # Whether files already in the disk cache are read into the results, see CacheWarmer
+
+  def __repr__(self):
+    return f"ScanContext({self.progress!r})"
+
+  # Stop before the next request if the scan has been cancelled or timed out
+  def check_cancelled(self, results):
+    if self.cancel is not None and self.cancel.cancelled:
+      reason = self.cancel.reason
+    elif self.deadline is not None and time.time() >= self.deadline:
+      reason = "Scan timed out"
+    else:
+      return
+    raise ScanCancelledException(reason, results() if callable(results) else dict(results))
+
+  def report_progress(self, directories=0, total=0, fetched=0, size=0, done=0):
+    progress = self.progress
+    progress.directories_listed += directories
+    progress.files_total += total
+    progress.files_fetched += fetched
+    progress.files_done += fetched + done
+    progress.bytes_fetched += size
+    if self.on_progress:
+      self.on_progress(progress)
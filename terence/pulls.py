@@ -0,0 +1,28 @@
+from typing import Dict, List, NamedTuple, Optional
+
+# One file in a pull request's files listing
+class ChangedFile(NamedTuple):
+  path: str
+  status: str                           # added, modified, removed, renamed, copied, changed or unchanged
+  sha: Optional[str]                    # Git blob SHA at the head commit
+  previous_path: Optional[str] = None   # Path at the base commit for renamed files
+
+  # Whether the file has a version at the base commit
+  @property
+  def in_base(self) -> bool:
+    return self.status not in ("added", "copied")
+
+  # Whether the file still exists at the head commit
+  @property
+  def in_head(self) -> bool:
+    return self.status != "removed"
+
+# What Terence.scan_pull_request returns
+class PullRequestScan(NamedTuple):
+  number: int
+  head_sha: str
+  base_sha: str
+  files: List[ChangedFile]    # Every file in the pull request, filtered or not
+  head: Dict[str, str]        # { path: content } at the head commit for added and modified files
+  base: Dict[str, str]        # { path: content } at the base commit, keyed by the path at head (empty unless requested)
+  removed: List[str]          # Paths removed by the pull request
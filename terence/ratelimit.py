@@ -0,0 +1,105 @@
+import os
+import time
+import hashlib
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from terence.exceptions import RateLimitException
+from terence._sqlite import connect
+
+# Key a token's budget without storing the token
+def budget_key(token: str, base_url: str = "https://api.github.com") -> str:
+  return hashlib.sha256(f"{base_url}\n{token}".encode('utf-8')).hexdigest()[:24]
+
+# Rate limit budgets shared by every Terence instance on a host, see Terence.share_rate_limit
+class RateLimitLedger:
+  """
+  Remaining requests per token in one SQLite file. Every request reserves its
+  budget first in an IMMEDIATE transaction, so processes sharing a token can't
+  spend the same request twice, and each response's X-RateLimit-* headers are
+  synced back in. Within a window the ledger only ever goes down: a header may
+  not count requests other processes have reserved but not sent yet, so the
+  lower of the two is kept. Once the reset time passes the budget refills to
+  the limit until the next response says otherwise.
+
+  Reservations leave `floor` requests unspent and raise RateLimitException
+  rather than letting the request through to a 403
+  """
+
+  def __init__(self, path: str, floor: int = 10):
+    self.path = os.path.expanduser(path)
+    self.floor = floor
+    directory = os.path.dirname(self.path)
+    if directory:
+      os.makedirs(directory, exist_ok=True)
+    with self._connect() as db:
+      db.execute("PRAGMA journal_mode=WAL")
+      db.execute("""
+        CREATE TABLE IF NOT EXISTS budgets (
+          key TEXT PRIMARY KEY,
+          remaining INTEGER NOT NULL,
+          rate_limit INTEGER NOT NULL,
+          reset REAL NOT NULL,
+          updated_at REAL NOT NULL
+        )""")
+
+  def __repr__(self):
+    return f"RateLimitLedger({self.path!r}, floor={self.floor})"
+
+  # One connection per call, so the ledger can be used from any thread or process
+  def _connect(self):
+    return connect(self.path)
+
+  # Whether the budget of key is known for the current window, so no rate_limit request is needed
+  def current(self, key: str) -> bool:
+    with self._connect() as db:
+      row = db.execute("SELECT reset FROM budgets WHERE key = ?", (key,)).fetchone()
+    return row is not None and row['reset'] > time.time()
+
+  # Take count requests from the budget of key, raising RateLimitException when that would go below the floor
+  def reserve(self, key: str, count: int = 1) -> Optional[int]:
+    """
+    Returns:
+      int: requests left after the reservation, None while the budget is unknown
+    """
+    now = time.time()
+    with self._connect() as db:
+      db.execute("BEGIN IMMEDIATE")
+      row = db.execute("SELECT * FROM budgets WHERE key = ?", (key,)).fetchone()
+      if row is None:
+        return None  # Nothing to go by until the first response is synced
+      remaining = row['remaining'] if row['reset'] > now else row['rate_limit']
+      if remaining - count < self.floor:
+        reset_time = datetime.fromtimestamp(row['reset'], timezone.utc)
+        raise RateLimitException(f"Shared rate limit budget exhausted: {remaining} requests remaining. Resets at {reset_time.strftime('%Y-%m-%d %H:%M:%S UTC')}")
+      db.execute("UPDATE budgets SET remaining = ?, updated_at = ? WHERE key = ?", (remaining - count, now, key))
+      return remaining - count
+
+  # Bring the budget of key in line with the X-RateLimit-* values of a response
+  def sync(self, key: str, remaining: int, limit: int, reset: float):
+    if limit < 0 or not reset:
+      return  # No response with rate limit headers yet
+    now = time.time()
+    with self._connect() as db:
+      db.execute("BEGIN IMMEDIATE")
+      row = db.execute("SELECT * FROM budgets WHERE key = ?", (key,)).fetchone()
+      if row is None or row['reset'] <= now:
+        # First response of a new window, the header is the best there is
+        db.execute("INSERT OR REPLACE INTO budgets (key, remaining, rate_limit, reset, updated_at) VALUES (?, ?, ?, ?, ?)",
+                   (key, remaining, limit, reset, now))
+      else:
+        db.execute("UPDATE budgets SET remaining = MIN(remaining, ?), rate_limit = ?, updated_at = ? WHERE key = ?",
+                   (remaining, limit, now, key))
+
+  # The budget of key as get_rate_limit returns it, None if nothing was synced yet
+  def status(self, key: str) -> Optional[Dict]:
+    with self._connect() as db:
+      row = db.execute("SELECT * FROM budgets WHERE key = ?", (key,)).fetchone()
+    if row is None:
+      return None
+    fresh = row['reset'] > time.time()
+    return {
+      'remaining': row['remaining'] if fresh else row['rate_limit'],
+      'limit': row['rate_limit'],
+      'reset': datetime.fromtimestamp(row['reset'], timezone.utc)
+    }
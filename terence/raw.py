@@ -0,0 +1,81 @@
+from typing import Dict, Optional
+
+from terence.exceptions import RateLimitException
+
+RAW = "application/vnd.github.raw"
+CHUNK_SIZE = 1 << 16  # Bytes read from the socket at a time
+
+# Streams file bodies from the REST API in their raw form, without the JSON and base64 layers
+class RawClient:
+  """
+  GitHub answers the blobs and contents endpoints with the file itself when
+  asked for the raw media type, so the body can be streamed straight into one
+  buffer, sized from the tree entry, and decoded once. A JSON response holds the
+  body, the parsed base64 string and the decoded bytes at the same time, each
+  at least as large as the file. Shared by every scan of a Terence instance,
+  like its PyGithub clients, and keeps the rate limit state of its own responses
+  under the same attribute names PyGithub uses
+  """
+
+  def __init__(self, base_url: str, token: Optional[str] = None, timeout: float = 15, chunk_size: int = CHUNK_SIZE):
+    import requests  # Installed with PyGithub, only needed once files are streamed
+    self.base_url = base_url.rstrip("/")
+    self.session = requests.Session()
+    self.session.headers['User-Agent'] = "terence"
+    if token:
+      self.session.headers['Authorization'] = f"token {token}"
+    self.timeout = timeout
+    self.chunk_size = chunk_size
+    self.rate_limiting = (-1, -1)  # (remaining, limit) as of the last response
+    self.rate_limiting_resettime = 0
+
+  def close(self):
+    self.session.close()
+
+  # Raw bytes of the resource at path (e.g. /repos/<owner>/<repo>/git/blobs/<sha>)
+  def download(self, path: str, size: int = -1, limit: Optional[int] = None) -> bytes:
+    """
+    size is the expected length, used to allocate the buffer up front when the
+    response doesn't say. The download stops as soon as the body is known to be
+    longer than limit
+
+    Returns:
+      bytes: the body, a bytearray when it was streamed in chunks
+    """
+    with self.session.get(self.base_url + path, headers={'Accept': RAW}, stream=True, timeout=self.timeout) as response:
+      self._record_rate_limit(response.headers)
+      if response.status_code != 200:
+        self._raise_for_status(response)
+      length = int(response.headers.get('Content-Length') or -1)
+      expected = length if length >= 0 and 'Content-Encoding' not in response.headers else size
+      if limit is not None and expected > limit:
+        raise Exception(f"File is larger than the {limit} byte limit.")
+
+      # Chunks are written into place, so the body is held once
+      buffer, filled = bytearray(max(expected, 0)), 0
+      for chunk in response.iter_content(self.chunk_size):
+        end = filled + len(chunk)
+        if limit is not None and end > limit:
+          raise Exception(f"File is larger than the {limit} byte limit.")
+        buffer[filled:end] = chunk
+        filled = end
+      if filled < len(buffer):
+        del buffer[filled:]
+      return buffer
+
+  def _record_rate_limit(self, headers: Dict[str, str]):
+    if 'X-RateLimit-Remaining' in headers:
+      self.rate_limiting = (int(headers['X-RateLimit-Remaining']), int(headers.get('X-RateLimit-Limit', -1)))
+    if 'X-RateLimit-Reset' in headers:
+      self.rate_limiting_resettime = int(headers['X-RateLimit-Reset'])
+
+  def _raise_for_status(self, response):
+    try:
+      message = response.json().get('message', "")
+    except ValueError:
+      message = ""
+    if response.status_code in (403, 429) and self.rate_limiting[0] == 0:
+      raise RateLimitException(f"Rate limit reached during scan: {message or 'API rate limit exceeded'}")
+    if response.status_code == 404:
+      raise Exception("Not Found")
+    raise Exception(f"GitHub API error: {message or response.status_code}")
@@ -0,0 +1,33 @@
+from typing import Dict, Iterator, NamedTuple, Optional
+
+from terence.stats import ScanStats
+from terence.content import ScannedFile
+from terence.views import PathIndex, ResultView
+
+# What Terence.scan returns, independent of every other scan of the instance
+class ScanResult(NamedTuple):
+  repo_url: str
+  ref: Optional[str]          # Branch, tag or commit asked for, None for the default branch
+  commit: Optional[str]       # Commit SHA scanned, when it was resolved (always with a scan cache set)
+  files: Dict[str, str]       # { path: content } of every text file
+  shas: Dict[str, str]        # { path: blob SHA } for files
+  entries: Dict[str, object]  # { path: TreeEntry } of every file fetched, binary ones included
+  stats: ScanStats
+
+  def __repr__(self):
+    return f"ScanResult(repo_url={self.repo_url!r}, ref={self.ref!r}, files={len(self.files)})"
+
+  # The files as ScannedFile objects, the same shape Terence.iter_files streams
+  def scanned_files(self) -> Iterator[ScannedFile]:
+    return scanned_files(self.files, self.shas, self.entries)
+
+  # Lazy filtered view of the files, see Terence.view(); the index is built on each call, so keep the view
+  def view(self) -> ResultView:
+    return ResultView(PathIndex(self.files, self.shas, self.entries))
+
+# ScannedFile objects for { path: content } results and their shas and entries
+def scanned_files(files: Dict[str, str], shas: Dict[str, str], entries: Dict[str, object]) -> Iterator[ScannedFile]:
+  for path, text in files.items():
+    entry = entries.get(path)
+    size = entry.size if entry is not None and entry.size >= 0 else len(text.encode('utf-8'))
+    yield ScannedFile(path, shas.get(path, ""), size, text)
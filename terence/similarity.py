@@ -0,0 +1,255 @@
+import re
+import zlib
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+from terence.content import ScannedFile
+
+_EMPTY = (1 << 32) - 1  # Signature value of files without a single token
+_TOKEN = re.compile(r"\w+")
+_CHUNK = 1 << 14        # Shingles hashed at once, bounds the (num_perm, chunk) work array to 16 MB at 128 permutations
+
+# NumPy is an optional dependency, only needed once signatures are computed
+def _numpy():
+  try:
+    import numpy
+  except ImportError:
+    raise ImportError("NumPy is required for near-duplicate detection. Install it with: pip install terence[similarity]") from None
+  return numpy
+
+# Two files, in the same or different repositories, with most of their shingles in common
+class NearDuplicate(NamedTuple):
+  similarity: float   # Estimated Jaccard similarity of the shingle sets, 1.0 for identical contents
+  repo_a: str
+  path_a: str
+  repo_b: str
+  path_b: str
+
+# (a, b) of each multiply-shift hash standing in for a permutation, the same for every process using the same seed
+def _permutations(num_perm: int, seed: int):
+  np = _numpy()
+  rng = np.random.RandomState(seed)
+  a = rng.randint(0, 1 << 63, size=num_perm, dtype=np.int64).astype(np.uint64) << np.uint64(1) | np.uint64(1)
+  b = rng.randint(0, 1 << 63, size=num_perm, dtype=np.int64).astype(np.uint64)
+  return a, b
+
+# 64-bit hash of every `shingle` consecutive tokens of text
+def _shingle_hashes(np, text: str, shingle: int, codes: Dict[str, int]):
+  tokens = _TOKEN.findall(text)
+  if not tokens:
+    return np.zeros(0, dtype=np.uint64)
+  # crc32 is stable across processes, unlike hash(); each distinct token is hashed once per batch
+  ids = np.fromiter((codes[token] if token in codes else codes.setdefault(token, zlib.crc32(token.encode('utf-8')))
+                     for token in tokens), dtype=np.uint64, count=len(tokens))
+  width = min(shingle, len(ids))
+  hashes = np.zeros(len(ids) - width + 1, dtype=np.uint64)
+  # Polynomial hash of each window, wrapping around at 2**64
+  for offset in range(width):
+    hashes = hashes * np.uint64(1000003) + ids[offset:offset + len(hashes)]
+  return hashes
+
+# MinHash signatures of texts, one uint32 row of num_perm values per text
+def minhash_signatures(texts: Iterable[str], num_perm: int = 128, shingle: int = 5, seed: int = 1):
+  """
+  Shingles are `shingle` consecutive word tokens, so changes in whitespace and
+  punctuation don't count. The shingles of all texts are hashed through every
+  permutation in one vectorized pass and reduced to per-text minimums, so the
+  Python work per text is only tokenizing it. Each permutation is a
+  multiply-shift hash, the top 32 bits of (a * x + b) mod 2**64, which needs no
+  division. Texts without tokens get a row of 2**32 - 1
+
+  Returns:
+    numpy.ndarray: shape (len(texts), num_perm), dtype uint32
+  """
+  np = _numpy()
+  a, b = _permutations(num_perm, seed)
+  codes = {}
+  hashes = [_shingle_hashes(np, text, shingle, codes) for text in texts]
+  signatures = np.full((num_perm, len(hashes)), _EMPTY, dtype=np.uint64)
+  if not hashes:
+    return signatures.T.astype(np.uint32)
+
+  # Shingles of every text back to back, owner[i] is the text shingle i belongs to
+  lengths = np.fromiter((len(h) for h in hashes), dtype=np.int64, count=len(hashes))
+  shingles = np.concatenate(hashes)
+  owner = np.repeat(np.arange(len(hashes)), lengths)
+  for start in range(0, len(shingles), _CHUNK):
+    chunk, chunk_owner = shingles[start:start + _CHUNK], owner[start:start + _CHUNK]
+    permuted = a[:, None] * chunk[None, :]
+    permuted += b[:, None]
+    permuted >>= np.uint64(32)
+    # Owners are contiguous, so each text is one segment of the chunk
+    starts = np.flatnonzero(np.r_[True, chunk_owner[1:] != chunk_owner[:-1]])
+    texts_in_chunk = chunk_owner[starts]
+    minimums = np.minimum.reduceat(permuted, starts, axis=1)
+    signatures[:, texts_in_chunk] = np.minimum(signatures[:, texts_in_chunk], minimums)
+  return signatures.T.astype(np.uint32)
+
+# MinHash signatures of scanned files, bucketed by LSH bands to find near-duplicates across repositories
+class MinHashIndex:
+  """
+  Near-duplicate index over the files of any number of scans. Each distinct
+  content (blob SHA) gets one MinHash signature, computed in vectorized batches
+  as files are added and kept in the scan cache when one is given, so cached
+  repositories are indexed again without reading their files. Signatures are
+  split into `bands` bands and every band is a key into a bucket of contents, so
+  finding near-duplicates only compares contents sharing a bucket instead of
+  every pair. With 128 permutations and 16 bands, contents above ~0.7 similarity
+  almost always share one
+
+    terence.scan_repository(url)
+    terence.index_near_duplicates()
+    terence.minhash.pairs(threshold=0.8)
+  """
+
+  def __init__(self, num_perm: int = 128, bands: int = 16, shingle: int = 5, seed: int = 1):
+    if num_perm % bands:
+      raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands}).")
+    self.num_perm = num_perm
+    self.bands = bands
+    self.shingle = shingle
+    self.seed = seed
+    self._rows = {}        # blob sha -> row of _signatures
+    self._signatures = []  # uint32 signature arrays, by row
+    self._buckets = {}     # (band, band bytes) -> set of rows
+    self._repos = {}       # repo_url -> { path: blob sha }
+    self._lock = threading.Lock()
+
+  def __repr__(self):
+    return f"MinHashIndex(repos={len(self._repos)}, contents={len(self._rows)})"
+
+  def __len__(self):
+    return sum(len(files) for files in self._repos.values())
+
+  # Name signatures are cached under, they only match for the same parameters
+  @property
+  def cache_name(self) -> str:
+    return f"minhash-{self.num_perm}-{self.shingle}-{self.seed}"
+
+  # Index the files of one repository, replacing what was indexed for it before
+  def add(self, files: Iterable[ScannedFile], repo_url: str, cache=None, batch_size: int = 256):
+    """
+    files are ScannedFile objects (Terence.scanned_files() or a streaming
+    Terence.iter_files(...)), hashed in batches of batch_size as they arrive.
+    With a ScanCache, signatures are read from and written to it by blob SHA
+    """
+    np = _numpy()
+    paths, batch, queued = {}, [], set()
+    for file in files:
+      paths[file.path] = file.sha
+      if file.sha in self._rows or file.sha in queued:
+        continue
+      data = cache.read_derived(self.cache_name, file.sha) if cache is not None else None
+      if data is not None:
+        self._insert(file.sha, np.frombuffer(data, dtype=np.uint32))
+        continue
+      queued.add(file.sha)
+      batch.append((file.sha, file.content))
+      if len(batch) >= batch_size:
+        self._add_batch(batch, cache)
+        batch, queued = [], set()
+    if batch:
+      self._add_batch(batch, cache)
+    with self._lock:
+      self._repos[repo_url] = paths
+    return self
+
+  def _add_batch(self, batch, cache):
+    signatures = minhash_signatures([text for _, text in batch], self.num_perm, self.shingle, self.seed)
+    for (sha, _), signature in zip(batch, signatures):
+      self._insert(sha, signature)
+      if cache is not None:
+        cache.write_derived(self.cache_name, sha, signature.tobytes())
+
+  def _insert(self, sha: str, signature):
+    with self._lock:
+      if sha in self._rows:
+        return
+      row = len(self._signatures)
+      self._rows[sha] = row
+      self._signatures.append(signature)
+      if (signature == _EMPTY).all():
+        return  # Nothing to compare
+      for band, key in enumerate(self._band_keys(signature)):
+        self._buckets.setdefault((band, key), set()).add(row)
+
+  def _band_keys(self, signature) -> List[bytes]:
+    width = self.num_perm // self.bands
+    return [signature[start:start + width].tobytes() for start in range(0, self.num_perm, width)]
+
+  # Drop a repository's files, their signatures stay for when the contents come back
+  def remove(self, repo_url: str):
+    with self._lock:
+      self._repos.pop(repo_url, None)
+
+  # Every pair of indexed files at least threshold similar
+  def pairs(self, threshold: float = 0.8, cross_repo: bool = True) -> List[NearDuplicate]:
+    """
+    Pairs of files whose estimated similarity is at least threshold, identical
+    contents included, most similar first. With cross_repo only pairs from two
+    different repositories are returned
+
+    Returns:
+      list: NearDuplicate(similarity, repo_a, path_a, repo_b, path_b)
+    """
+    np = _numpy()
+    with self._lock:
+      locations = {}  # row -> [(repo_url, path)]
+      for repo_url, files in self._repos.items():
+        for path, sha in files.items():
+          locations.setdefault(self._rows[sha], []).append((repo_url, path))
+      candidates = set()
+      for rows in self._buckets.values():
+        present = sorted(row for row in rows if row in locations)
+        candidates.update((first, second) for i, first in enumerate(present) for second in present[i + 1:])
+
+    pairs = [(1.0, row, row) for row, places in locations.items() if len(places) > 1]
+    if candidates:
+      firsts, seconds = (np.array(side) for side in zip(*sorted(candidates)))
+      signatures = np.stack(self._signatures)
+      similarity = (signatures[firsts] == signatures[seconds]).mean(axis=1)
+      keep = similarity >= threshold
+      pairs.extend(zip(similarity[keep].tolist(), firsts[keep].tolist(), seconds[keep].tolist()))
+
+    found = []
+    for similarity, first, second in pairs:
+      for i, (repo_a, path_a) in enumerate(locations[first]):
+        # Identical contents pair each location with the ones after it
+        others = locations[second][i + 1:] if first == second else locations[second]
+        for repo_b, path_b in others:
+          if not cross_repo or repo_a != repo_b:
+            found.append(NearDuplicate(similarity, repo_a, path_a, repo_b, path_b))
+    found.sort(key=lambda pair: (-pair.similarity, pair.repo_a, pair.path_a, pair.repo_b, pair.path_b))
+    return found
+
+  # Indexed files similar to text, most similar first
+  def similar(self, text: str, threshold: float = 0.8) -> List[Tuple[float, str, str]]:
+    """
+    Returns:
+      list: (similarity, repo_url, path) of every indexed file at least threshold similar to text
+    """
+    signature = minhash_signatures([text], self.num_perm, self.shingle, self.seed)[0]
+    if (signature == _EMPTY).all():
+      return []
+    with self._lock:
+      rows = set()
+      for band, key in enumerate(self._band_keys(signature)):
+        rows.update(self._buckets.get((band, key), ()))
+      rows = sorted(rows)
+      matches = {}
+      if rows:
+        np = _numpy()
+        matrix = np.stack([self._signatures[row] for row in rows])
+        for row, similarity in zip(rows, (matrix == signature).mean(axis=1).tolist()):
+          if similarity >= threshold:
+            matches[row] = similarity
+      found = [(matches[self._rows[sha]], repo_url, path) for repo_url, files in self._repos.items()
+               for path, sha in files.items() if self._rows[sha] in matches]
+    return sorted(found, key=lambda match: (-match[0], match[1], match[2]))
+
+  def clear(self):
+    with self._lock:
+      self._rows.clear()
+      self._signatures = []
+      self._buckets.clear()
+      self._repos.clear()
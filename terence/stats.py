@@ -0,0 +1,186 @@
+import math
+import time
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+# Telemetry for a single scan so slow scans can be attributed to listings, downloads, decoding or rate limit checks
+class ScanStats:
+  """
+  Counters and timings collected while a scan runs
+
+  Hooks are callables taking (event, payload) and are called for every
+  'request', 'file_fetched', 'file_skipped', 'file_failed' and 'cache_hit' event
+  """
+
+  def __init__(self, hooks: Optional[List[Callable]] = None):
+    self.requests = {}           # endpoint -> number of API requests
+    self.latencies = []          # seconds per API request, in order
+    self.bytes_transferred = 0   # bytes of file content downloaded
+    self.files_fetched = 0
+    self.files_skipped = {}      # reason -> count
+    self.files_failed = {}       # path -> reason
+    self.cache_hits = 0
+    self.phases = {}             # phase -> seconds spent in it
+    self.started_at = None
+    self.finished_at = None
+    self._hooks = list(hooks or [])
+    self._lock = threading.Lock()
+
+  def __repr__(self):
+    return (f"ScanStats(requests={self.total_requests}, fetched={self.files_fetched}, "
+            f"skipped={sum(self.files_skipped.values())}, failed={len(self.files_failed)}, "
+            f"wall_time={self.wall_time:.2f}s)")
+
+  def start(self):
+    self.started_at = time.time()
+    return self
+
+  def finish(self):
+    self.finished_at = time.time()
+    return self
+
+  @property
+  def wall_time(self) -> float:
+    if self.started_at is None:
+      return 0.0
+    end = self.finished_at if self.finished_at is not None else time.time()
+    return end - self.started_at
+
+  @property
+  def total_requests(self) -> int:
+    return sum(self.requests.values())
+
+  # Time a block of work and add it to the given phase
+  @contextmanager
+  def phase(self, name: str):
+    start = time.perf_counter()
+    try:
+      yield
+    finally:
+      self._add_phase(name, time.perf_counter() - start)
+
+  # Time a single API request, counting it against its endpoint and phase
+  @contextmanager
+  def request(self, endpoint: str, phase: str):
+    start = time.perf_counter()
+    try:
+      yield
+    finally:
+      elapsed = time.perf_counter() - start
+      with self._lock:
+        self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+        self.latencies.append(elapsed)
+      self._add_phase(phase, elapsed)
+      self._emit('request', {'endpoint': endpoint, 'phase': phase, 'seconds': elapsed})
+
+  def record_fetch(self, path: str, size: int):
+    with self._lock:
+      self.files_fetched += 1
+      self.bytes_transferred += size
+    self._emit('file_fetched', {'path': path, 'bytes': size})
+
+  def record_skip(self, path: str, reason: str):
+    with self._lock:
+      self.files_skipped[reason] = self.files_skipped.get(reason, 0) + 1
+    self._emit('file_skipped', {'path': path, 'reason': reason})
+
+  def record_failure(self, path: str, reason: str):
+    with self._lock:
+      self.files_failed[path] = reason
+    self._emit('file_failed', {'path': path, 'reason': reason})
+
+  def record_cache_hit(self, path: str):
+    with self._lock:
+      self.cache_hits += 1
+    self._emit('cache_hit', {'path': path})
+
+  # Nearest-rank percentile of request latency in seconds, None if no requests were made
+  def latency_percentile(self, percentile: float) -> Optional[float]:
+    if not self.latencies:
+      return None
+    ordered = sorted(self.latencies)
+    rank = max(1, math.ceil(percentile * len(ordered) / 100))
+    return ordered[min(rank, len(ordered)) - 1]
+
+  @property
+  def p50(self) -> Optional[float]:
+    return self.latency_percentile(50)
+
+  @property
+  def p95(self) -> Optional[float]:
+    return self.latency_percentile(95)
+
+  def as_dict(self) -> Dict:
+    """
+    Plain dictionary snapshot, suitable for JSON logging or OpenTelemetry attributes
+
+    Returns:
+      dict: {
+        'requests': dict,          # endpoint -> count
+        'total_requests': int,
+        'bytes_transferred': int,
+        'files_fetched': int,
+        'files_skipped': dict,     # reason -> count
+        'files_failed': dict,      # path -> reason
+        'cache_hits': int,
+        'phases': dict,            # phase -> seconds
+        'wall_time': float,
+        'latency_p50': float or None,
+        'latency_p95': float or None
+      }
+    """
+    with self._lock:
+      return {
+        'requests': dict(self.requests),
+        'total_requests': sum(self.requests.values()),
+        'bytes_transferred': self.bytes_transferred,
+        'files_fetched': self.files_fetched,
+        'files_skipped': dict(self.files_skipped),
+        'files_failed': dict(self.files_failed),
+        'cache_hits': self.cache_hits,
+        'phases': dict(self.phases),
+        'wall_time': self.wall_time,
+        'latency_p50': self.p50,
+        'latency_p95': self.p95,
+      }
+
+  # Prometheus text exposition format, so a scrape endpoint can serve it directly
+  def to_prometheus(self, prefix: str = "terence_scan") -> str:
+    data = self.as_dict()
+    lines = [f"# TYPE {prefix}_requests_total counter"]
+    for endpoint, count in sorted(data['requests'].items()):
+      lines.append(f'{prefix}_requests_total{{endpoint="{endpoint}"}} {count}')
+
+    lines.append(f"# TYPE {prefix}_bytes_transferred_total counter")
+    lines.append(f"{prefix}_bytes_transferred_total {data['bytes_transferred']}")
+
+    lines.append(f"# TYPE {prefix}_files_total counter")
+    lines.append(f'{prefix}_files_total{{status="fetched"}} {data["files_fetched"]}')
+    lines.append(f'{prefix}_files_total{{status="failed"}} {len(data["files_failed"])}')
+    for reason, count in sorted(data['files_skipped'].items()):
+      lines.append(f'{prefix}_files_total{{status="skipped",reason="{reason}"}} {count}')
+
+    lines.append(f"# TYPE {prefix}_cache_hits_total counter")
+    lines.append(f"{prefix}_cache_hits_total {data['cache_hits']}")
+
+    lines.append(f"# TYPE {prefix}_phase_seconds gauge")
+    for phase, seconds in sorted(data['phases'].items()):
+      lines.append(f'{prefix}_phase_seconds{{phase="{phase}"}} {seconds:.6f}')
+
+    lines.append(f"# TYPE {prefix}_request_latency_seconds summary")
+    for quantile, value in (("0.5", data['latency_p50']), ("0.95", data['latency_p95'])):
+      if value is not None:
+        lines.append(f'{prefix}_request_latency_seconds{{quantile="{quantile}"}} {value:.6f}')
+
+    lines.append(f"# TYPE {prefix}_wall_seconds gauge")
+    lines.append(f"{prefix}_wall_seconds {data['wall_time']:.6f}")
+    return "\n".join(lines) + "\n"
+
+  def _add_phase(self, name: str, seconds: float):
+    with self._lock:
+      self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+  def _emit(self, event: str, payload: Dict):
+    for hook in self._hooks:
+      hook(event, payload)
@@ -0,0 +1,54 @@
+import os
+import re
+import posixpath
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from terence.mirror import is_local_repository, local_path
+from terence.utils import parse_github_url
+
+_SECTION = re.compile(r'^\s*\[submodule\s+"([^"]*)"\s*\]\s*$')
+_SETTING = re.compile(r'^\s*(\w+)\s*=\s*(.*?)\s*$')
+_SCP_URL = re.compile(r'^[\w.-]+@([\w.-]+):(.+?)/?$')  # git@github.com:owner/repo.git
+
+# { submodule path: url } from the text of a .gitmodules file
+def parse_gitmodules(text: str) -> Dict[str, str]:
+  submodules, current = {}, None
+  for line in text.splitlines():
+    if line.strip().startswith(("#", ";")):
+      continue
+    section = _SECTION.match(line)
+    if section:
+      current = {}
+      submodules[section.group(1)] = current
+      continue
+    setting = _SETTING.match(line)
+    if setting and current is not None:
+      current[setting.group(1).lower()] = setting.group(2).strip('"')
+  return {values['path'].strip("/"): values['url'] for values in submodules.values() if 'path' in values and 'url' in values}
+
+# URL Terence can scan for a submodule url of the repository at repo_url, None if it points somewhere else
+def resolve_submodule_url(url: str, repo_url: str) -> Optional[str]:
+  if url.startswith(("./", "../")):
+    # Relative to the superproject's own URL
+    if is_local_repository(repo_url):
+      # Absolute, so the result still reads as a local path
+      return os.path.normpath(os.path.join(local_path(repo_url), url))
+    owner, repo_name = parse_github_url(repo_url)
+    path = posixpath.normpath(posixpath.join(owner, repo_name, url))
+    if path.count("/") != 1:
+      return None
+    url = f"https://github.com/{path}"
+  elif is_local_repository(url):
+    # Like git's protocol.file.allow, a remote repository can't point the scan at files on this host
+    return url if is_local_repository(repo_url) else None
+  scp = _SCP_URL.match(url)
+  if scp:
+    url = f"https://{scp.group(1)}/{scp.group(2)}"
+  url = re.sub(r"^(?:git|ssh|git\+ssh)://(?:[^@/]+@)?", "https://", url)
+  # Only GitHub repositories can be scanned
+  parts = urlsplit(url)
+  if parts.hostname != "github.com" or parts.path.strip("/").count("/") < 1:
+    return None
+  owner, repo_name = parse_github_url(url)
+  return f"https://github.com/{owner}/{repo_name}"
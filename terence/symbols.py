@@ -0,0 +1,234 @@
+import os
+import re
+import ast
+import threading
+from collections import deque
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from terence.content import ScannedFile
+
+# One top-level definition or import found in a file
+class Symbol(NamedTuple):
+  name: str
+  kind: str     # function, class or import
+  path: str
+  line: int     # 1-based
+  sha: str      # Git blob SHA of the file
+
+# Regex grammars for languages without a parser in the standard library: extension -> [(kind, pattern)]
+# Each pattern captures the name in its first group and is matched against whole lines
+_JS = [
+  ('function', r"^(?:export\s+(?:default\s+)?)?(?:async\s+)?function\s*\*?\s*([A-Za-z_$][\w$]*)"),
+  ('function', r"^(?:export\s+)?(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*=\s*(?:async\s+)?(?:function\b|\([^)]*\)\s*=>|[A-Za-z_$][\w$]*\s*=>)"),
+  ('class', r"^(?:export\s+(?:default\s+)?)?(?:abstract\s+)?(?:class|interface|enum|type)\s+([A-Za-z_$][\w$]*)"),
+  ('import', r"^import\s+(?:.+?\s+from\s+)?['\"]([^'\"]+)['\"]"),
+  ('import', r"^(?:const|let|var)\s+.+?=\s*require\(\s*['\"]([^'\"]+)['\"]\s*\)"),
+]
+_C = [
+  ('function', r"^(?!(?:if|for|while|switch|return|else)\b)[A-Za-z_][\w\s\*&:<>,]*?\b([A-Za-z_]\w*)\s*\([^;{]*\)\s*(?:const\s*)?\{?\s*$"),
+  ('class', r"^(?:typedef\s+)?(?:class|struct|union|enum)\s+([A-Za-z_]\w*)"),
+  ('import', r"^#\s*include\s*[<\"]([^>\"]+)[>\"]"),
+]
+_JAVA_LIKE = [
+  ('class', r"^(?:(?:public|private|protected|internal|abstract|final|sealed|static|partial|data|open)\s+)*(?:class|interface|enum|record|struct|object)\s+([A-Za-z_]\w*)"),
+  ('import', r"^(?:import|using)\s+(?:static\s+)?([\w.]+(?:\.\*)?)\s*;?"),
+  ('function', r"^(?:(?:public|private|protected|internal|static|suspend|inline)\s+)*fun\s+(?:<[^>]+>\s*)?([A-Za-z_]\w*)"),
+]
+GRAMMARS = {
+  '.js': _JS, '.jsx': _JS, '.ts': _JS, '.tsx': _JS, '.vue': _JS, '.svelte': _JS,
+  '.c': _C, '.h': _C, '.cpp': _C, '.hpp': _C, '.cc': _C,
+  '.java': _JAVA_LIKE, '.cs': _JAVA_LIKE, '.kt': _JAVA_LIKE,
+  '.go': [
+    ('function', r"^func\s+(?:\([^)]*\)\s*)?([A-Za-z_]\w*)"),
+    ('class', r"^type\s+([A-Za-z_]\w*)\s+(?:struct|interface)\b"),
+    ('import', r"^import\s+(?:[\w.]+\s+)?\"([^\"]+)\""),
+    ('import', r"^\s+(?:[\w.]+\s+)?\"([^\"]+)\"\s*$"),
+  ],
+  '.rs': [
+    ('function', r"^(?:pub(?:\([^)]*\))?\s+)?(?:async\s+)?(?:unsafe\s+)?(?:extern\s+\"[^\"]*\"\s+)?fn\s+([A-Za-z_]\w*)"),
+    ('class', r"^(?:pub(?:\([^)]*\))?\s+)?(?:struct|enum|trait|union|type)\s+([A-Za-z_]\w*)"),
+    ('import', r"^(?:pub\s+)?use\s+([\w:]+)"),
+  ],
+  '.rb': [
+    ('function', r"^def\s+(?:self\.)?([A-Za-z_]\w*[?!=]?)"),
+    ('class', r"^(?:class|module)\s+([A-Z]\w*(?:::[A-Z]\w*)*)"),
+    ('import', r"^require(?:_relative)?\s*\(?\s*['\"]([^'\"]+)['\"]"),
+  ],
+  '.php': [
+    ('function', r"^function\s+&?\s*([A-Za-z_]\w*)"),
+    ('class', r"^(?:(?:abstract|final|readonly)\s+)*(?:class|interface|trait|enum)\s+([A-Za-z_]\w*)"),
+    ('import', r"^(?:use|require(?:_once)?|include(?:_once)?)\s*\(?\s*['\"]?([\w\\./-]+)"),
+  ],
+  '.swift': [
+    ('function', r"^(?:(?:public|private|internal|fileprivate|open|static)\s+)*func\s+([A-Za-z_]\w*)"),
+    ('class', r"^(?:(?:public|private|internal|fileprivate|open|final)\s+)*(?:class|struct|enum|protocol|actor|extension)\s+([A-Za-z_]\w*)"),
+    ('import', r"^import\s+([\w.]+)"),
+  ],
+}
+_compiled = {}  # extension -> compiled grammar, filled on first use to keep imports fast
+
+def _grammar(ext: str):
+  if ext not in _compiled:
+    grammar = GRAMMARS.get(ext)
+    _compiled[ext] = grammar and [(kind, re.compile(pattern)) for kind, pattern in grammar]
+  return _compiled[ext]
+
+# (name, kind, line) of every top-level function, class and import in one file
+def extract_symbols(path: str, text: str) -> List[Tuple[str, str, int]]:
+  ext = os.path.splitext(path)[1].lower()
+  if ext == ".py":
+    try:
+      return _python_symbols(text)
+    # Deeply nested or huge files can exhaust the parser's recursion limit or memory
+    except (SyntaxError, ValueError, RecursionError, MemoryError):
+      return []
+  grammar = _grammar(ext)
+  if grammar is None:
+    return []
+
+  symbols = []
+  in_go_imports = False
+  for number, line in enumerate(text.splitlines(), 1):
+    # Go's import ( ... ) blocks list one package per indented line
+    if ext == ".go":
+      if line.startswith("import ("):
+        in_go_imports = True
+        continue
+      if in_go_imports and line.startswith(")"):
+        in_go_imports = False
+    if line[:1].isspace() and not in_go_imports:
+      continue  # Only top-level definitions
+    for kind, pattern in grammar:
+      match = pattern.match(line)
+      if match:
+        symbols.append((match.group(1), kind, number))
+        break
+  return symbols
+
+def _python_symbols(text: str) -> List[Tuple[str, str, int]]:
+  symbols = []
+  for node in ast.parse(text).body:
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+      symbols.append((node.name, 'function', node.lineno))
+    elif isinstance(node, ast.ClassDef):
+      symbols.append((node.name, 'class', node.lineno))
+    elif isinstance(node, ast.Import):
+      symbols.extend((alias.name, 'import', node.lineno) for alias in node.names)
+    elif isinstance(node, ast.ImportFrom):
+      module = "." * node.level + (node.module or "")
+      symbols.extend((f"{module}.{alias.name}" if module else alias.name, 'import', node.lineno) for alias in node.names)
+  return symbols
+
+# Worker entry point, must be importable for the process pool
+def _extract_batch(batch) -> List[Tuple[str, List[Tuple[str, str, int]]]]:
+  return [(sha, extract_symbols(path, text)) for path, sha, text in batch]
+
+# Symbols of scanned files, cached by blob SHA and searchable by name
+class SymbolIndex:
+  """
+  Index of the top-level functions, classes and imports of scanned files.
+  Python is parsed with ast and the other allowed extensions with line-based
+  regex grammars, across a process pool. Extraction results are cached by blob
+  SHA, so files that didn't change since an earlier update are not parsed again
+
+    terence.index_symbols()
+    terence.symbols.find("parse_github_url")
+  """
+
+  def __init__(self):
+    self._by_sha = {}   # blob sha -> [(name, kind, line)]
+    self._files = {}    # path -> blob sha of the indexed files
+    self._by_name = {}  # name -> [Symbol], rebuilt after every update
+    self._lock = threading.Lock()
+
+  def __repr__(self):
+    return f"SymbolIndex(files={len(self._files)}, names={len(self._by_name)})"
+
+  def __len__(self):
+    return sum(len(symbols) for symbols in self._by_name.values())
+
+  # Index files, replacing what was indexed before
+  def update(self, files: Iterable[ScannedFile], workers: Optional[int] = None, batch_chars: int = 256 * 1024):
+    """
+    Extract symbols from files (Terence.scanned_files() or Terence.iter_files(...))
+    with `workers` processes (os.cpu_count() by default, 0 to parse in this process).
+    Files whose blob SHA was indexed before reuse the cached symbols
+    """
+    files_by_path, queued = {}, set()
+
+    # Batches of files not indexed yet, read lazily so a streamed scan isn't held in memory
+    def batches():
+      batch, chars = [], 0
+      for file in files:
+        files_by_path[file.path] = file.sha
+        if file.sha in self._by_sha or file.sha in queued:
+          continue
+        queued.add(file.sha)
+        batch.append((file.path, file.sha, file.content))
+        chars += len(file.content)
+        if chars >= batch_chars:
+          yield batch
+          batch, chars = [], 0
+      if batch:
+        yield batch
+
+    for sha, symbols in self._extract(batches(), workers):
+      self._by_sha[sha] = symbols
+
+    by_name = {}
+    for path, sha in files_by_path.items():
+      for name, kind, line in self._by_sha.get(sha, []):
+        by_name.setdefault(name, []).append(Symbol(name, kind, path, line, sha))
+    with self._lock:
+      self._files, self._by_name = files_by_path, by_name
+    return self
+
+  def _extract(self, batches, workers):
+    first = next(batches, None)
+    following = next(batches, None)
+    # A single batch isn't worth starting processes for
+    if workers == 0 or following is None:
+      for batch in (first, following, *batches):
+        if batch is not None:
+          yield from _extract_batch(batch)
+      return
+
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+      pending = deque([pool.submit(_extract_batch, first), pool.submit(_extract_batch, following)])
+      for batch in batches:
+        pending.append(pool.submit(_extract_batch, batch))
+        if len(pending) >= workers * 2:
+          done, _ = wait(pending, return_when=FIRST_COMPLETED)
+          for future in done:
+            pending.remove(future)
+            yield from future.result()
+      while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+          pending.remove(future)
+          yield from future.result()
+
+  # Every symbol called name, optionally only of one kind
+  def find(self, name: str, kind: Optional[str] = None) -> List[Symbol]:
+    symbols = self._by_name.get(name, [])
+    return [symbol for symbol in symbols if kind is None or symbol.kind == kind]
+
+  # Symbols whose name starts with prefix
+  def search(self, prefix: str, kind: Optional[str] = None) -> List[Symbol]:
+    return [symbol for name, symbols in self._by_name.items() if name.startswith(prefix)
+            for symbol in symbols if kind is None or symbol.kind == kind]
+
+  # Symbols of one file in line order
+  def in_file(self, path: str) -> List[Symbol]:
+    sha = self._files.get(path)
+    if sha is None:
+      return []
+    return [Symbol(name, kind, path, line, sha) for name, kind, line in self._by_sha.get(sha, [])]
+
+  def clear(self):
+    with self._lock:
+      self._by_sha.clear()
+      self._files = {}
+      self._by_name = {}
@@ -0,0 +1,147 @@
+from typing import Dict, List, Optional, Sequence, Union
+
+# Language of each allowed extension (see should_scan_file)
+LANGUAGES = {
+  '.py': "Python",
+  '.js': "JavaScript", '.jsx': "JavaScript", '.ts': "TypeScript", '.tsx': "TypeScript",
+  '.html': "HTML", '.htm': "HTML", '.css': "CSS", '.scss': "SCSS", '.sass': "Sass",
+  '.vue': "Vue", '.svelte': "Svelte",
+  '.java': "Java",
+  '.c': "C", '.h': "C", '.cpp': "C++", '.hpp': "C++", '.cc': "C++",
+  '.go': "Go", '.rs': "Rust", '.rb': "Ruby", '.php': "PHP", '.swift': "Swift", '.kt': "Kotlin", '.cs': "C#",
+}
+
+COLUMNS = ("path", "dir", "ext", "size", "sha", "lines", "is_binary", "language")
+
+# NumPy is an optional dependency, only needed once a table is built
+def _numpy():
+  try:
+    import numpy
+  except ImportError:
+    raise ImportError("NumPy is required for file tables. Install it with: pip install terence[table]") from None
+  return numpy
+
+# Per-file metadata of a scan as one NumPy array per column
+class FileTable:
+  """
+  Columnar metadata of the files of a scan, one row per file:
+
+    path, dir, ext, sha, language   str arrays ("" for files at the root or without extension/language)
+    size, lines                     int64 arrays (bytes, newline-terminated lines)
+    is_binary                       bool array
+
+  Columns are computed in one vectorized pass, so aggregate queries stay fast on
+  very large repositories:
+
+    table = terence.file_table()
+    table.group_sum(("language", "dir"), "size")   # bytes per language per directory
+    table.where(language="Python")["lines"].sum()
+  """
+
+  def __init__(self, columns: Dict[str, object]):
+    self.columns = columns
+
+  def __repr__(self):
+    return f"FileTable(rows={len(self)})"
+
+  def __len__(self):
+    return len(self.columns["path"])
+
+  # table["size"] is a column, table[mask] or table[indices] a table of the selected rows
+  def __getitem__(self, key):
+    if isinstance(key, str):
+      return self.columns[key]
+    return FileTable({name: column[key] for name, column in self.columns.items()})
+
+  @classmethod
+  def from_scan(cls, entries: Sequence, results: Dict[str, str]) -> "FileTable":
+    """Build the table from TreeEntry objects of a scan and its { path: content } results"""
+    np = _numpy()
+    count = len(entries)
+
+    paths = np.array([entry.path for entry in entries], dtype=str).reshape(count)
+    # np.char.rpartition can't handle empty arrays, so an empty scan reuses the empty path column
+    directory, _, name = np.char.rpartition(paths, "/").T if count else (paths, paths, paths)
+    stem, dot, suffix = np.char.rpartition(name, ".").T if count else (paths, paths, paths)
+    # Dotfiles like ".env" have no extension
+    ext = np.where((dot == ".") & (stem != ""), np.char.lower(np.char.add(".", suffix)), "")
+
+    # One dictionary lookup per distinct extension rather than per file
+    distinct, inverse = np.unique(ext, return_inverse=True)
+    language = np.array([LANGUAGES.get(value, "") for value in distinct], dtype=str)[inverse].reshape(count)
+
+    texts = [results.get(entry.path) for entry in entries]
+    size = np.fromiter((entry.size if entry.size >= 0 else len(text.encode('utf-8')) if text is not None else 0
+                        for entry, text in zip(entries, texts)), dtype=np.int64, count=count)
+    lines = np.fromiter((text.count("\n") + (not text.endswith("\n")) if text else 0 for text in texts),
+                        dtype=np.int64, count=count)
+    is_binary = np.fromiter((text is None for text in texts), dtype=bool, count=count)
+
+    return cls({
+      'path': paths,
+      'dir': directory.astype(str),
+      'ext': ext.astype(str),
+      'size': size,
+      'sha': np.array([entry.sha for entry in entries], dtype=str).reshape(count),
+      'lines': lines,
+      'is_binary': is_binary,
+      'language': language,
+    })
+
+  # Rows whose columns equal the given values, e.g. where(language="Go", is_binary=False)
+  def where(self, **conditions) -> "FileTable":
+    np = _numpy()
+    mask = np.ones(len(self), dtype=bool)
+    for name, value in conditions.items():
+      mask &= self.columns[name] == value
+    return self[mask]
+
+  # Sum of a numeric column for each distinct value (or combination of values) of the `by` columns
+  def group_sum(self, by: Union[str, Sequence[str]], value: Optional[str] = "size") -> Dict:
+    """
+    Returns:
+      dict: { key: total }, keys are values of `by` (tuples when grouping by several columns).
+      With value=None the number of rows in each group is returned instead
+    """
+    np = _numpy()
+    names = [by] if isinstance(by, str) else list(by)
+    if not len(self):
+      return {}
+
+    # Combine the group index of every column into one code per row
+    codes = np.zeros(len(self), dtype=np.int64)
+    uniques = []
+    for name in names:
+      distinct, inverse = np.unique(self.columns[name], return_inverse=True)
+      codes = codes * len(distinct) + inverse.reshape(len(self))
+      uniques.append(distinct)
+
+    present, group = np.unique(codes, return_inverse=True)
+    weights = None if value is None else self.columns[value]
+    totals = np.bincount(group.reshape(len(self)), weights=weights)
+
+    result = {}
+    for code, total in zip(present.tolist(), totals.tolist()):
+      key = []
+      for distinct in reversed(uniques):
+        code, index = divmod(code, len(distinct))
+        key.append(distinct[index].item())
+      key = tuple(reversed(key))
+      result[key[0] if isinstance(by, str) else key] = int(total) if value is None or weights.dtype.kind in "iub" else total
+    return result
+
+  # Number of rows for each distinct value of the `by` columns
+  def group_count(self, by: Union[str, Sequence[str]]) -> Dict:
+    return self.group_sum(by, None)
+
+  # Plain Python lists, { column: [value, ...] }
+  def as_dict(self) -> Dict[str, List]:
+    return {name: column.tolist() for name, column in self.columns.items()}
+
+  # The same columns as a pyarrow.Table
+  def to_arrow(self):
+    try:
+      import pyarrow
+    except ImportError:
+      raise ImportError("pyarrow is required for Arrow tables. Install it with: pip install pyarrow") from None
+    return pyarrow.table({name: self.columns[name] for name in COLUMNS})
@@ -1,4 +1,6 @@
-from typing import List, Optional
+import re
+from functools import lru_cache
+from typing import List, Optional, Tuple
 
 # Takes in the github url and parses it into owner and repo name / path
 def parse_github_url(url: str):
@@ -82,4 +84,93 @@ def should_scan_file(file_path: str, extensions: Optional[List[str]] = None) ->
     # Return true for each file that ends with one of the provided extensions that are verified
     return file_path.endswith(tuple(normalized_extensions))
 
-  return file_path.endswith(allowed_extensions)
\ No newline at end of file
+  return file_path.endswith(allowed_extensions)
+
+# Like parse_github_url, but also returns the ref and path of /tree/<ref>/<path> and /blob/<ref>/<path> URLs
+def parse_github_location(url: str) -> Tuple[str, str, Optional[str], str]:
+  owner, repo = parse_github_url(url)
+
+  # Drop query strings and fragments, then look at what follows owner/repo
+  url = url.split("#", 1)[0].split("?", 1)[0]
+  url = url.replace("https://", "").replace("http://", "").replace("github.com/", "")
+  parts = [part for part in url.rstrip("/").split("/") if part]
+
+  ref, path = None, ""
+  # Refs containing slashes can't be told apart from paths, so the first segment is taken as the ref
+  if len(parts) >= 4 and parts[2] in ("tree", "blob"):
+    ref = parts[3]
+    path = "/".join(parts[4:])
+  return (owner, repo, ref, path)
+
+# Translate a glob into a regex: * and ? stay within one path segment, ** spans any number of segments
+@lru_cache(maxsize=256)
+def _glob_regex(pattern: str):
+  regex = ""
+  i = 0
+  while i < len(pattern):
+    char = pattern[i]
+    if pattern.startswith("**/", i):
+      regex += "(?:.*/)?"
+      i += 3
+      continue
+    if pattern.startswith("**", i):
+      regex += ".*"
+      i += 2
+      continue
+    if char == "*":
+      regex += "[^/]*"
+    elif char == "?":
+      regex += "[^/]"
+    elif char == "[":
+      # Like fnmatch: [! negates the class and a ] right after the opening is a literal
+      start = i + 2 if pattern.startswith("[!", i) else i + 1
+      end = pattern.find("]", start + 1 if pattern.startswith("]", start) else start)
+      if end == -1:
+        regex += re.escape(char)
+      else:
+        # Everything but the dashes of ranges is literal, a negated class stays within one segment too
+        body = "-".join(re.escape(part) for part in pattern[start:end].split("-"))
+        regex += ("[^/" if start == i + 2 else "[") + body + "]"
+        i = end
+    else:
+      regex += re.escape(char)
+    i += 1
+  return re.compile(regex + r"\Z")
+
+# True if the glob matches the path or one of its parent directories, so "src/*" selects everything under src/
+def match_glob(file_path: str, pattern: str) -> bool:
+  regex = _glob_regex(pattern.strip("/"))
+  if regex.match(file_path):
+    return True
+  parts = file_path.split("/")
+  return any(regex.match("/".join(parts[:i])) for i in range(1, len(parts)))
+
+# Directory part of a glob before its first wildcard, i.e. the smallest subtree that can contain every match
+def glob_static_prefix(pattern: str) -> str:
+  prefix = []
+  for part in pattern.strip("/").split("/"):
+    if any(char in part for char in "*?["):
+      break
+    prefix.append(part)
+  return "/".join(prefix)
+
+# Smallest set of subtrees that has to be listed to find every file under `path` matching `include`
+def scan_roots(path: str = "", include: Optional[List[str]] = None) -> List[str]:
+  path = path.strip("/")
+  if path or not include:
+    return [path]
+  roots = sorted(set(glob_static_prefix(pattern) for pattern in include))
+  minimal = []
+  for root in roots:
+    if not any(root == kept or root.startswith(kept + "/") or kept == "" for kept in minimal):
+      minimal.append(root)
+  return minimal
+
+# Whether a file falls inside the scanned subtree and matches at least one include glob
+def in_scope(file_path: str, path: str = "", include: Optional[List[str]] = None) -> bool:
+  path = path.strip("/")
+  if path and file_path != path and not file_path.startswith(path + "/"):
+    return False
+  if include:
+    return any(match_glob(file_path, pattern) for pattern in include)
+  return True
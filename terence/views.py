@@ -0,0 +1,179 @@
+import heapq
+import posixpath
+from bisect import bisect_left
+from collections.abc import ItemsView, Mapping, ValuesView
+from typing import Callable, Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+from terence.content import ScannedFile
+from terence.utils import glob_static_prefix, match_glob
+
+# Lowercased extension of path with its dot, "" for files without one (dotfiles like ".env" included)
+def extension(path: str) -> str:
+  stem, dot, suffix = posixpath.basename(path).rpartition(".")
+  return "." + suffix.lower() if dot and stem else ""
+
+# Sorted paths of one results dictionary, overall and per extension
+class PathIndex:
+  """
+  Built once per results dictionary and shared by every view of it. All paths
+  under a directory are one contiguous range of a sorted list, found with two
+  binary searches, and keeping one sorted list per extension makes a directory
+  and extension query a range of that list too, so scoped lookups cost
+  O(log n + matches) rather than a pass over every file
+  """
+
+  def __init__(self, files: Mapping, shas: Optional[Dict[str, str]] = None, entries: Optional[Dict[str, object]] = None):
+    self.files = files
+    self.shas = shas or {}
+    self.entries = entries or {}
+    self.paths = sorted(files)
+    self.by_extension = {}  # ".ts" -> sorted paths
+    for path in self.paths:
+      self.by_extension.setdefault(extension(path), []).append(path)
+
+  def __repr__(self):
+    return f"PathIndex(paths={len(self.paths)}, extensions={len(self.by_extension)})"
+
+  # (paths, start, stop) of the part of each sorted list under directory, one list per extension or all paths
+  def ranges(self, directory: str = "", extensions: Optional[FrozenSet[str]] = None) -> List[Tuple[List[str], int, int]]:
+    lists = [self.paths] if extensions is None else [self.by_extension[ext] for ext in sorted(extensions) if ext in self.by_extension]
+    if not directory:
+      return [(paths, 0, len(paths)) for paths in lists]
+    # "/" sorts right before "0", so "dir/" up to "dir0" is exactly what's under dir
+    return [(paths, bisect_left(paths, directory + "/"), bisect_left(paths, directory + "0")) for paths in lists]
+
+  # Bytes of the file at path, from its tree entry when the backend gave a size
+  def size(self, path: str) -> int:
+    entry = self.entries.get(path)
+    return entry.size if entry is not None and entry.size >= 0 else len(self.files[path].encode('utf-8'))
+
+  def scanned_file(self, path: str) -> ScannedFile:
+    return ScannedFile(path, self.shas.get(path, ""), self.size(path), self.files[path])
+
+# Read-only { path: content } of the files of a scan matching a set of filters, without copying them
+class ResultView(Mapping):
+  """
+  A lazy, filtered Mapping over scan results. Nothing is copied: iterating
+  walks the index ranges the directory and extension filters select, in path
+  order, and checks the remaining filters (globs, sizes, predicates) on those
+  candidates only. Every filter method returns a narrower view, so they chain
+
+    view = terence.view().directory("src").extension("ts", "tsx")
+    view["src/app.ts"]
+    big = view.size(min_size=100_000).where(lambda file: "TODO" in file.content)
+
+  The view reflects the results it was made from; build a new one after the
+  next scan
+  """
+
+  def __init__(self, index: PathIndex, directory: str = "", extensions: Optional[FrozenSet[str]] = None,
+               checks: Tuple[Callable[[str], bool], ...] = (), empty: bool = False):
+    self._index = index
+    self._directory = directory
+    self._extensions = extensions
+    self._checks = checks  # Callables taking a candidate path
+    self._empty = empty    # Disjoint directory filters, nothing can match
+
+  def __repr__(self):
+    filters = []
+    if self._directory:
+      filters.append(f"directory={self._directory!r}")
+    if self._extensions is not None:
+      filters.append(f"extensions={sorted(self._extensions)!r}")
+    if self._checks:
+      filters.append(f"checks={len(self._checks)}")
+    return f"ResultView({', '.join(filters)})"
+
+  def _narrow(self, **changes) -> "ResultView":
+    state = {'directory': self._directory, 'extensions': self._extensions, 'checks': self._checks, 'empty': self._empty}
+    state.update(changes)
+    return ResultView(self._index, **state)
+
+  # Files under directory, at any depth
+  def directory(self, path: str) -> "ResultView":
+    path, current = path.strip("/"), self._directory
+    if not path or current == path or current.startswith(path + "/"):
+      return self  # Already as narrow
+    if not current or path.startswith(current + "/"):
+      return self._narrow(directory=path)
+    return self._narrow(empty=True)
+
+  # Files with one of the extensions ("ts" or ".ts", case insensitive)
+  def extension(self, *extensions: str) -> "ResultView":
+    wanted = frozenset("." + ext.lstrip(".").lower() for ext in extensions)
+    return self._narrow(extensions=wanted if self._extensions is None else self._extensions & wanted)
+
+  # Files matching a glob relative to the repository root, like include in scan_repository
+  def glob(self, pattern: str) -> "ResultView":
+    pattern = pattern.strip("/")
+    prefix = glob_static_prefix(pattern)
+    # A pattern without wildcards can name a file as well as a directory
+    view = self.directory(prefix if prefix != pattern else posixpath.dirname(prefix))
+    return view._narrow(checks=view._checks + (lambda path: match_glob(path, pattern),))
+
+  # Files of at least min_size and at most max_size bytes
+  def size(self, min_size: Optional[int] = None, max_size: Optional[int] = None) -> "ResultView":
+    index = self._index
+    def check(path):
+      size = index.size(path)
+      return (min_size is None or size >= min_size) and (max_size is None or size <= max_size)
+    return self._narrow(checks=self._checks + (check,))
+
+  # Files for which predicate(ScannedFile(path, sha, size, content)) is true
+  def where(self, predicate: Callable[[ScannedFile], bool]) -> "ResultView":
+    index = self._index
+    return self._narrow(checks=self._checks + (lambda path: predicate(index.scanned_file(path)),))
+
+  def _matches(self, path: str) -> bool:
+    return all(check(path) for check in self._checks)
+
+  def _paths(self) -> Iterator[str]:
+    if self._empty:
+      return iter(())
+    ranges = self._index.ranges(self._directory, self._extensions)
+    slices = [paths[start:stop] for paths, start, stop in ranges]
+    candidates = slices[0] if len(slices) == 1 else heapq.merge(*slices)
+    return (path for path in candidates if self._matches(path)) if self._checks else iter(candidates)
+
+  def __iter__(self) -> Iterator[str]:
+    return self._paths()
+
+  def __len__(self) -> int:
+    if self._empty:
+      return 0
+    if not self._checks:
+      return sum(stop - start for _, start, stop in self._index.ranges(self._directory, self._extensions))
+    return sum(1 for _ in self._paths())
+
+  def __getitem__(self, path: str) -> str:
+    files = self._index.files
+    if self._empty or path not in files:
+      raise KeyError(path)
+    if self._directory and not path.startswith(self._directory + "/"):
+      raise KeyError(path)
+    if self._extensions is not None and extension(path) not in self._extensions:
+      raise KeyError(path)
+    if not self._matches(path):
+      raise KeyError(path)
+    return files[path]
+
+  # Iterating items or values checks every filter once per file, not again for the lookup
+  def items(self) -> ItemsView:
+    return _Items(self)
+
+  def values(self) -> ValuesView:
+    return _Values(self)
+
+  # The matching files as ScannedFile objects, in path order
+  def scanned_files(self) -> Iterator[ScannedFile]:
+    return (self._index.scanned_file(path) for path in self._paths())
+
+class _Items(ItemsView):
+  def __iter__(self):
+    files = self._mapping._index.files
+    return ((path, files[path]) for path in self._mapping._paths())
+
+class _Values(ValuesView):
+  def __iter__(self):
+    files = self._mapping._index.files
+    return (files[path] for path in self._mapping._paths())
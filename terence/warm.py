@@ -0,0 +1,147 @@
+import math
+import time
+import threading
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from terence.progress import CancelToken, ScanContext
+from terence.stats import ScanStats
+from terence.exceptions import ScanCancelledException
+
+# Background thread keeping the scan cache of a few repositories current
+class CacheWarmer:
+  """
+  Keeps configured repositories and refs warm in a Terence scan cache, so
+  foreground scans sharing the cache directory are served from disk.
+
+  Every `interval` seconds each target's head commit is checked with one
+  request; when it moved (or nothing is cached yet) the ref is scanned again,
+  which only downloads blobs the cache doesn't have and never reads back the
+  ones it has. The warmer never lets the rate limit fall below what is left for
+  everything else: it spends at most `budget` (a fraction of the hourly limit)
+  and stops a cycle early when that slice runs out. Blobs fetched before stopping stay cached, so the next cycle
+  picks up where this one ended.
+
+  targets are repository URLs (default branch) or (repository URL, ref) pairs.
+  The warmer drives its own Terence instance, which needs cache() set and
+  should not be used for other scans:
+
+    warmer = CacheWarmer(Terence().auth(token).cache(directory), ["owner/repo"], interval=300).start()
+  """
+
+  def __init__(self, terence, targets: List[Union[str, Tuple[str, Optional[str]]]], interval: float = 300.0,
+               budget: float = 0.1, backend=None, on_cycle: Optional[Callable] = None):
+    if terence._cache is None:
+      raise Exception("No scan cache set. Call Terence.cache(directory) first.")
+    if not 0 < budget <= 1:
+      raise ValueError("budget must be a fraction of the rate limit between 0 and 1.")
+    self.terence = terence
+    self.targets = [(target, None) if isinstance(target, str) else tuple(target) for target in targets]
+    self.interval = interval
+    self.budget = budget
+    self.backend = backend
+    self.on_cycle = on_cycle
+    self.status = {}  # (repo_url, ref) -> last status dict
+    self._stop = threading.Event()
+    self._thread = None
+    self._cancel = None
+    self._spent = 0
+    self._allowance = math.inf
+    terence.add_stats_hook(self._count)
+
+  def __enter__(self):
+    return self.start()
+
+  def __exit__(self, *exc):
+    self.stop()
+
+  def start(self):
+    self._stop.clear()
+    self._thread = threading.Thread(target=self._run, daemon=True)
+    self._thread.start()
+    return self
+
+  # Stop after the request in flight
+  def stop(self):
+    self._stop.set()
+    if self._cancel is not None:
+      self._cancel.cancel()
+    if self._thread is not None:
+      self._thread.join()
+      self._thread = None
+
+  def _run(self):
+    while not self._stop.is_set():
+      self.run_once()
+      self._stop.wait(self.interval)
+
+  # Check and refresh every target once
+  def run_once(self) -> Dict[Tuple[str, Optional[str]], Dict]:
+    """
+    Returns:
+      dict: { (repo_url, ref): {
+        'status': str,      # fresh, warmed, partial (budget ran out), deferred (no budget left) or error
+        'commit': str,      # Head commit when it was checked
+        'requests': int,    # Requests spent on this target
+        'error': str        # Only for status error
+      } }
+    """
+    self._spent, self._allowance = 0, self._remaining_budget()
+    cycle = {}
+    for repo_url, ref in self.targets:
+      if self._stop.is_set():
+        break
+      cycle[(repo_url, ref)] = self._warm(repo_url, ref)
+    self.status.update(cycle)
+    if self.on_cycle:
+      self.on_cycle(cycle)
+    return cycle
+
+  def _warm(self, repo_url, ref):
+    terence, spent_before = self.terence, self._spent
+    result = {'status': "deferred", 'commit': None, 'checked_at': time.time()}
+    if self._spent >= self._allowance:
+      result['requests'] = 0
+      return result
+
+    self._cancel = CancelToken()
+    try:
+      cached = terence._cache.load(repo_url, ref)
+      if cached is not None:
+        result['commit'] = terence.head_commit(repo_url, cached.ref, self.backend)
+        if result['commit'] == cached.commit:
+          result['status'] = "fresh"
+          return result
+      # The warmer only fills the cache, so nothing it fetches is kept in terence.content
+      # and blobs already on disk are never read back
+      context = ScanContext(ScanStats(hooks=terence._stats_hooks).start(), cancel=self._cancel)
+      context.intern = False
+      context.read_cached = False
+      scanned = terence._scan(context, repo_url, ref, backend=self.backend)
+      result['commit'] = scanned.commit
+      result['status'] = "warmed"
+    except ScanCancelledException:
+      result['status'] = "partial"
+    except Exception as e:
+      result.update(status="error", error=str(e))
+    finally:
+      self._cancel = None
+      result['requests'] = self._spent - spent_before
+    return result
+
+  # Requests this cycle may use without taking the rate limit below (1 - budget) of the limit
+  def _remaining_budget(self):
+    if not self.terence._backend_class(self.backend).requires_auth:
+      return math.inf  # Mirrors don't use the API rate limit
+    try:
+      rate = self.terence.get_rate_limit()
+    except Exception:
+      return 0
+    return max(0, rate['remaining'] - math.ceil((1 - self.budget) * rate['limit']))
+
+  # Stats hook counting the warmer's requests and cancelling the scan once the budget is spent
+  def _count(self, event, payload):
+    if event != 'request' or payload['endpoint'] == "rate_limit":
+      return
+    self._spent += 1
+    if self._spent >= self._allowance and self._cancel is not None:
+      self._cancel.cancel()
@@ -0,0 +1,111 @@
+import hmac
+import json
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+# Check a X-Hub-Signature-256 header against the payload and the webhook secret
+def verify_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+  if not signature or not signature.startswith("sha256="):
+    return False
+  expected = hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+  return hmac.compare_digest(expected, signature[len("sha256="):])
+
+# HTTP server receiving GitHub push webhooks and applying them to a Terence scan cache
+class WebhookListener:
+  """
+  Listens for GitHub webhook deliveries and keeps the scan cache of a Terence
+  instance up to date with Terence.apply_push, so cached scans stay fresh
+  without polling. Every delivery must be signed with secret.
+
+  Deliveries are applied one at a time on the listener's own instance, which
+  should not be used for scans at the same time. on_update is called with the
+  summary returned by apply_push after every push
+
+    listener = WebhookListener(Terence().auth(token).cache("~/.terence"), secret, port=8080).start()
+  """
+
+  def __init__(self, terence, secret: str, host: str = "127.0.0.1", port: int = 0, backend=None,
+               on_update: Optional[Callable] = None):
+    if not secret:
+      raise ValueError("A webhook secret is required to verify deliveries.")
+    self.terence = terence
+    self.secret = secret
+    self.host = host
+    self.port = port
+    self.backend = backend
+    self.on_update = on_update
+    self._lock = threading.Lock()
+    self._server = None
+    self._thread = None
+
+  def __enter__(self):
+    return self.start()
+
+  def __exit__(self, *exc):
+    self.stop()
+
+  @property
+  def url(self) -> str:
+    host, port = self._server.server_address[:2]
+    return f"http://{host}:{port}"
+
+  # Serve in a background thread
+  def start(self):
+    listener = self
+
+    class Handler(_Handler):
+      webhook = listener
+
+    self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+    self._server.daemon_threads = True
+    self._thread = threading.Thread(target=self._server.serve_forever, kwargs={'poll_interval': 0.1}, daemon=True)
+    self._thread.start()
+    return self
+
+  def stop(self):
+    if self._server:
+      self._server.shutdown()
+      self._server.server_close()
+      self._server = None
+
+  # Handle one delivery, returning (HTTP status, response body)
+  def handle(self, event: str, body: bytes, signature: Optional[str]):
+    if not verify_signature(self.secret, body, signature):
+      return 401, {'message': "Invalid signature"}
+    if event == "ping":
+      return 200, {'message': "pong"}
+    if event != "push":
+      return 202, {'message': f"Ignored {event} event"}
+    try:
+      payload = json.loads(body)
+    except ValueError:
+      return 400, {'message': "Invalid JSON payload"}
+
+    with self._lock:
+      try:
+        summary = self.terence.apply_push(payload, backend=self.backend)
+      except Exception as e:
+        return 500, {'message': str(e)}
+    if self.on_update:
+      self.on_update(summary)
+    return 200, summary
+
+class _Handler(BaseHTTPRequestHandler):
+  webhook = None  # WebhookListener, set by WebhookListener.start
+  protocol_version = "HTTP/1.1"
+
+  def log_message(self, format, *args):
+    pass
+
+  def do_POST(self):
+    body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+    status, response = self.webhook.handle(self.headers.get('X-GitHub-Event', ""), body,
+                                           self.headers.get('X-Hub-Signature-256'))
+    payload = json.dumps(response).encode('utf-8')
+    self.send_response(status)
+    self.send_header("Content-Type", "application/json")
+    self.send_header("Content-Length", str(len(payload)))
+    self.end_headers()
+    self.wfile.write(payload)
@@ -0,0 +1,40 @@
+"""Shared pytest fixtures: a fake GitHub server and Terence instances pointed at it"""
+import pytest
+from terence import Terence
+from benchmarks.fake_github import FakeGitHub
+
+
+@pytest.fixture
+def fake_options():
+    """Keyword arguments for the server's FakeGitHub, override in a module to change them"""
+    return {}
+
+
+@pytest.fixture
+def server(fake_options):
+    """
+    Running fake GitHub server without repositories. Modules add theirs by
+    overriding this fixture:
+
+        @pytest.fixture
+        def server(server):
+            server.add_repo("owner", "repo", FILES)
+            return server
+    """
+    with FakeGitHub(**fake_options) as fake:
+        yield fake
+
+
+@pytest.fixture
+def make_terence(server):
+    """Factory for Terence instances pointed at the server without request throttling, caching scans in cache_dir when given"""
+    def make(cache_dir=None):
+        terence = Terence(base_url=server.url, seconds_between_requests=None).auth("fake-token")
+        return terence if cache_dir is None else terence.cache(str(cache_dir))
+    return make
+
+
+@pytest.fixture
+def terence(make_terence):
+    """Terence pointed at the fake server without request throttling"""
+    return make_terence()
@@ -0,0 +1,241 @@
+"""Pytest tests for pluggable source backends"""
+import sys
+import time
+import pytest
+from terence import Terence, ScanStats, RateLimitException
+from terence.backends import BACKENDS, SourceBackend, TreeEntry, RestBackend, register_backend
+
+FILES = {
+    "main.py": b"print('main')\n",
+    "src/app.js": b"console.log(1)\n",
+    "src/lib/util.go": b"package lib\n",
+    "docs/logo.png": b"\x89PNG",
+}
+
+
+class DictBackend(SourceBackend):
+    """Serves files from a plain dictionary, keyed by ref"""
+
+    name = "dict"
+    requires_auth = False
+    trees = {None: {"a.py": b"a = 1\n", "b.ts": b"let b = 2\n", "notes.txt": b"skip"}}
+
+    def resolve_ref(self, ref=None):
+        return ref or "HEAD"
+
+    def list_tree(self, ref=None):
+        return [TreeEntry(path, path, len(data)) for path, data in self.trees[ref].items()]
+
+    def fetch_blob(self, entry):
+        if entry.path == "b.ts" and self.terence.token == "fail":
+            raise RuntimeError("unavailable")
+        return self.trees[None][entry.path]
+
+
+@pytest.fixture
+def server(server):
+    server.add_repo("owner", "repo", FILES)
+    return server
+
+
+class TestBackendSelection:
+    """Test choosing a backend per scan"""
+
+    def test_builtin_backends_registered(self):
+        assert {"rest", "mirror"} <= set(BACKENDS)
+
+    def test_unknown_backend_raises(self):
+        with pytest.raises(ValueError, match="Unknown backend"):
+            Terence().scan_repository("https://github.com/owner/repo", backend="nope")
+
+    def test_custom_backend_class(self):
+        terence = Terence()
+        terence.scan_repository("https://github.com/owner/repo", backend=DictBackend)
+        assert terence.results == {"a.py": "a = 1\n", "b.ts": "let b = 2\n"}
+        assert terence.stats.files_skipped == {"filtered": 1}
+
+    def test_register_backend_by_name(self):
+        register_backend("dict", DictBackend)
+        try:
+            terence = Terence()
+            terence.scan_repository("https://github.com/owner/repo", extensions=["py"], backend="dict")
+            assert terence.results == {"a.py": "a = 1\n"}
+        finally:
+            del BACKENDS["dict"]
+
+    def test_failed_blob_recorded(self):
+        terence = Terence()
+        terence.token = "fail"
+        terence.scan_repository("https://github.com/owner/repo", backend=DictBackend)
+        assert terence.results == {"a.py": "a = 1\n"}
+        assert terence.stats.files_failed == {"b.ts": "unavailable"}
+
+    def test_rest_backend_requires_auth(self):
+        with pytest.raises(Exception, match="Not authenticated"):
+            Terence().scan_repository("https://github.com/owner/repo", backend="rest")
+
+
+class TestRestBackend:
+    """Test the REST backend against the fake server"""
+
+    def test_single_tree_request(self, server, terence):
+        terence.scan_repository("https://github.com/owner/repo")
+        assert terence.results == {path: data.decode() for path, data in FILES.items() if not path.endswith(".png")}
+        assert server.requests["trees"] == 1
+        assert server.requests["blobs"] == 3
+        assert "contents" not in server.requests
+
+    @pytest.mark.parametrize("fake_options", [{"truncate_trees_over": 1}])
+    def test_truncated_tree_falls_back_to_contents(self, server, terence):
+        terence.scan_repository("https://github.com/owner/repo")
+        assert set(terence.results) == {"main.py", "src/app.js", "src/lib/util.go"}
+        # One listing per directory: root, docs, src, src/lib
+        assert server.requests["contents"] == 4
+
+    def test_contents_walk_deep_tree(self, server, terence):
+        deep = "/".join(["d"] * 300) + "/deep.py"
+        server.add_repo("owner", "deep", {deep: b"deep = 1\n", "top.py": b"top = 1\n"})
+        with RestBackend(terence, "https://github.com/owner/deep") as backend:
+            limit = sys.getrecursionlimit()
+            # Deeper than the stack allows, which a recursive walk couldn't list
+            sys.setrecursionlimit(250)
+            try:
+                files = backend._get_files_recursive(backend.repo, "", None, backend.github)
+            finally:
+                sys.setrecursionlimit(limit)
+        assert set(files) == {deep, "top.py"}
+        assert backend.context.stats.requests["contents"] == 301
+
+    @pytest.mark.parametrize("fake_options", [{"truncate_trees_over": 1, "latency": 0.05}])
+    def test_contents_walk_lists_siblings_in_parallel(self, server, terence):
+        files = {f"dir{i}/sub{j}/f.py": b"x = 1\n" for i in range(4) for j in range(4)}
+        server.add_repo("owner", "repo", files)
+        terence.scan_repository("https://github.com/owner/repo", include=["dir0/sub0"])
+        with RestBackend(terence, "https://github.com/owner/repo") as backend:
+            start = time.perf_counter()
+            entries = backend.list_tree()
+            elapsed = time.perf_counter() - start
+        assert [entry.path for entry in entries] == sorted(files)
+        # 21 directories in 3 levels: serial listing takes over a second
+        assert elapsed < 21 * 0.05 * 0.6
+
+    @pytest.mark.parametrize("fake_options", [{"truncate_trees_over": 1, "rate_limit": 14}])
+    def test_contents_walk_stops_at_rate_limit(self, server, terence):
+        server.add_repo("owner", "repo", {f"dir{i}/f.py": b"x = 1\n" for i in range(20)})
+        with pytest.raises(RateLimitException, match="during scan"):
+            terence.scan_repository("https://github.com/owner/repo")
+
+    def test_raw_blob_format(self, server, terence):
+        terence.blob_format("raw")
+        terence.scan_repository("https://github.com/owner/repo")
+        assert terence.results == {path: data.decode() for path, data in FILES.items() if not path.endswith(".png")}
+        assert server.requests["blobs"] == 3
+        assert terence.stats.bytes_transferred == sum(len(data) for path, data in FILES.items() if not path.endswith(".png"))
+        with pytest.raises(ValueError, match="Unknown blob format"):
+            terence.blob_format("xml")
+
+    def test_branch_is_used_for_listing(self, server, terence):
+        server.add_repo("owner", "repo", {"feature.py": b"f = 1\n"}, ref="feature", default=False)
+        terence.branch("feature")
+        terence.scan_repository("https://github.com/owner/repo")
+        assert terence.results == {"feature.py": "f = 1\n"}
+
+    def test_resolve_ref(self, server, terence):
+        terence.stats = ScanStats()
+        with RestBackend(terence, "https://github.com/owner/repo") as backend:
+            commit = backend.resolve_ref()
+        assert commit == server.repos[("owner", "repo")]['refs']['main'].commit_sha
+
+
+class TestSparseScan:
+    """Test subtree URLs and include globs"""
+
+    MONOREPO = {
+        "services/billing/src/api.py": b"billing = 1\n",
+        "services/billing/tests/test_api.py": b"test = 1\n",
+        "services/search/src/index.go": b"package search\n",
+        "services/search/docs/guide.py": b"guide = 1\n",
+        "lib/core.py": b"core = 1\n",
+        "web/app.ts": b"let app = 1\n",
+    }
+
+    @pytest.fixture
+    def mono(self, server):
+        server.add_repo("org", "mono", self.MONOREPO)
+        server.add_repo("org", "mono", {"services/billing/src/api.py": b"old = 1\n"}, ref="v1", default=False)
+        return server
+
+    def test_tree_url_scans_subtree(self, mono, terence):
+        terence.scan_repository("https://github.com/org/mono/tree/main/services/billing")
+        assert terence.results == {"services/billing/src/api.py": "billing = 1\n"}
+        # Two segment lookups plus one recursive listing of the subtree
+        assert mono.requests["trees"] == 3
+        assert mono.requests["blobs"] == 1
+
+    def test_tree_url_ref_used(self, mono, terence):
+        terence.scan_repository("https://github.com/org/mono/tree/v1/services")
+        assert terence.results == {"services/billing/src/api.py": "old = 1\n"}
+
+    def test_blob_url_scans_one_file(self, mono, terence):
+        terence.scan_repository("https://github.com/org/mono/blob/main/lib/core.py")
+        assert terence.results == {"lib/core.py": "core = 1\n"}
+
+    def test_include_globs(self, mono, terence):
+        terence.scan_repository("https://github.com/org/mono", include=["services/*/src/**", "web/*.ts"])
+        assert set(terence.results) == {"services/billing/src/api.py", "services/search/src/index.go", "web/app.ts"}
+        assert mono.requests["blobs"] == 3
+
+    def test_include_glob_without_matches(self, mono, terence):
+        terence.scan_repository("https://github.com/org/mono", include=["lib/**", "docs/**"])
+        assert terence.results == {"lib/core.py": "core = 1\n"}
+
+    def test_missing_subtree_raises(self, mono, terence):
+        with pytest.raises(Exception, match="not found"):
+            terence.scan_repository("https://github.com/org/mono/tree/main/nope")
+
+
+class TestLargeFiles:
+    """Test streaming files over 1 MB and the max_file_size ceiling"""
+
+    BIG = b"".join(b"line_%07d = %d\n" % (i, i) for i in range(150000))  # About 3 MB
+
+    @pytest.fixture
+    def big(self, server):
+        server.add_repo("owner", "big", {"big.py": self.BIG, "small.py": b"s = 1\n"})
+        return server
+
+    def test_large_file_streamed_raw(self, big, terence):
+        terence.scan_repository("https://github.com/owner/big")
+        assert terence.results["big.py"] == self.BIG.decode()
+        assert big.requests["blobs"] == 2
+        # Raw bodies, not base64 JSON a third larger
+        assert big.bytes_sent < len(self.BIG) * 1.05
+
+    def test_contents_fallback_streams(self, big, terence):
+        with terence._open_source("https://github.com/owner/big") as source:
+            entry, data = source.fetch_file(None, "big.py")
+        assert entry.size == len(self.BIG)
+        assert bytes(data) == self.BIG
+        assert big.requests["contents"] == 1 and big.requests["blobs"] == 1
+
+    def test_max_file_size_skips_without_request(self, big, terence):
+        terence.max_file_size(1024 * 1024)
+        terence.scan_repository("https://github.com/owner/big")
+        assert terence.results == {"small.py": "s = 1\n"}
+        assert terence.stats.files_skipped == {"too_large": 1}
+        assert big.requests["blobs"] == 1
+
+    def test_stream_stops_at_limit(self, big, terence):
+        sha = big.repos[("owner", "big")]['refs']['main'].paths["big.py"]
+        with pytest.raises(Exception, match="byte limit"):
+            terence._raw_client().download(f"/repos/owner/big/git/blobs/{sha}", limit=1000)
+        terence.close()
+
+    def test_invalid_max_file_size(self):
+        with pytest.raises(ValueError, match="at least 0"):
+            Terence().max_file_size(-1)
+
+    def test_shared_rate_limit_synced(self, big, tmp_path, terence):
+        terence.share_rate_limit(str(tmp_path / "rate.db"))
+        terence.scan_repository("https://github.com/owner/big")
+        assert terence._ledger.status(terence._budget_key)['remaining'] == big.remaining
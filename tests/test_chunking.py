@@ -0,0 +1,76 @@
+"""Pytest tests for the chunking pipeline"""
+import pytest
+from terence.content import ScannedFile
+from terence.chunking import chunk_text, chunk_files
+from benchmarks.fake_github import synthetic_files
+
+SOURCE = "".join(f"def function_{i}():\n    return {i}\n\n" for i in range(40))
+URL = "https://github.com/owner/repo"
+
+
+def covers(text, chunks):
+    """Chunks are in order, overlap or touch, and cover the whole text"""
+    position = 0
+    for chunk in chunks:
+        assert chunk.start <= position < chunk.end
+        assert text[chunk.start:chunk.end] == chunk.text
+        position = chunk.end
+    return position == len(text)
+
+
+class TestChunkText:
+    """Test chunk_text boundaries, sizes and IDs"""
+
+    def test_size_and_coverage(self):
+        chunks = chunk_text("a.py", "sha", SOURCE, size=120, overlap=30)
+        assert all(len(chunk.text) <= 120 for chunk in chunks)
+        assert covers(SOURCE, chunks)
+
+    def test_breaks_before_definitions(self):
+        chunks = chunk_text("a.py", "sha", SOURCE, size=120, overlap=0)
+        assert all(chunk.text.startswith("def ") for chunk in chunks)
+
+    def test_overlap_is_whole_lines(self):
+        chunks = chunk_text("a.py", "sha", SOURCE, size=120, overlap=30)
+        for previous, chunk in zip(chunks, chunks[1:]):
+            assert 0 < previous.end - chunk.start <= 30
+            assert SOURCE[chunk.start - 1] == "\n"
+
+    def test_long_lines_split(self):
+        text = "x" * 250 + "\nshort\n"
+        chunks = chunk_text("a.py", "sha", text, size=100, overlap=10)
+        assert [len(chunk.text) for chunk in chunks] == [100, 100, 57]
+        assert covers(text, chunks)
+
+    def test_line_numbers_and_ids(self):
+        chunk = chunk_text("a.py", "abc", "a\nb\nc\n", size=100, overlap=0)[0]
+        assert (chunk.start_line, chunk.end_line) == (1, 3)
+        assert chunk.id == "abc:0-6"
+
+    def test_empty_and_invalid(self):
+        assert chunk_text("a.py", "sha", "") == []
+        with pytest.raises(ValueError):
+            chunk_text("a.py", "sha", "x", size=10, overlap=10)
+
+
+class TestChunkFiles:
+    """Test chunk_files over streams of files"""
+
+    FILES = [ScannedFile(f"f{i}.py", f"sha{i}", len(SOURCE), SOURCE) for i in range(6)]
+
+    def test_process_pool_matches_inline(self):
+        inline = set(chunk_files(self.FILES, size=200, overlap=40, workers=0, batch_chars=1000))
+        pooled = set(chunk_files(self.FILES, size=200, overlap=40, workers=2, batch_chars=1000))
+        assert inline == pooled
+        assert {chunk.path for chunk in pooled} == {file.path for file in self.FILES}
+
+    def test_known_blobs_skipped(self):
+        chunks = list(chunk_files(self.FILES, workers=0, known={"sha0", "sha1"}))
+        assert {chunk.sha for chunk in chunks} == {"sha2", "sha3", "sha4", "sha5"}
+
+    def test_stable_ids_across_scans(self, server, terence):
+        server.add_repo("owner", "repo", synthetic_files(depth=1, fanout=2, files_per_dir=3, binary_ratio=0))
+        first = {chunk.id for chunk in chunk_files(terence.iter_files(URL), size=300, workers=0)}
+        terence.scan_repository(URL)
+        second = {chunk.id for chunk in chunk_files(terence.scanned_files(), size=300, workers=0)}
+        assert first and first == second
@@ -0,0 +1,111 @@
+"""Pytest tests for content interning by blob SHA"""
+import pytest
+from terence.content import ContentStore
+from benchmarks.fake_github import git_blob_sha
+
+SHARED = b"// Licensed under MIT\n"
+FILES = {
+    "license.js": SHARED,
+    "a/license.js": SHARED,
+    "b/license.js": SHARED,
+    "main.py": b"print('hi')\n",
+    "logo.c": b"\x89PNG\r\n\x1a\n\xff\xfe",
+}
+OTHER = {
+    "copying.js": SHARED,
+    "other.py": b"x = 1\n",
+}
+
+
+@pytest.fixture
+def server(server):
+    server.add_repo("owner", "repo", FILES)
+    server.add_repo("owner", "other", OTHER)
+    return server
+
+
+URL = "https://github.com/owner/repo"
+OTHER_URL = "https://github.com/owner/other"
+
+
+class TestContentStore:
+    """Test ContentStore on its own"""
+
+    def test_add_returns_interned_copy(self):
+        store = ContentStore()
+        first = store.add("abc", "".join(["te", "xt"]))
+        second = store.add("abc", "".join(["t", "ext"]))
+        assert first is second
+        assert len(store) == 1
+
+    def test_binary_remembered(self):
+        store = ContentStore()
+        store.add_binary("abc")
+        assert "abc" in store
+        assert store.is_binary("abc")
+        assert store.get("abc") is None
+
+    def test_duplicates_and_memory_saved(self):
+        store = ContentStore()
+        store.add("abc", "12345")
+        store.record_location("abc", "repo", "a")
+        store.record_location("abc", "repo", "b")
+        store.record_location("def", "repo", "c")
+        assert store.duplicates() == {"abc": [("repo", "a"), ("repo", "b")]}
+        assert store.memory_saved() == 5
+
+    def test_clear(self):
+        store = ContentStore()
+        store.add("abc", "text")
+        store.clear()
+        assert "abc" not in store
+        assert store.locations("abc") == set()
+
+
+class TestInterning:
+    """Test that scans fetch and hold each distinct content once"""
+
+    def test_duplicates_fetched_once(self, server, terence):
+        terence.scan_repository(URL)
+        # SHARED, main.py and logo.c
+        assert server.requests["blobs"] == 3
+        assert terence.stats.cache_hits == 2
+        assert terence.results["license.js"] is terence.results["a/license.js"]
+        assert set(terence.results) == {"license.js", "a/license.js", "b/license.js", "main.py"}
+
+    def test_rescan_served_from_store(self, server, terence):
+        terence.scan_repository(URL)
+        server.reset_counters()
+        terence.scan_repository(URL)
+        assert server.requests["blobs"] == 0
+        assert terence.stats.files_skipped == {"binary": 1}
+        assert len(terence.results) == 4
+
+    def test_shared_across_repositories(self, server, terence):
+        terence.scan_repository(URL)
+        first = terence.results["license.js"]
+        server.reset_counters()
+        terence.scan_repository(OTHER_URL)
+        assert server.requests["blobs"] == 1
+        assert terence.results["copying.js"] is first
+        assert (OTHER_URL, "copying.js") in terence.content.locations(git_blob_sha(SHARED))
+
+    def test_duplicate_paths(self, terence):
+        terence.scan_repository(URL)
+        assert terence.duplicate_paths() == {
+            git_blob_sha(SHARED): ["a/license.js", "b/license.js", "license.js"]
+        }
+
+    def test_paths_sharing(self, terence):
+        terence.scan_repository(URL)
+        assert terence.paths_sharing("a/license.js") == ["b/license.js", "license.js"]
+        assert terence.paths_sharing("main.py") == []
+        with pytest.raises(KeyError):
+            terence.paths_sharing("missing.py")
+
+    def test_clear_all_empties_store(self, terence):
+        terence.scan_repository(URL)
+        terence.clear_results()
+        assert len(terence.content) == 2
+        terence.clear_all()
+        assert len(terence.content) == 0
@@ -0,0 +1,88 @@
+"""Pytest tests for streaming scans and exporters"""
+import io
+import gzip
+import json
+import pytest
+from terence import Terence
+from terence.content import ScannedFile
+from terence.export import export_jsonl, export_parquet, file_row
+from benchmarks.fake_github import synthetic_files
+
+FILES = synthetic_files(depth=1, fanout=2, files_per_dir=5, binary_ratio=0.2)
+URL = "https://github.com/owner/repo"
+
+
+@pytest.fixture
+def server(server):
+    server.add_repo("owner", "repo", FILES)
+    return server
+
+
+def expected_paths(terence):
+    terence.scan_repository(URL)
+    paths = set(terence.results)
+    terence.clear_all()
+    terence.auth("fake-token")
+    return paths
+
+
+class TestIterFiles:
+    """Test Terence.iter_files"""
+
+    def test_streams_without_keeping_results(self, terence):
+        paths = expected_paths(terence)
+        files = list(terence.iter_files(URL))
+        assert {file.path for file in files} == paths
+        assert terence.results == {}
+        assert len(terence.content) == 0
+        assert terence.last_repo_url == URL
+
+    def test_early_stop(self, server, terence):
+        stream = terence.iter_files(URL)
+        next(stream)
+        stream.close()
+        assert server.requests["blobs"] == 1
+
+
+class TestExporters:
+    """Test the JSON Lines and Parquet exporters"""
+
+    def test_file_row(self):
+        row = file_row(ScannedFile("src/app.PY", "abc", 9, "x = 1\ny\n"))
+        assert row == {
+            'path': "src/app.PY", 'dir': "src", 'ext': ".py", 'language': "Python",
+            'size': 9, 'sha': "abc", 'lines': 2, 'content': "x = 1\ny\n",
+        }
+
+    def test_jsonl_file_object(self):
+        output = io.StringIO()
+        rows = export_jsonl([ScannedFile("a.py", "s", 2, "a\n"), ScannedFile("b.go", "t", 1, "b")], output)
+        assert rows == 2
+        lines = output.getvalue().splitlines()
+        assert [json.loads(line)['path'] for line in lines] == ["a.py", "b.go"]
+
+    def test_jsonl_gzip_from_scan(self, terence, tmp_path):
+        paths = expected_paths(terence)
+        destination = tmp_path / "scan.jsonl.gz"
+        rows = export_jsonl(terence.iter_files(URL), str(destination))
+        assert rows == len(paths)
+        with gzip.open(destination, "rt", encoding="utf-8") as exported:
+            records = [json.loads(line) for line in exported]
+        assert {record['path'] for record in records} == paths
+        assert all(record['content'] for record in records)
+
+    def test_unknown_compression(self, tmp_path):
+        with pytest.raises(ValueError):
+            export_jsonl([], str(tmp_path / "out.jsonl"), compression="zip")
+
+    def test_parquet_row_groups(self, terence, tmp_path):
+        parquet = pytest.importorskip("pyarrow.parquet")
+        paths = expected_paths(terence)
+        destination = tmp_path / "scan.parquet"
+        rows = export_parquet(terence.iter_files(URL), str(destination), row_group_size=4, compression="zstd")
+        assert rows == len(paths)
+        metadata = parquet.ParquetFile(str(destination)).metadata
+        assert metadata.num_rows == len(paths)
+        assert metadata.num_row_groups == -(-len(paths) // 4)
+        table = parquet.read_table(str(destination))
+        assert set(table.column("path").to_pylist()) == paths
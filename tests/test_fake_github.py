@@ -0,0 +1,83 @@
+"""Offline tests running Terence against the local fake GitHub server"""
+import shutil
+import pytest
+from terence import Terence
+from benchmarks.fake_github import synthetic_files, git_blob_sha
+from benchmarks.bench_scan import main, run_benchmark
+
+
+@pytest.fixture
+def server(server):
+    """Fake GitHub server with one small synthetic repository"""
+    server.add_repo("owner", "repo", synthetic_files(depth=1, fanout=2, files_per_dir=4, file_size=64, binary_ratio=0.25))
+    return server
+
+
+class TestSyntheticFiles:
+    """Test synthetic repository generation"""
+
+    def test_shape(self):
+        files = synthetic_files(depth=2, fanout=2, files_per_dir=3)
+        # 1 root + 2 + 4 directories, 3 files each
+        assert len(files) == 21
+
+    def test_deterministic(self):
+        assert synthetic_files(seed=1) == synthetic_files(seed=1)
+
+    def test_git_blob_sha(self):
+        # Matches `git hash-object` for "hello\n"
+        assert git_blob_sha(b"hello\n") == "ce013625030ba8dba906f756967f9e9ca394464a"
+
+
+class TestScanAgainstFakeServer:
+    """Test scanning through the REST contents API offline"""
+
+    def test_scan_returns_text_files(self, server, terence):
+        terence.scan_repository("https://github.com/owner/repo")
+        files = server.repos[("owner", "repo")]['refs']['main'].files
+        expected = {path: data.decode('utf-8') for path, data in files.items() if not path.endswith(('.png', '.jpg', '.pdf', '.zip'))}
+        assert terence.results == expected
+
+    def test_stats_match_server_requests(self, server, terence):
+        terence.scan_repository("https://github.com/owner/repo")
+        assert terence.stats.total_requests == sum(server.requests.values())
+
+    def test_missing_repo_raises(self, terence):
+        with pytest.raises(Exception, match="not found"):
+            terence.scan_repository("https://github.com/owner/missing")
+
+    @pytest.mark.parametrize("fake_options", [{"rate_limit": 5}])
+    def test_rate_limit_exhausted(self, terence):
+        with pytest.raises(Exception, match="Rate limit too low"):
+            terence.scan_repository("https://github.com/owner/repo")
+
+
+class TestBenchmarkHarness:
+    """Test the benchmark harness reports every metric"""
+
+    def test_run_benchmark(self):
+        report = run_benchmark({'depth': 0, 'files_per_dir': 3, 'binary_ratio': 0})
+        row = report['rest']
+        assert row['files'] == 3
+        assert row['requests'] > 0
+        assert row['wall_time'] > 0
+        assert row['cpu_time'] > 0
+        assert row['peak_memory'] > 0
+        # Same files without the base64 overhead
+        assert report['rest-raw']['files'] == 3
+        assert report['rest-raw']['bytes_sent'] < row['bytes_sent']
+
+    @pytest.mark.skipif(shutil.which("git") is None, reason="git executable not available")
+    def test_mirror_strategy(self):
+        report = run_benchmark({'depth': 0, 'files_per_dir': 3, 'binary_ratio': 0})
+        # Same files read from a local mirror, without a request
+        assert report['mirror']['files'] == 3
+        assert report['mirror']['requests'] == 0
+
+    def test_thresholds_fail_the_run(self):
+        shape = ["--depth", "0", "--files-per-dir", "3", "--binary-ratio", "0", "--strategy", "rest"]
+        # One rate limit check, one repository lookup, one tree and three blobs
+        assert main(shape + ["--max-requests", "6"])['rest']['requests'] == 6
+        with pytest.raises(SystemExit) as info:
+            main(shape + ["--max-requests", "5"])
+        assert info.value.code == 1
@@ -0,0 +1,41 @@
+"""Pytest tests keeping PyGithub and other heavy dependencies out of startup"""
+from terence import Terence
+from terence.cache import ScanCache, CachedScan
+from benchmarks.bench_import import run_benchmark, time_statement
+
+
+class TestLazyImports:
+    """Test that heavy dependencies load on first network use only"""
+
+    def test_no_unexpected_heavy_imports(self):
+        report = run_benchmark(runs=1)
+        assert all(not result['unexpected'] for result in report.values()), report
+
+    def test_network_use_imports_pygithub(self):
+        assert "github" in time_statement('from terence import Terence; Terence()._github()')['heavy']
+
+    def test_load_cached_without_pygithub(self, tmp_path):
+        url = "https://github.com/owner/repo"
+        cache = ScanCache(str(tmp_path))
+        cache.write_blob("abc", b"print('hi')\n")
+        cache.save(CachedScan(url, "main", "c0ffee", {"main.py": "abc"}, None, "", None), default=True)
+        statement = (
+            "from terence import Terence\n"
+            f"terence = Terence().cache({str(tmp_path)!r})\n"
+            f"terence.load_cached({url!r})\n"
+            "assert terence.results == {'main.py': \"print('hi')\\n\"}\n"
+        )
+        assert time_statement(statement)['heavy'] == []
+
+    def test_lazy_exports(self):
+        import terence
+        assert terence.Terence is Terence
+        assert "Terence" in dir(terence)
+        assert terence.PullRequestScan.__module__ == "terence.pulls"
+
+    def test_github_errors_translated(self):
+        from github import BadCredentialsException, GithubException
+        from terence.client import _github_error_message
+        assert "Invalid GitHub token" in _github_error_message(BadCredentialsException(401, {}), "owner/repo")
+        assert _github_error_message(GithubException(500, {'message': "Boom"}), "owner/repo") == "GitHub API error: Boom"
+        assert _github_error_message(ValueError("other"), "owner/repo") is None
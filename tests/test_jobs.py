@@ -0,0 +1,136 @@
+"""Pytest tests for the scan job queue and workers"""
+import time
+import multiprocessing
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from terence import Terence
+from terence.jobs import Job, SQLiteJobQueue, ScanWorker
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return SQLiteJobQueue(str(tmp_path / "jobs.db"), max_attempts=2, retry_delay=0)
+
+
+@pytest.fixture
+def server(server):
+    for i in range(6):
+        server.add_repo("owner", f"repo{i}", {f"file{i}.py": f"n = {i}\n".encode(), "logo.png": b"\x89PNG\xff"})
+    return server
+
+
+def make_worker(make_terence, queue, cache_dir, **options):
+    return ScanWorker(make_terence(cache_dir), queue, **options)
+
+
+def run_worker_process(url, queue_path, cache_dir):
+    terence = Terence(base_url=url, seconds_between_requests=None).auth("fake-token").cache(cache_dir)
+    ScanWorker(terence, SQLiteJobQueue(queue_path)).run(idle_exit=True)
+
+
+class TestSQLiteJobQueue:
+    """Test claiming, leases and retries"""
+
+    def test_submit_claim_complete(self, queue):
+        job_id = queue.submit("owner/repo", "main", ["py"], ["src/**"])
+        job = queue.claim("worker-1", lease=60)
+        assert job == Job(job_id, "owner/repo", "main", ["py"], ["src/**"], 1)
+        assert queue.claim("worker-2", lease=60) is None
+        assert queue.complete(job_id, "worker-1", {'files': 3})
+        assert queue.get(job_id)['result'] == {'files': 3}
+        assert queue.counts() == {'queued': 0, 'leased': 0, 'done': 1, 'failed': 0}
+
+    def test_expired_lease_reclaimed(self, queue):
+        job_id = queue.submit("owner/repo")
+        queue.claim("stalled", lease=0.01)
+        time.sleep(0.05)
+        job = queue.claim("worker-2", lease=60)
+        assert (job.id, job.attempts) == (job_id, 2)
+        assert not queue.extend(job_id, "stalled", 60)
+        assert not queue.complete(job_id, "stalled", {})
+        assert queue.complete(job_id, "worker-2", {})
+
+    def test_retries_then_fails(self, queue):
+        job_id = queue.submit("owner/repo")
+        queue.claim("worker", lease=60)
+        queue.fail(job_id, "worker", "boom")
+        assert queue.get(job_id)['status'] == "queued"
+        queue.claim("worker", lease=60)
+        queue.fail(job_id, "worker", "boom again")
+        job = queue.get(job_id)
+        assert (job['status'], job['attempts'], job['error']) == ("failed", 2, "boom again")
+
+    def test_release_keeps_attempts(self, queue):
+        job_id = queue.submit("owner/repo")
+        queue.claim("worker", lease=60)
+        assert queue.release(job_id, "worker", delay=60)
+        assert queue.get(job_id)['attempts'] == 0
+        assert queue.claim("worker", lease=60) is None
+
+    def test_concurrent_claims_unique(self, queue):
+        ids = {queue.submit(f"owner/repo{i}") for i in range(40)}
+        def drain(worker):
+            claimed = []
+            job = queue.claim(worker, lease=60)
+            while job is not None:
+                claimed.append(job.id)
+                job = queue.claim(worker, lease=60)
+            return claimed
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            claimed = [job_id for jobs in pool.map(drain, [f"w{i}" for i in range(6)]) for job_id in jobs]
+        assert sorted(claimed) == sorted(ids)
+
+
+class TestScanWorker:
+    """Test workers scanning queued repositories into a shared cache"""
+
+    def test_requires_cache(self, terence, queue):
+        with pytest.raises(Exception, match="No scan cache set"):
+            ScanWorker(terence, queue)
+
+    def test_workers_hand_off_through_cache(self, make_terence, queue, tmp_path):
+        cache_dir = str(tmp_path / "cache")
+        ids = [queue.submit(f"https://github.com/owner/repo{i}", extensions=["py"]) for i in range(6)]
+        workers = [make_worker(make_terence, queue, cache_dir) for _ in range(2)]
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            processed = list(pool.map(lambda worker: worker.run(idle_exit=True), workers))
+        assert sum(processed) == 6
+        assert queue.counts()['done'] == 6
+
+        reader = Terence().cache(cache_dir)
+        for i, job_id in enumerate(ids):
+            cached = reader.load_cached(f"https://github.com/owner/repo{i}", extensions=["py"])
+            assert cached.commit == queue.get(job_id)['result']['commit']
+            assert reader.results == {f"file{i}.py": f"n = {i}\n"}
+        # Everything went to the cache, none of it stays in the workers' memory
+        assert all(len(worker.terence.content) == 0 for worker in workers)
+
+    def test_failed_scan_retried(self, make_terence, queue, tmp_path):
+        job_id = queue.submit("https://github.com/owner/missing")
+        outcomes = []
+        worker = make_worker(make_terence, queue, str(tmp_path), on_job=outcomes.append)
+        worker.run(idle_exit=True)
+        assert [outcome['status'] for outcome in outcomes] == ["retry", "failed"]
+        assert "not found" in queue.get(job_id)['error']
+
+    def test_background_thread(self, make_terence, queue, tmp_path):
+        job_id = queue.submit("https://github.com/owner/repo0")
+        with make_worker(make_terence, queue, str(tmp_path), poll_interval=0.01):
+            deadline = time.time() + 5
+            while queue.get(job_id)['status'] != "done" and time.time() < deadline:
+                time.sleep(0.01)
+        assert queue.get(job_id)['status'] == "done"
+
+    def test_worker_processes(self, server, tmp_path):
+        queue_path, cache_dir = str(tmp_path / "jobs.db"), str(tmp_path / "cache")
+        queue = SQLiteJobQueue(queue_path)
+        for i in range(6):
+            queue.submit(f"https://github.com/owner/repo{i}")
+        context = multiprocessing.get_context("fork")
+        processes = [context.Process(target=run_worker_process, args=(server.url, queue_path, cache_dir)) for _ in range(3)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(timeout=30)
+        assert queue.counts()['done'] == 6
+        assert all(queue.get(job_id)['result']['files'] == 1 for job_id in range(1, 7))
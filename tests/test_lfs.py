@@ -0,0 +1,92 @@
+"""Pytest tests for Git LFS pointer handling"""
+import pytest
+from terence.lfs import is_lfs_path, lfs_endpoint, lfs_patterns, parse_pointer
+
+URL = "https://github.com/owner/repo"
+DATA = "".join(f"row_{i} = {i}\n" for i in range(200)).encode()
+
+
+@pytest.fixture
+def server(server):
+    pointer = server.add_lfs_object(DATA)
+    server.add_repo("owner", "repo", {
+        ".gitattributes": b"*.csv.py filter=lfs diff=lfs merge=lfs -text\ndata/** filter=lfs\n",
+        "main.py": b"m = 1\n",
+        "big.csv.py": pointer,
+        "data/table.py": pointer,
+        "untracked.py": server.add_lfs_object(b"other = 1\n"),
+    })
+    return server
+
+
+class TestLfsHelpers:
+    """Test .gitattributes patterns, pointers and endpoints"""
+
+    def test_patterns(self):
+        text = "# comment\n*.psd filter=lfs diff=lfs\n*.txt text\nassets/**/*.bin filter=lfs\n"
+        attributes = {"": lfs_patterns(text), "sub": ["*.py filter=lfs".split()[0]]}
+        assert attributes[""] == ["*.psd", "assets/**/*.bin"]
+        assert is_lfs_path("deep/dir/image.psd", attributes)
+        assert is_lfs_path("assets/x/y.bin", attributes)
+        assert not is_lfs_path("other/y.bin", attributes)
+        assert is_lfs_path("sub/a.py", attributes)
+        assert not is_lfs_path("a.py", attributes)
+
+    def test_parse_pointer(self):
+        oid = "a" * 64
+        assert parse_pointer(f"version https://git-lfs.github.com/spec/v1\noid sha256:{oid}\nsize 12\n".encode()) == (oid, 12)
+        assert parse_pointer(b"print('hello')\n") is None
+
+    def test_endpoint(self):
+        assert lfs_endpoint("https://api.github.com", "o", "r") == "https://github.com/o/r.git/info/lfs"
+        assert lfs_endpoint("https://git.example.com/api/v3", "o", "r") == "https://git.example.com/o/r.git/info/lfs"
+
+
+class TestLfsScans:
+    """Test LFS pointers skipped or fetched in bulk"""
+
+    def test_skipped_without_fetching(self, server, terence):
+        terence.scan_repository(URL)
+        assert set(terence.results) == {"main.py"}
+        assert terence.stats.files_skipped["lfs"] == 3
+        # Only main.py and .gitattributes are downloaded, the pointers found in .gitattributes aren't
+        assert server.requests["blobs"] == 3
+
+    def test_fetched_through_batch_api(self, server, terence):
+        terence.lfs("fetch").scan_repository(URL)
+        assert terence.results["big.csv.py"] == terence.results["data/table.py"] == DATA.decode()
+        # Pointers .gitattributes doesn't track are recognised once downloaded
+        assert terence.results["untracked.py"] == "other = 1\n"
+        assert "lfs" not in terence.stats.files_skipped
+        assert server.requests["lfs_batch"] == 1
+        assert server.requests["lfs"] == 2
+
+    def test_fetched_without_root_gitattributes(self, server, terence):
+        # Neither scan lists the .gitattributes at the root
+        terence.lfs("fetch").scan_repository(URL + "/tree/main/data")
+        assert terence.results == {"data/table.py": DATA.decode()}
+        terence.scan_repository(URL, include=["data/**"])
+        assert terence.results == {"data/table.py": DATA.decode()}
+
+    def test_objects_cached_under_their_oid(self, server, make_terence, tmp_path):
+        make_terence(tmp_path).lfs("fetch").scan_repository(URL)
+        # A fresh instance sharing the cache skips the pointers rather than reading the objects as the files
+        other = make_terence(tmp_path)
+        other.scan_repository(URL + "/tree/main/data")
+        assert other.results == {}
+        assert other.stats.files_skipped == {"lfs": 1}
+        # and fetches them again without downloading the objects
+        server.reset_counters()
+        other.lfs("fetch").scan_repository(URL)
+        assert other.results["data/table.py"] == DATA.decode()
+        assert "lfs" not in server.requests
+
+    def test_cached_pointer_still_skipped(self, terence, tmp_path):
+        terence.cache(str(tmp_path)).scan_repository(URL)
+        terence.clear_all()
+        terence.auth("fake-token").scan_repository(URL)
+        assert set(terence.results) == {"main.py"}
+
+    def test_unknown_mode(self, terence):
+        with pytest.raises(ValueError, match="Unknown LFS mode"):
+            terence.lfs("download")
@@ -0,0 +1,126 @@
+"""Pytest tests for the local mirror backend"""
+import shutil
+import subprocess
+import pytest
+from terence import Terence
+from terence.mirror import GitMirror, is_local_repository
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git executable not available")
+
+
+def git(cwd, *args):
+    return subprocess.run(
+        ["git", "-c", "user.name=Test", "-c", "user.email=test@example.com", "-c", "init.defaultBranch=main", *args],
+        cwd=cwd, check=True, stdout=subprocess.PIPE).stdout.decode().strip()
+
+
+@pytest.fixture
+def source_repo(tmp_path):
+    """Local git repository with a few committed files"""
+    repo = tmp_path / "source"
+    (repo / "src").mkdir(parents=True)
+    (repo / "src" / "app.py").write_text("print('app')\n")
+    (repo / "main.go").write_text("package main\n")
+    (repo / "README.md").write_text("# readme\n")
+    (repo / "logo.png").write_bytes(b"\x89PNG\xff\x00")
+    git(repo, "init", "-q")
+    git(repo, "add", ".")
+    git(repo, "commit", "-q", "-m", "initial")
+    return repo
+
+
+class TestGitMirror:
+    """Test GitMirror against a local repository"""
+
+    def test_is_local_repository(self, source_repo):
+        assert is_local_repository(str(source_repo))
+        assert is_local_repository(f"file://{source_repo}")
+        assert not is_local_repository("https://github.com/owner/repo")
+
+    def test_relative_directory_is_not_local(self, tmp_path, monkeypatch):
+        (tmp_path / "owner" / "repo").mkdir(parents=True)
+        (tmp_path / "mirror.git").mkdir()
+        monkeypatch.chdir(tmp_path)
+        # owner/repo stays a GitHub repository, only explicit paths are local
+        assert not is_local_repository("owner/repo")
+        assert is_local_repository("./owner/repo")
+        assert is_local_repository("mirror.git")
+        assert not is_local_repository("./missing")
+
+    def test_github_mirror_path(self, tmp_path):
+        mirror = GitMirror(str(tmp_path), "https://github.com/owner/repo")
+        assert mirror.remote == "https://github.com/owner/repo.git"
+        assert mirror.path.endswith("github.com/owner/repo.git")
+
+    def test_other_host_mirror_path(self, tmp_path):
+        mirror = GitMirror(str(tmp_path), "https://gitlab.com/group/subgroup/repo/-/tree/main/src")
+        assert mirror.remote == "https://gitlab.com/group/subgroup/repo.git"
+        assert mirror.path.endswith("gitlab.com/group/subgroup/repo.git")
+
+        mirror = GitMirror(str(tmp_path), "https://ghe.example.com/owner/repo/tree/main")
+        assert mirror.remote == "https://ghe.example.com/owner/repo.git"
+
+    def test_token_only_sent_to_its_host(self, tmp_path):
+        assert GitMirror(str(tmp_path), "owner/repo", token="t").token == "t"
+        assert GitMirror(str(tmp_path), "https://gitlab.com/owner/repo", token="t").token is None
+        enterprise = GitMirror(str(tmp_path), "https://ghe.example.com/owner/repo", token="t", token_host="ghe.example.com")
+        assert enterprise.token == "t"
+
+    def test_sync_and_list(self, tmp_path, source_repo):
+        mirror = GitMirror(str(tmp_path / "cache"), str(source_repo)).sync()
+        assert mirror.exists
+        paths = sorted(path for path, sha, size in mirror.list_files(mirror.resolve()))
+        assert paths == ["README.md", "logo.png", "main.go", "src/app.py"]
+
+    def test_read_blobs(self, tmp_path, source_repo):
+        mirror = GitMirror(str(tmp_path / "cache"), str(source_repo)).sync()
+        files = {path: sha for path, sha, size in mirror.list_files(mirror.resolve())}
+        blobs = dict(mirror.read_blobs([files["main.go"], files["src/app.py"]]))
+        assert blobs[files["main.go"]] == b"package main\n"
+        assert blobs[files["src/app.py"]] == b"print('app')\n"
+
+
+class TestMirrorScan:
+    """Test Terence scans through a mirror"""
+
+    def test_scan_local_path_without_auth(self, tmp_path, source_repo):
+        terence = Terence().mirror(str(tmp_path / "cache"))
+        terence.scan_repository(str(source_repo))
+        assert terence.results == {"src/app.py": "print('app')\n", "main.go": "package main\n"}
+        assert terence.stats.total_requests == 0
+        assert terence.stats.files_skipped == {"filtered": 2}
+
+    def test_repo_info_of_local_path(self, tmp_path, source_repo):
+        terence = Terence().mirror(str(tmp_path / "cache"))
+        terence.scan_repository(f"file://{source_repo}")
+        assert terence.get_repo_info() == {'owner': None, 'repo': "source", 'url': f"file://{source_repo}"}
+
+    def test_scan_file_url_with_extensions(self, tmp_path, source_repo):
+        terence = Terence().mirror(str(tmp_path / "cache"))
+        terence.scan_repository(f"file://{source_repo}", extensions=["go"])
+        assert terence.results == {"main.go": "package main\n"}
+
+    def test_fetch_picks_up_new_commits(self, tmp_path, source_repo):
+        terence = Terence().mirror(str(tmp_path / "cache"))
+        terence.scan_repository(str(source_repo))
+        first_commit = git(source_repo, "rev-parse", "HEAD")
+
+        (source_repo / "new.py").write_text("x = 1\n")
+        git(source_repo, "add", ".")
+        git(source_repo, "commit", "-q", "-m", "second")
+        terence.scan_repository(str(source_repo))
+        assert terence.results["new.py"] == "x = 1\n"
+
+        # Older commits stay reachable through branch()
+        terence.branch(first_commit).scan_repository(str(source_repo))
+        assert "new.py" not in terence.results
+
+    def test_unknown_branch_raises(self, tmp_path, source_repo):
+        terence = Terence().mirror(str(tmp_path / "cache")).branch("does-not-exist")
+        with pytest.raises(Exception, match="Git error"):
+            terence.scan_repository(str(source_repo))
+
+    def test_include_globs(self, tmp_path, source_repo):
+        terence = Terence().mirror(str(tmp_path / "cache"))
+        terence.scan_repository(str(source_repo), include=["src/**"])
+        assert terence.results == {"src/app.py": "print('app')\n"}
@@ -0,0 +1,129 @@
+"""Pytest tests for progress callbacks and cancellation"""
+import time
+import pytest
+from terence import ScanProgress, CancelToken, ScanCancelledException
+
+
+@pytest.fixture
+def server(server):
+    """Fake server with a small two-directory repository"""
+    server.add_repo("owner", "repo", {
+        "a.py": b"a",
+        "b.py": b"bb",
+        "src/c.py": b"ccc",
+        "src/d.png": b"\x89PNG",
+    })
+    return server
+
+
+URL = "https://github.com/owner/repo"
+
+
+class TestCancelToken:
+    """Test CancelToken"""
+
+    def test_not_cancelled_by_default(self):
+        assert CancelToken().cancelled is False
+
+    def test_cancel(self):
+        token = CancelToken()
+        token.cancel()
+        assert token.cancelled is True
+        assert token.reason == "Scan cancelled"
+
+    def test_timeout(self):
+        token = CancelToken(timeout=0)
+        time.sleep(0.01)
+        assert token.cancelled is True
+        assert token.reason == "Scan timed out"
+
+
+class TestScanProgress:
+    """Test progress reporting"""
+
+    def test_eta_unknown_before_first_file(self):
+        assert ScanProgress().eta is None
+
+    def test_eta_from_average(self):
+        progress = ScanProgress()
+        progress.started_at = time.time() - 10
+        progress.files_total = 4
+        progress.files_done = 2
+        assert progress.eta == pytest.approx(10, rel=0.1)
+
+    def test_callbacks_report_counts(self, terence):
+        snapshots = []
+        terence.scan_repository(URL, on_progress=lambda p: snapshots.append(
+            (p.directories_listed, p.files_done, p.files_total, p.bytes_fetched)))
+
+        assert snapshots[0] == (2, 0, 0, 0)
+        assert snapshots[1] == (2, 0, 3, 0)
+        assert snapshots[-1] == (2, 3, 3, 6)
+
+
+class TestCancellation:
+    """Test cancelling a running scan"""
+
+    def test_cancel_before_start(self, terence):
+        token = CancelToken()
+        token.cancel()
+        with pytest.raises(ScanCancelledException) as info:
+            terence.scan_repository(URL, cancel=token)
+        assert info.value.results == {}
+        assert terence.results == {}
+
+    def test_cancel_mid_scan_keeps_partial_results(self, terence):
+        token = CancelToken()
+
+        def on_progress(progress):
+            if progress.files_fetched == 2:
+                token.cancel()
+
+        with pytest.raises(ScanCancelledException, match="cancelled") as info:
+            terence.scan_repository(URL, on_progress=on_progress, cancel=token)
+        assert info.value.results == {"a.py": "a", "b.py": "bb"}
+        assert terence.results == info.value.results
+        assert terence.stats.requests["blobs"] == 2
+
+    def test_cancel_among_cached_files(self, terence):
+        terence.scan_repository(URL)
+        token = CancelToken()
+
+        def on_progress(progress):
+            if progress.files_done == 1:
+                token.cancel()
+
+        # Every file is already interned, so nothing is fetched between the hits
+        with pytest.raises(ScanCancelledException) as info:
+            terence.scan_repository(URL, on_progress=on_progress, cancel=token)
+        assert info.value.results == {"a.py": "a"}
+        assert terence.stats.cache_hits == 1
+
+    @pytest.mark.parametrize("fake_options", [{"truncate_trees_over": 1}])
+    def test_cancel_during_contents_walk(self, terence):
+        token = CancelToken()
+
+        def on_progress(progress):
+            if progress.directories_listed == 1:
+                token.cancel()
+
+        with pytest.raises(ScanCancelledException) as info:
+            terence.scan_repository(URL, on_progress=on_progress, cancel=token)
+        # Listed files aren't contents, so nothing partial comes back
+        assert info.value.results == {}
+        assert terence.results == {}
+
+    def test_timeout_parameter(self, terence):
+        with pytest.raises(ScanCancelledException, match="timed out"):
+            terence.scan_repository(URL, timeout=0)
+
+    def test_timeout_leaves_token_reusable(self, terence):
+        token = CancelToken()
+        with pytest.raises(ScanCancelledException, match="timed out"):
+            terence.scan_repository(URL, cancel=token, timeout=0)
+        assert token.cancelled is False
+        assert token.deadline is None
+
+        terence.clear_results()
+        terence.scan_repository(URL, cancel=token)
+        assert len(terence.results) > 0
@@ -0,0 +1,101 @@
+"""Pytest tests for pull request scans"""
+import pytest
+from terence import Terence, PullRequestScan
+
+BASE = {
+    "app.py": b"app = 1\n",
+    "lib/util.py": b"def util(): pass\n",
+    "lib/old_name.py": b"renamed = True\n",
+    "gone.py": b"gone = 1\n",
+    "README.md": b"# Readme\n",
+}
+HEAD = {
+    "app.py": b"app = 2\n",
+    "lib/util.py": b"def util(): pass\n",
+    "lib/new_name.py": b"renamed = True\n",
+    "new.js": b"const x = 1;\n",
+    "README.md": b"# Readme v2\n",
+}
+
+
+@pytest.fixture
+def server(server):
+    server.add_repo("owner", "repo", BASE)
+    server.add_repo("owner", "repo", HEAD, ref="feature", default=False)
+    server.add_pull("owner", "repo", 7, head="feature")
+    return server
+
+
+URL = "https://github.com/owner/repo"
+
+
+class TestScanPullRequest:
+    """Test Terence.scan_pull_request"""
+
+    def test_only_changed_files_fetched(self, server, terence):
+        scan = terence.scan_pull_request(URL, 7)
+        assert isinstance(scan, PullRequestScan)
+        assert terence.results == {
+            "app.py": "app = 2\n",
+            "lib/new_name.py": "renamed = True\n",
+            "new.js": "const x = 1;\n",
+        }
+        assert scan.head == terence.results
+        assert scan.base == {}
+        assert scan.removed == ["gone.py"]
+        assert server.requests["blobs"] == 3
+        assert server.requests["trees"] == 0
+
+    def test_statuses(self, terence):
+        scan = terence.scan_pull_request(URL, 7)
+        statuses = {changed.path: changed.status for changed in scan.files}
+        assert statuses == {
+            "app.py": "modified", "lib/new_name.py": "renamed", "new.js": "added",
+            "README.md": "modified", "gone.py": "removed",
+        }
+        renamed = next(changed for changed in scan.files if changed.path == "lib/new_name.py")
+        assert renamed.previous_path == "lib/old_name.py"
+
+    def test_filters_recorded(self, terence):
+        terence.scan_pull_request(URL, 7, extensions=["py"])
+        assert "new.js" not in terence.results
+        assert terence.stats.files_skipped == {"removed": 1, "filtered": 2}
+
+    def test_subpath_of_tree_url(self, terence):
+        terence.scan_pull_request(URL + "/tree/feature/lib", 7)
+        assert terence.results == {"lib/new_name.py": "renamed = True\n"}
+        assert terence.stats.files_skipped["out_of_scope"] == 3
+
+    def test_max_file_size(self, terence):
+        scan = terence.max_file_size(8).scan_pull_request(URL, 7, base=True)
+        # Only the 8 byte app.py fits, at head and at base
+        assert scan.head == {"app.py": "app = 2\n"}
+        assert scan.base == {"app.py": "app = 1\n"}
+        assert set(terence.stats.files_failed) == {"lib/new_name.py", "new.js"}
+        assert terence.stats.files_skipped["too_large"] == 1
+
+    def test_base_versions(self, server, terence):
+        scan = terence.scan_pull_request(URL, 7, base=True)
+        assert scan.base == {"app.py": "app = 1\n", "lib/new_name.py": "renamed = True\n"}
+        # Renamed file has the same blob at base and head, so it is fetched once
+        assert server.requests["blobs"] == 4
+        assert server.requests["trees"] == 1
+        assert scan.base["lib/new_name.py"] is scan.head["lib/new_name.py"]
+
+    def test_paginated_listing(self, server):
+        terence = Terence(base_url=server.url, seconds_between_requests=None, per_page=2).auth("fake-token")
+        scan = terence.scan_pull_request(URL, 7)
+        assert len(scan.files) == 5
+        # The pull request itself plus three pages of files
+        assert server.requests["pulls"] == 4
+        assert terence.stats.requests["pulls"] == 4
+
+    def test_unknown_pull_request(self, terence):
+        with pytest.raises(Exception, match="Pull request #99 not found"):
+            terence.scan_pull_request(URL, 99)
+        assert terence.results == {}
+
+    def test_mirror_backend_unsupported(self, terence, tmp_path):
+        terence.mirror(str(tmp_path))
+        with pytest.raises(NotImplementedError):
+            terence.scan_pull_request(URL, 7, backend="mirror")
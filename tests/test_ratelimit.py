@@ -0,0 +1,108 @@
+"""Pytest tests for the shared rate limit ledger"""
+import time
+import multiprocessing
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from terence import Terence, RateLimitException
+from terence.ratelimit import RateLimitLedger, budget_key
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    return RateLimitLedger(str(tmp_path / "rate.db"), floor=0)
+
+
+def scan_until_limited(url, ledger_path, repos, outcomes):
+    terence = Terence(base_url=url, seconds_between_requests=None).auth("fake-token").share_rate_limit(ledger_path, floor=0)
+    for repo in repos:
+        try:
+            terence.scan(f"https://github.com/owner/{repo}")
+            outcomes.put("done")
+        except RateLimitException:
+            outcomes.put("limited")
+        except Exception as e:
+            outcomes.put(str(e))
+
+
+class TestRateLimitLedger:
+    """Test reservations and syncing from response headers"""
+
+    def test_unknown_budget(self, ledger):
+        assert ledger.reserve("key") is None
+        assert ledger.status("key") is None
+        assert not ledger.current("key")
+
+    def test_reserve_until_floor(self, tmp_path):
+        ledger = RateLimitLedger(str(tmp_path / "rate.db"), floor=2)
+        ledger.sync("key", 5, 100, time.time() + 60)
+        assert ledger.reserve("key") == 4
+        assert ledger.reserve("key", count=2) == 2
+        with pytest.raises(RateLimitException, match="budget exhausted"):
+            ledger.reserve("key")
+        assert ledger.status("key")['remaining'] == 2
+
+    def test_sync_keeps_lower_within_window(self, ledger):
+        ledger.sync("key", 50, 100, time.time() + 60)
+        ledger.reserve("key", count=10)
+        # A response sent before the other reservations doesn't give them back
+        ledger.sync("key", 45, 100, time.time() + 61)
+        assert ledger.status("key")['remaining'] == 40
+        ledger.sync("key", 30, 100, time.time() + 61)
+        assert ledger.status("key")['remaining'] == 30
+
+    def test_refills_after_reset(self, ledger):
+        ledger.sync("key", 0, 100, time.time() - 1)
+        assert not ledger.current("key")
+        assert ledger.reserve("key") == 99
+        ledger.sync("key", 80, 100, time.time() + 60)
+        assert ledger.status("key")['remaining'] == 80
+
+    def test_keys_per_token(self, ledger):
+        assert budget_key("a") != budget_key("b")
+        assert budget_key("a") != budget_key("a", "http://localhost")
+        ledger.sync(budget_key("a"), 10, 100, time.time() + 60)
+        assert ledger.status(budget_key("b")) is None
+
+    def test_concurrent_reservations(self, ledger):
+        ledger.sync("key", 40, 100, time.time() + 60)
+        def drain(_):
+            reserved = 0
+            try:
+                while True:
+                    ledger.reserve("key")
+                    reserved += 1
+            except RateLimitException:
+                return reserved
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            assert sum(pool.map(drain, range(6))) == 40
+
+
+class TestSharedRateLimit:
+    """Test Terence instances spending one budget through the ledger"""
+
+    def test_skips_rate_limit_request(self, server, terence, tmp_path):
+        server.add_repo("owner", "repo", {"a.py": b"a = 1\n"})
+        terence.share_rate_limit(str(tmp_path / "rate.db"))
+        terence.scan("https://github.com/owner/repo")
+        terence.scan("https://github.com/owner/repo")
+        assert server.requests["rate_limit"] == 1
+        status = terence._ledger.status(terence._budget_key)
+        assert status['remaining'] == server.remaining
+
+    @pytest.mark.parametrize("fake_options", [{"rate_limit": 20}])
+    def test_processes_stop_at_limit(self, server, tmp_path):
+        for i in range(12):
+            server.add_repo("owner", f"repo{i}", {f"file{i}.py": f"n = {i}\n".encode()})
+        context = multiprocessing.get_context("fork")
+        outcomes = context.Queue()
+        processes = [context.Process(target=scan_until_limited,
+                                     args=(server.url, str(tmp_path / "rate.db"), [f"repo{i}" for i in range(start, 12, 3)], outcomes))
+                     for start in range(3)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(timeout=30)
+        results = [outcomes.get(timeout=5) for _ in range(12)]
+        assert server.rejected == 0
+        assert set(results) == {"done", "limited"}
+        assert server.remaining < 3
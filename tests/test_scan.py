@@ -0,0 +1,87 @@
+"""Pytest tests for the stateless Terence.scan API"""
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from terence import Terence, ScanResult, CancelToken, ScanCancelledException
+
+MAIN = {
+    "a.py": b"a = 1\n",
+    "src/b.js": b"let b = 1\n",
+    "logo.png": b"\x89PNG\r\n\x1a\n\x00\xff",
+}
+FEATURE = dict(MAIN, **{"a.py": b"a = 2\n", "src/c.py": b"c = 1\n"})
+URL = "https://github.com/owner/repo"
+
+
+@pytest.fixture
+def server(server):
+    server.add_repo("owner", "repo", MAIN)
+    server.add_repo("owner", "repo", FEATURE, ref="feature", default=False)
+    for i in range(4):
+        server.add_repo("owner", f"repo{i}", {f"file{i}.py": f"n = {i}\n".encode()})
+    return server
+
+
+class TestScan:
+    """Test Terence.scan results and isolation from the instance"""
+
+    def test_returns_result(self, terence):
+        result = terence.scan(URL)
+        assert isinstance(result, ScanResult)
+        assert result.files == {"a.py": "a = 1\n", "src/b.js": "let b = 1\n"}
+        assert result.shas.keys() == result.files.keys()
+        assert set(result.entries) == {"a.py", "src/b.js"}
+        assert result.stats.files_fetched == 2
+        assert [file.path for file in result.scanned_files()] == ["a.py", "src/b.js"]
+
+    def test_instance_untouched(self, terence):
+        terence.scan_repository(URL)
+        stats = terence.stats
+        result = terence.branch("feature").scan(URL, ref="main", extensions=["py"])
+        assert result.files == {"a.py": "a = 1\n"}
+        assert terence.results == {"a.py": "a = 1\n", "src/b.js": "let b = 1\n"}
+        assert terence.stats is stats
+
+    def test_ref_and_cache_commit(self, server, terence, tmp_path):
+        result = terence.cache(str(tmp_path)).scan(URL, ref="feature")
+        assert result.files["a.py"] == "a = 2\n"
+        assert result.commit == server.repos[("owner", "repo")]['refs']['feature'].commit_sha
+        assert terence.load_cached(URL, "feature").commit == result.commit
+
+    def test_concurrent_scans_isolated(self, server, terence):
+        urls = [f"https://github.com/owner/repo{i}" for i in range(4)] * 3
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            results = list(pool.map(terence.scan, urls))
+        for url, result in zip(urls, results):
+            i = url[-1]
+            assert result.files == {f"file{i}.py": f"n = {i}\n"}
+            assert result.stats.requests["trees"] == 1
+        assert terence.results == {}
+
+    def test_shared_client(self, terence):
+        terence.scan(URL)
+        client = terence._github()
+        terence.scan(URL, ref="feature")
+        assert terence._github() is client
+        terence.auth("other-token")
+        assert terence._github() is not client
+
+    def test_cancel_one_scan(self, terence):
+        token = CancelToken()
+        token.cancel()
+        with pytest.raises(ScanCancelledException):
+            terence.scan(URL, cancel=token)
+        assert terence.scan(URL).files
+
+    def test_progress_per_scan(self, terence):
+        seen = {}
+        def record(name):
+            return lambda progress: seen.setdefault(name, set()).add(id(progress))
+        threads = [threading.Thread(target=terence.scan, args=(URL,), kwargs={'on_progress': record(name)})
+                   for name in ("first", "second")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(seen["first"]) == len(seen["second"]) == 1
+        assert seen["first"] != seen["second"]
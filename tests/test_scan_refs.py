@@ -0,0 +1,65 @@
+"""Pytest tests for multi-ref scanning"""
+import pytest
+from terence import Terence, CancelToken, ScanCancelledException
+
+MAIN = {
+    "a.py": b"a = 1\n",
+    "b.py": b"b = 1\n",
+    "src/c.py": b"c = 1\n",
+}
+FEATURE = dict(MAIN, **{"b.py": b"b = 2\n", "src/d.py": b"d = 1\n"})
+
+
+@pytest.fixture
+def server(server):
+    server.add_repo("owner", "repo", MAIN)
+    server.add_repo("owner", "repo", FEATURE, ref="feature", default=False)
+    server.add_repo("owner", "repo", MAIN, ref="v1.0", default=False)
+    return server
+
+
+URL = "https://github.com/owner/repo"
+
+
+class TestScanRefs:
+    """Test Terence.scan_refs"""
+
+    def test_results_per_ref(self, terence):
+        results = terence.scan_refs(URL, ["main", "feature"])
+        assert results["main"] == {path: data.decode() for path, data in MAIN.items()}
+        assert results["feature"] == {path: data.decode() for path, data in FEATURE.items()}
+
+    def test_each_blob_fetched_once(self, server, terence):
+        terence.scan_refs(URL, ["main", "feature", "v1.0"])
+        # a.py, b.py (x2 versions), src/c.py, src/d.py
+        assert server.requests["blobs"] == 5
+        assert server.requests["trees"] == 3
+        assert terence.stats.cache_hits == 5
+
+    def test_identical_files_share_objects(self, terence):
+        results = terence.scan_refs(URL, ["main", "v1.0"])
+        assert results["main"]["a.py"] is results["v1.0"]["a.py"]
+
+    def test_results_untouched(self, terence):
+        terence.scan_refs(URL, ["main"])
+        assert terence.results == {}
+        assert terence.last_repo_url == URL
+
+    def test_extension_filter(self, terence):
+        results = terence.scan_refs(URL, ["main"], include=["src/**"])
+        assert results == {"main": {"src/c.py": "c = 1\n"}}
+
+    def test_cancel_returns_partial_per_ref(self, terence):
+        token = CancelToken()
+
+        def on_progress(progress):
+            if progress.files_fetched == 1:
+                token.cancel()
+
+        with pytest.raises(ScanCancelledException) as info:
+            terence.scan_refs(URL, ["main", "v1.0"], on_progress=on_progress, cancel=token)
+        assert info.value.results == {"main": {"a.py": "a = 1\n"}, "v1.0": {"a.py": "a = 1\n"}}
+
+    def test_requires_auth(self):
+        with pytest.raises(Exception, match="Not authenticated"):
+            Terence().scan_refs(URL, ["main"])
@@ -0,0 +1,128 @@
+"""Pytest tests for MinHash near-duplicate detection"""
+import random
+import pytest
+from terence import Terence
+from terence.content import ScannedFile
+
+np = pytest.importorskip("numpy")
+from terence.similarity import MinHashIndex, NearDuplicate, minhash_signatures  # noqa: E402
+
+WORDS = [f"name{i}" for i in range(400)]
+
+
+def source(seed, lines=80):
+    generator = random.Random(seed)
+    return "\n".join(" ".join(generator.choice(WORDS) for _ in range(8)) for _ in range(lines)) + "\n"
+
+
+def edited(text, every=20):
+    lines = text.splitlines()
+    return "\n".join(line + " changed" if i % every == 0 else line for i, line in enumerate(lines)) + "\n"
+
+
+def files(contents):
+    return [ScannedFile(path, f"sha-{hash(text)}", len(text), text) for path, text in contents.items()]
+
+
+ORIGINAL = source(1)
+FORK = edited(ORIGINAL)
+UNRELATED = source(2)
+
+
+class TestSignatures:
+    """Test MinHash signatures"""
+
+    def test_shape_and_stability(self):
+        signatures = minhash_signatures([ORIGINAL, UNRELATED, ""], num_perm=64)
+        assert signatures.shape == (3, 64)
+        assert signatures.dtype == np.uint32
+        assert (signatures == minhash_signatures([ORIGINAL, UNRELATED, ""], num_perm=64)).all()
+        assert (signatures[2] == (1 << 32) - 1).all()
+
+    def test_batch_matches_single(self):
+        batch = minhash_signatures([ORIGINAL, FORK, UNRELATED])
+        assert (batch[1] == minhash_signatures([FORK])[0]).all()
+
+    def test_large_text_spans_chunks(self):
+        text = source(3, lines=5000)
+        assert (minhash_signatures([text, ORIGINAL])[0] == minhash_signatures([text])[0]).all()
+
+    def test_estimates_similarity(self):
+        original, fork, unrelated = minhash_signatures([ORIGINAL, FORK, UNRELATED])
+        assert (original == fork).mean() > 0.6
+        assert (original == unrelated).mean() < 0.1
+
+    def test_ignores_formatting(self):
+        reformatted = ORIGINAL.replace(" ", "  ,")
+        assert (minhash_signatures([ORIGINAL])[0] == minhash_signatures([reformatted])[0]).all()
+
+
+class TestMinHashIndex:
+    """Test near-duplicate pairs and queries across repositories"""
+
+    def test_pairs_across_repos(self):
+        index = MinHashIndex()
+        index.add(files({"lib/core.py": ORIGINAL, "lib/other.py": UNRELATED}), "repo-a")
+        index.add(files({"vendor/core.py": FORK, "LICENSE.py": UNRELATED}), "repo-b")
+        pairs = index.pairs(threshold=0.6)
+        assert pairs[0] == NearDuplicate(1.0, "repo-a", "lib/other.py", "repo-b", "LICENSE.py")
+        assert [(pair.path_a, pair.path_b) for pair in pairs[1:]] == [("lib/core.py", "vendor/core.py")]
+        assert 0.6 <= pairs[1].similarity < 1.0
+
+    def test_cross_repo_only(self):
+        index = MinHashIndex()
+        index.add(files({"a.py": ORIGINAL, "b.py": FORK}), "repo-a")
+        assert index.pairs(threshold=0.6) == []
+        assert [(pair.path_a, pair.path_b) for pair in index.pairs(threshold=0.6, cross_repo=False)] == [("a.py", "b.py")]
+
+    def test_threshold(self):
+        index = MinHashIndex()
+        index.add(files({"a.py": ORIGINAL}), "repo-a")
+        index.add(files({"b.py": FORK}), "repo-b")
+        assert index.pairs(threshold=0.99) == []
+
+    def test_readding_replaces_repo(self):
+        index = MinHashIndex()
+        index.add(files({"a.py": ORIGINAL}), "repo-a")
+        index.add(files({"b.py": ORIGINAL}), "repo-b")
+        index.add(files({"b.py": UNRELATED}), "repo-b")
+        assert index.pairs() == []
+        index.remove("repo-b")
+        assert len(index) == 1
+
+    def test_similar(self):
+        index = MinHashIndex()
+        index.add(files({"a.py": ORIGINAL, "b.py": UNRELATED}), "repo-a")
+        matches = index.similar(FORK, threshold=0.6)
+        assert [(repo, path) for _, repo, path in matches] == [("repo-a", "a.py")]
+        assert index.similar("") == []
+
+    def test_bands_must_divide(self):
+        with pytest.raises(ValueError, match="multiple of bands"):
+            MinHashIndex(num_perm=100, bands=16)
+
+
+class TestTerenceNearDuplicates:
+    """Test indexing scans and reusing cached signatures"""
+
+    def test_index_scans(self, tmp_path, server, make_terence):
+        server.add_repo("owner", "original", {"core.py": ORIGINAL.encode(), "logo.png": b"\x89PNG\xff"})
+        server.add_repo("owner", "fork", {"third_party/core.py": FORK.encode(), "main.py": UNRELATED.encode()})
+        terence = make_terence(tmp_path)
+        for name in ("original", "fork"):
+            terence.scan_repository(f"https://github.com/owner/{name}")
+            terence.index_near_duplicates()
+        pairs = terence.minhash.pairs(threshold=0.6)
+        assert [(pair.repo_a, pair.path_a, pair.repo_b, pair.path_b) for pair in pairs] == [
+            ("https://github.com/owner/original", "core.py", "https://github.com/owner/fork", "third_party/core.py")]
+
+        # A fresh instance indexes the cached scans from the cached signatures alone
+        reader = Terence().cache(str(tmp_path))
+        for name in ("original", "fork"):
+            reader.load_cached(f"https://github.com/owner/{name}")
+            reader.index_near_duplicates()
+        assert reader.minhash.pairs(threshold=0.6) == pairs
+
+    def test_requires_scan(self):
+        with pytest.raises(Exception, match="No scan results"):
+            Terence().index_near_duplicates()
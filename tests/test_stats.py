@@ -0,0 +1,98 @@
+"""Pytest tests for stats module"""
+import pytest
+from terence import ScanStats
+
+
+class TestScanStats:
+    """Test ScanStats counters"""
+
+    def test_request_counts_by_endpoint(self):
+        stats = ScanStats()
+        with stats.request("contents", "listing"):
+            pass
+        with stats.request("contents", "download"):
+            pass
+        with stats.request("rate_limit", "rate_limit"):
+            pass
+        assert stats.requests == {"contents": 2, "rate_limit": 1}
+        assert stats.total_requests == 3
+        assert set(stats.phases) == {"listing", "download", "rate_limit"}
+
+    def test_percentiles(self):
+        stats = ScanStats()
+        stats.latencies = [float(i) for i in range(1, 101)]
+        assert stats.p50 == 50.0
+        assert stats.p95 == 95.0
+
+    def test_percentiles_without_requests(self):
+        stats = ScanStats()
+        assert stats.p50 is None
+        assert stats.p95 is None
+
+    def test_file_counters(self):
+        stats = ScanStats()
+        stats.record_fetch("a.py", 10)
+        stats.record_fetch("b.py", 5)
+        stats.record_skip("image.png", "filtered")
+        stats.record_failure("big.py", "too large")
+        stats.record_cache_hit("c.py")
+        data = stats.as_dict()
+        assert data["files_fetched"] == 2
+        assert data["bytes_transferred"] == 15
+        assert data["files_skipped"] == {"filtered": 1}
+        assert data["files_failed"] == {"big.py": "too large"}
+        assert data["cache_hits"] == 1
+
+    def test_hooks_receive_events(self):
+        events = []
+        stats = ScanStats(hooks=[lambda event, payload: events.append(event)])
+        with stats.request("contents", "listing"):
+            pass
+        stats.record_fetch("a.py", 1)
+        stats.record_skip("b.png", "filtered")
+        assert events == ["request", "file_fetched", "file_skipped"]
+
+    def test_prometheus_export(self):
+        stats = ScanStats().start()
+        with stats.request("contents", "listing"):
+            pass
+        stats.record_skip("b.png", "filtered")
+        text = stats.finish().to_prometheus()
+        assert 'terence_scan_requests_total{endpoint="contents"} 1' in text
+        assert 'terence_scan_files_total{status="skipped",reason="filtered"} 1' in text
+        assert "terence_scan_wall_seconds" in text
+
+
+class TestScanInstrumentation:
+    """Test that scans record telemetry"""
+
+    @pytest.fixture
+    def server(self, server):
+        server.add_repo("owner", "repo", {
+            "main.py": b"print(1)",
+            "logo.png": b"\x89PNG",
+            "src/app.py": b"x = 1",
+            "src/bad.py": b"\xff\xfe",
+        })
+        return server
+
+    def test_scan_records_stats(self, terence):
+        terence.scan_repository("https://github.com/owner/repo")
+
+        assert terence.results == {"main.py": "print(1)", "src/app.py": "x = 1"}
+        assert terence.stats.requests == {"rate_limit": 1, "repos": 1, "trees": 1, "blobs": 3}
+        assert terence.stats.files_fetched == 2
+        assert terence.stats.files_skipped == {"filtered": 1, "binary": 1}
+        assert terence.stats.bytes_transferred == len(b"print(1)") + len(b"x = 1")
+        assert terence.stats.finished_at is not None
+
+    def test_hooks_registered_on_terence(self, terence):
+        events = []
+        terence.add_stats_hook(lambda event, payload: events.append(event))
+        terence.scan_repository("https://github.com/owner/repo")
+        assert events.count("file_fetched") == 2
+
+    def test_clear_results_resets_stats(self, terence):
+        terence.scan_repository("https://github.com/owner/repo")
+        terence.clear_results()
+        assert terence.stats is None
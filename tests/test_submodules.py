@@ -0,0 +1,102 @@
+"""Pytest tests for scanning submodules"""
+import pytest
+from terence.submodules import parse_gitmodules, resolve_submodule_url
+
+URL = "https://github.com/owner/app"
+
+
+def gitmodules(submodules):
+    return "".join(f'[submodule "{path}"]\n\tpath = {path}\n\turl = {url}\n' for path, url in submodules.items()).encode()
+
+
+@pytest.fixture
+def server(server):
+    server.add_repo("owner", "util", {"util.py": b"u = 1\n"})
+    util = server.repos[("owner", "util")]['refs']['main'].commit_sha
+    server.add_repo("owner", "lib", {"lib.py": b"l = 1\n", ".gitmodules": gitmodules({"deps/util": "../util.git"})},
+                    submodules={"deps/util": util})
+    lib = server.repos[("owner", "lib")]['refs']['main'].commit_sha
+    server.add_repo("owner", "app", {
+        "main.py": b"m = 1\n",
+        ".gitmodules": gitmodules({"vendor/lib": "https://github.com/owner/lib.git", "third_party/lib": "git@github.com:owner/lib.git",
+                                   "external": "https://gitlab.com/other/repo.git"}),
+    }, submodules={"vendor/lib": lib, "third_party/lib": lib, "external": "0" * 40})
+    return server
+
+
+class TestGitmodules:
+    """Test .gitmodules parsing and URL resolution"""
+
+    def test_parse(self):
+        text = '[submodule "lib"]\n\tpath = vendor/lib\n\turl = ../lib.git\n# comment\n[submodule "broken"]\n\tpath = x\n'
+        assert parse_gitmodules(text) == {"vendor/lib": "../lib.git"}
+
+    def test_resolve(self):
+        repo = "https://github.com/owner/app"
+        assert resolve_submodule_url("../lib.git", repo) == "https://github.com/owner/lib"
+        assert resolve_submodule_url("../../other/lib", repo) == "https://github.com/other/lib"
+        assert resolve_submodule_url("git@github.com:other/lib.git", repo) == "https://github.com/other/lib"
+        assert resolve_submodule_url("ssh://git@github.com/other/lib.git", repo) == "https://github.com/other/lib"
+        assert resolve_submodule_url("https://gitlab.com/other/lib.git", repo) is None
+
+    def test_local_urls_only_for_local_repositories(self, tmp_path):
+        assert resolve_submodule_url("/root/package", "https://github.com/owner/app") is None
+        assert resolve_submodule_url("file:///root/package", "https://github.com/owner/app") is None
+        (tmp_path / "app").mkdir()
+        (tmp_path / "lib").mkdir()
+        assert resolve_submodule_url(str(tmp_path / "lib"), str(tmp_path / "app")) == str(tmp_path / "lib")
+
+
+class TestSubmoduleScans:
+    """Test submodules scanned at their pinned commits"""
+
+    def test_not_scanned_by_default(self, terence):
+        terence.scan_repository(URL)
+        assert set(terence.results) == {"main.py"}
+
+    def test_nested_and_deduplicated(self, server, terence):
+        terence.submodules(depth=2).scan_repository(URL)
+        assert terence.results == {
+            "main.py": "m = 1\n",
+            "vendor/lib/lib.py": "l = 1\n",
+            "vendor/lib/deps/util/util.py": "u = 1\n",
+            "third_party/lib/lib.py": "l = 1\n",
+            "third_party/lib/deps/util/util.py": "u = 1\n",
+        }
+        assert terence.shas["vendor/lib/lib.py"] == terence.shas["third_party/lib/lib.py"]
+        # lib is pinned twice but listed once, and so is util below it
+        assert server.requests["trees"] == 3
+        assert terence.stats.files_skipped["submodule"] == 1
+
+    def test_depth_limit(self, terence):
+        terence.submodules(depth=1).scan_repository(URL)
+        assert "vendor/lib/lib.py" in terence.results
+        assert not any("deps/util" in path for path in terence.results)
+        assert terence.stats.files_skipped["submodule_depth"] == 2
+
+    def test_include_globs_apply_to_submodule_files(self, terence):
+        terence.submodules(depth=2).scan_repository(URL, include=["**/util.py", "vendor/**"])
+        assert set(terence.results) == {"vendor/lib/lib.py", "vendor/lib/deps/util/util.py", "third_party/lib/deps/util/util.py"}
+        assert "third_party/lib/lib.py" not in terence.shas
+
+    def test_scan_result_and_extensions(self, terence):
+        result = terence.submodules().scan(URL, extensions=["py"])
+        assert set(result.entries) == set(result.files)
+        assert result.entries["vendor/lib/lib.py"].path == "vendor/lib/lib.py"
+
+    @pytest.mark.parametrize("fake_options", [{"truncate_trees_over": 1}])
+    def test_contents_walk_finds_submodules(self, server, terence):
+        server.add_repo("owner", "lib", {"lib.py": b"l = 1\n"})
+        lib = server.repos[("owner", "lib")]['refs']['main'].commit_sha
+        server.add_repo("owner", "app", {"src/main.py": b"m = 1\n", ".gitmodules": gitmodules({"src/lib": "../lib"})},
+                        submodules={"src/lib": lib})
+        terence.submodules()
+        terence.scan_repository(URL)
+        assert terence.results == {"src/main.py": "m = 1\n", "src/lib/lib.py": "l = 1\n"}
+
+    def test_missing_submodule_recorded(self, server, terence):
+        server.add_repo("owner", "broken", {".gitmodules": gitmodules({"gone": "../gone"}), "a.py": b"a\n"},
+                        submodules={"gone": "1" * 40})
+        terence.submodules().scan_repository("https://github.com/owner/broken")
+        assert terence.results == {"a.py": "a\n"}
+        assert "gone" in terence.stats.files_failed
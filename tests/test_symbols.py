@@ -0,0 +1,103 @@
+"""Pytest tests for the symbol index"""
+from terence.content import ScannedFile
+from terence.symbols import Symbol, SymbolIndex, extract_symbols
+
+URL = "https://github.com/owner/repo"
+
+PYTHON = """import os
+from terence.utils import parse_github_url
+
+class Scanner:
+    def scan(self):
+        pass
+
+async def fetch():
+    def inner():
+        pass
+"""
+
+
+class TestExtractSymbols:
+    """Test extract_symbols for Python and the regex grammars"""
+
+    def test_python(self):
+        assert extract_symbols("a.py", PYTHON) == [
+            ("os", "import", 1),
+            ("terence.utils.parse_github_url", "import", 2),
+            ("Scanner", "class", 4),
+            ("fetch", "function", 8),
+        ]
+
+    def test_python_syntax_error(self):
+        assert extract_symbols("a.py", "def broken(:\n") == []
+
+    def test_python_too_deeply_nested(self):
+        # Blows the parser's recursion limit rather than raising SyntaxError
+        assert extract_symbols("deep.py", "x = " + "1+" * 200000 + "1") == []
+
+    def test_javascript(self):
+        text = "import React from 'react'\nexport function App() {}\nconst add = (a, b) => a + b\nclass Store {\n  method() {}\n}\n"
+        assert extract_symbols("a.js", text) == [
+            ("react", "import", 1), ("App", "function", 2), ("add", "function", 3), ("Store", "class", 4),
+        ]
+
+    def test_go_import_block(self):
+        text = 'package main\n\nimport (\n\t"fmt"\n\tlog "github.com/x/log"\n)\n\ntype Server struct {}\n\nfunc (s *Server) Run() {}\n'
+        assert extract_symbols("main.go", text) == [
+            ("fmt", "import", 4), ("github.com/x/log", "import", 5), ("Server", "class", 8), ("Run", "function", 10),
+        ]
+
+    def test_unknown_extension(self):
+        assert extract_symbols("notes.md", "def not_code():\n") == []
+
+
+class TestSymbolIndex:
+    """Test SymbolIndex updates, caching and lookups"""
+
+    FILES = [ScannedFile(f"pkg/m{i}.py", f"sha{i}", 0, f"def function_{i}():\n    pass\n\nclass Shared:\n    pass\n")
+             for i in range(8)]
+
+    def test_process_pool_matches_inline(self):
+        inline = SymbolIndex().update(self.FILES, workers=0, batch_chars=50)
+        pooled = SymbolIndex().update(self.FILES, workers=2, batch_chars=50)
+        assert sorted(pooled.find("Shared")) == sorted(inline.find("Shared"))
+        assert len(pooled) == len(inline) == 16
+
+    def test_find_and_search(self):
+        index = SymbolIndex().update(self.FILES, workers=0)
+        assert index.find("function_3") == [Symbol("function_3", "function", "pkg/m3.py", 1, "sha3")]
+        assert len(index.find("Shared", kind="class")) == 8
+        assert index.find("Shared", kind="function") == []
+        assert len(index.search("function_")) == 8
+        assert [symbol.name for symbol in index.in_file("pkg/m0.py")] == ["function_0", "Shared"]
+        assert index.in_file("missing.py") == []
+
+    def test_cached_by_sha(self, monkeypatch):
+        index = SymbolIndex().update(self.FILES[:4], workers=0)
+        parsed = []
+        import terence.symbols
+        original = terence.symbols.extract_symbols
+        monkeypatch.setattr(terence.symbols, "extract_symbols", lambda path, text: parsed.append(path) or original(path, text))
+        index.update(self.FILES, workers=0)
+        assert parsed == [f"pkg/m{i}.py" for i in range(4, 8)]
+        assert len(index.find("Shared")) == 8
+
+    def test_update_replaces_files(self):
+        index = SymbolIndex().update(self.FILES, workers=0)
+        index.update(self.FILES[:2], workers=0)
+        assert index.find("function_5") == []
+        assert len(index.find("Shared")) == 2
+
+    def test_terence_index_symbols(self, server, terence):
+        server.add_repo("owner", "repo", {
+            "src/app.py": b"from src import util\n\ndef main():\n    util.run()\n",
+            "src/util.py": b"def run():\n    pass\n",
+            "web/index.ts": b"export class Widget {}\n",
+        })
+        terence.scan_repository(URL)
+        terence.index_symbols(workers=0)
+        assert [symbol.path for symbol in terence.symbols.find("run")] == ["src/util.py"]
+        assert terence.symbols.find("Widget")[0].kind == "class"
+        assert terence.symbols.find("src.util")[0].line == 1
+        terence.clear_all()
+        assert len(terence.symbols) == 0
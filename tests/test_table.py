@@ -0,0 +1,68 @@
+"""Pytest tests for the columnar file metadata table"""
+import pytest
+from terence.backends import TreeEntry
+
+np = pytest.importorskip("numpy")
+from terence.table import FileTable  # noqa: E402
+
+FILES = {
+    "app.py": b"import os\nprint(os.name)\n",
+    "src/util.py": b"x = 1",
+    "src/view.ts": b"export const a = 1;\n",
+    "web/index.html": b"<html></html>\n",
+    "web/logo.c": b"\x89PNG\xff\xfe",
+}
+
+
+@pytest.fixture
+def server(server):
+    server.add_repo("owner", "repo", FILES)
+    return server
+
+
+@pytest.fixture
+def terence(terence):
+    terence.scan_repository("https://github.com/owner/repo")
+    return terence
+
+
+class TestFileTable:
+    """Test FileTable construction and queries"""
+
+    def test_columns(self):
+        entries = [TreeEntry("a/b.PY", "s1", 7), TreeEntry(".env", "s2", -1)]
+        table = FileTable.from_scan(entries, {"a/b.PY": "x\ny\n", ".env": "KEY=1"})
+        assert table.as_dict() == {
+            'path': ["a/b.PY", ".env"], 'dir': ["a", ""], 'ext': [".py", ""], 'size': [7, 5],
+            'sha': ["s1", "s2"], 'lines': [2, 1], 'is_binary': [False, False], 'language': ["Python", ""],
+        }
+
+    def test_empty(self):
+        table = FileTable.from_scan([], {})
+        assert len(table) == 0
+        assert table.group_sum("language") == {}
+
+    def test_scan_table(self, terence):
+        table = terence.file_table()
+        assert len(table) == 5
+        assert table.where(is_binary=True)["path"].tolist() == ["web/logo.c"]
+        assert table.where(language="Python")["lines"].sum() == 3
+        # Built once per scan
+        assert terence.file_table() is table
+
+    def test_bytes_per_language_per_directory(self, terence):
+        table = terence.file_table()
+        assert table.group_sum(("language", "dir")) == {
+            ("C", "web"): 6,
+            ("HTML", "web"): 14,
+            ("Python", ""): 25,
+            ("Python", "src"): 5,
+            ("TypeScript", "src"): 20,
+        }
+        assert table.group_count("dir") == {"": 1, "src": 2, "web": 2}
+
+    def test_rebuilt_after_new_scan(self, terence):
+        first = terence.file_table()
+        terence.clear_results()
+        assert len(terence.file_table()) == 0
+        assert terence.file_table() is not first
@@ -157,4 +157,78 @@ class TestShouldScanFile:
 
   def test_empty_extensions_list(self):
     """Test behavior with empty extensions list"""
-    assert should_scan_file("main.py", extensions=[]) == False
\ No newline at end of file
+    assert should_scan_file("main.py", extensions=[]) == False
+
+class TestParseGitHubLocation:
+  def test_plain_repo_url(self):
+    """Test that a repo URL has no ref or path"""
+    assert parse_github_location("https://github.com/org/mono") == ("org", "mono", None, "")
+
+  def test_tree_url(self):
+    """Test that /tree/ URLs return ref and directory"""
+    result = parse_github_location("https://github.com/org/mono/tree/main/services/billing")
+    assert result == ("org", "mono", "main", "services/billing")
+
+  def test_blob_url(self):
+    """Test that /blob/ URLs return ref and file path"""
+    result = parse_github_location("github.com/org/mono/blob/v1.2/src/app.py")
+    assert result == ("org", "mono", "v1.2", "src/app.py")
+
+  def test_tree_url_without_path(self):
+    """Test /tree/<ref> with no path"""
+    assert parse_github_location("https://github.com/org/mono/tree/dev/") == ("org", "mono", "dev", "")
+
+  def test_query_and_fragment_ignored(self):
+    """Test that query strings and fragments are dropped"""
+    result = parse_github_location("https://github.com/org/mono/blob/main/a.py?plain=1#L10")
+    assert result == ("org", "mono", "main", "a.py")
+
+
+class TestGlobs:
+  def test_single_star_stays_in_segment(self):
+    """Test that * doesn't cross directories"""
+    assert match_glob("services/billing/src/app.py", "services/*/src/**") == True
+    assert match_glob("services/billing/lib/app.py", "services/*/src/**") == False
+
+  def test_double_star_any_depth(self):
+    """Test that **/ matches zero or more directories"""
+    assert match_glob("app.py", "**/*.py") == True
+    assert match_glob("a/b/c/app.py", "**/*.py") == True
+    assert match_glob("a/b/c/app.js", "**/*.py") == False
+
+  def test_directory_pattern_selects_contents(self):
+    """Test that matching a directory includes everything under it"""
+    assert match_glob("src/deep/app.py", "src") == True
+    assert match_glob("srcs/app.py", "src") == False
+
+  def test_bracket_classes(self):
+    """Test that only a leading ! negates a class and the rest of it is literal"""
+    assert match_glob("!.py", "[a!].py") == True
+    assert match_glob("b.py", "[a!].py") == False
+    assert match_glob("b.py", "[!a].py") == True
+    assert match_glob("a.py", "[!a].py") == False
+    assert match_glob("^.py", "[^a].py") == True
+    assert match_glob("b.py", "[^a].py") == False
+    assert match_glob("app2.py", "app[0-9].py") == True
+    assert match_glob("]/x.py", "[]]/*.py") == True
+    assert match_glob("a/b.py", "a[!x]b.py") == False
+
+  def test_static_prefix(self):
+    """Test the literal directory part of globs"""
+    assert glob_static_prefix("services/*/src/**") == "services"
+    assert glob_static_prefix("**/*.py") == ""
+    assert glob_static_prefix("lib/core") == "lib/core"
+
+  def test_scan_roots_minimal(self):
+    """Test that nested and duplicate roots collapse"""
+    assert scan_roots("", ["services/*/src/**", "lib/**", "services/x"]) == ["lib", "services"]
+    assert scan_roots("", ["**/*.py", "lib"]) == [""]
+    assert scan_roots("services/billing", ["**/*.py"]) == ["services/billing"]
+    assert scan_roots() == [""]
+
+  def test_in_scope(self):
+    """Test path and include filtering together"""
+    assert in_scope("services/billing/a.py", "services/billing") == True
+    assert in_scope("services/billing2/a.py", "services/billing") == False
+    assert in_scope("services/billing/a.py", "services/billing", ["**/*.go"]) == False
+    assert in_scope("anything.py") == True
@@ -0,0 +1,99 @@
+"""Pytest tests for lazy filtered views over scan results"""
+import pytest
+from terence import Terence, ResultView
+from terence.backends import TreeEntry
+from terence.result import ScanResult
+from terence.views import PathIndex, extension
+
+FILES = {
+    "README.md": "# readme\n",
+    "src/app.ts": "export const app = 1\n",
+    "src/app.test.ts": "test('app')\n",
+    "src/view.TSX": "<View />\n",
+    "src/lib/util.ts": "export const x = 1\n" * 200,
+    "src/lib/util.py": "x = 1\n",
+    "src0/other.ts": "other\n",
+    "srclib/main.ts": "main\n",
+    "docs/.env": "KEY=1\n",
+}
+
+
+@pytest.fixture
+def view():
+    entries = {path: TreeEntry(path, f"sha-{path}", len(text)) for path, text in FILES.items()}
+    return ResultView(PathIndex(FILES, {path: f"sha-{path}" for path in FILES}, entries))
+
+
+class TestResultView:
+    """Test filtering without copying the results"""
+
+    def test_all_files_in_path_order(self, view):
+        assert list(view) == sorted(FILES)
+        assert len(view) == len(FILES)
+        assert dict(view) == FILES
+
+    def test_directory(self, view):
+        src = view.directory("src")
+        assert list(src) == ["src/app.test.ts", "src/app.ts", "src/lib/util.py", "src/lib/util.ts", "src/view.TSX"]
+        assert len(src) == 5
+        assert "src0/other.ts" not in src and "srclib/main.ts" not in src
+        assert list(src.directory("src/lib/")) == ["src/lib/util.py", "src/lib/util.ts"]
+        # A parent directory doesn't widen the view again, a sibling empties it
+        assert list(src.directory("src/lib").directory("src")) == ["src/lib/util.py", "src/lib/util.ts"]
+        assert len(src.directory("docs")) == 0
+        with pytest.raises(KeyError):
+            src.directory("docs")["docs/.env"]
+
+    def test_extension(self, view):
+        assert list(view.extension("ts")) == ["src/app.test.ts", "src/app.ts", "src/lib/util.ts", "src0/other.ts", "srclib/main.ts"]
+        # Several extensions are merged back into path order, case insensitive
+        assert list(view.directory("src").extension(".tsx", "py")) == ["src/lib/util.py", "src/view.TSX"]
+        assert list(view.extension("ts", "py").extension("py")) == ["src/lib/util.py"]
+        assert len(view.extension("rs")) == 0
+        assert extension("docs/.env") == "" and extension("README.md") == ".md"
+
+    def test_glob(self, view):
+        assert list(view.glob("src/**/*.test.ts")) == ["src/app.test.ts"]
+        assert list(view.glob("**/util.*")) == ["src/lib/util.py", "src/lib/util.ts"]
+        assert list(view.glob("src/lib")) == ["src/lib/util.py", "src/lib/util.ts"]
+        assert list(view.glob("README.md")) == ["README.md"]
+
+    def test_size_and_predicate(self, view):
+        assert list(view.size(min_size=1000)) == ["src/lib/util.ts"]
+        assert "src/lib/util.ts" not in view.size(max_size=1000)
+        found = view.extension("ts").where(lambda file: file.content.startswith("export") and file.sha.startswith("sha-"))
+        assert dict(found.items()) == {"src/app.ts": FILES["src/app.ts"], "src/lib/util.ts": FILES["src/lib/util.ts"]}
+        assert [file.path for file in found.scanned_files()] == ["src/app.ts", "src/lib/util.ts"]
+
+    def test_lookup_checks_filters(self, view):
+        ts = view.directory("src").extension("ts")
+        assert ts["src/app.ts"] is FILES["src/app.ts"]
+        for path in ("src/lib/util.py", "srclib/main.ts", "missing.ts"):
+            with pytest.raises(KeyError):
+                ts[path]
+        assert ts.get("src/lib/util.py") is None
+
+    def test_predicate_called_once_per_candidate(self, view):
+        calls = []
+        ts = view.directory("src").extension("ts").where(lambda file: calls.append(file.path) or True)
+        assert sum(1 for _ in ts.values()) == 3
+        # Only the candidates of the directory and extension ranges are checked
+        assert sorted(calls) == ["src/app.test.ts", "src/app.ts", "src/lib/util.ts"]
+
+
+class TestScanViews:
+    """Test views of Terence results and ScanResult"""
+
+    def test_terence_view(self, server, terence):
+        server.add_repo("owner", "repo", {path: text.encode() for path, text in FILES.items()})
+        terence.scan_repository("https://github.com/owner/repo")
+        index = terence.view()._index
+        assert terence.view()._index is index  # Built once per scan
+        assert list(terence.view().directory("src/lib")) == ["src/lib/util.py", "src/lib/util.ts"]
+        terence.scan_repository("https://github.com/owner/repo", ["py"])
+        assert terence.view()._index is not index
+        assert list(terence.view()) == ["src/lib/util.py"]
+
+    def test_scan_result_view(self):
+        result = ScanResult("https://github.com/owner/repo", None, None, FILES, {}, {}, None)
+        assert list(result.view().glob("src/*.ts")) == ["src/app.test.ts", "src/app.ts"]
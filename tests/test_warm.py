@@ -0,0 +1,110 @@
+"""Pytest tests for the background cache warmer"""
+import threading
+import pytest
+from terence.warm import CacheWarmer
+from benchmarks.fake_github import synthetic_files
+
+FILES = synthetic_files(depth=1, fanout=2, files_per_dir=5, binary_ratio=0)
+URL = "https://github.com/owner/repo"
+
+
+@pytest.fixture
+def fake_options():
+    return {'rate_limit': 1000}
+
+
+@pytest.fixture
+def server(server):
+    server.add_repo("owner", "repo", FILES)
+    return server
+
+
+class TestCacheWarmer:
+    """Test CacheWarmer cycles against the fake server"""
+
+    def test_cold_cache_warmed(self, server, make_terence, tmp_path):
+        warmer = CacheWarmer(make_terence(tmp_path / "cache"), [URL])
+        cycle = warmer.run_once()
+        assert cycle[(URL, None)]['status'] == "warmed"
+        assert warmer.terence.results == {}
+        # Fetched contents go to the cache only, not the warmer's content store
+        assert len(warmer.terence.content) == 0
+
+        # A foreground scan sharing the cache fetches no blobs
+        server.reset_counters()
+        foreground = make_terence(tmp_path / "cache")
+        foreground.scan_repository(URL)
+        assert server.requests["blobs"] == 0
+        assert len(foreground.results) == len(FILES)
+
+    def test_unchanged_head_costs_one_request(self, server, make_terence, tmp_path):
+        warmer = CacheWarmer(make_terence(tmp_path / "cache"), [(URL, "main")])
+        warmer.run_once()
+        server.reset_counters()
+        cycle = warmer.run_once()
+        assert cycle[(URL, "main")]['status'] == "fresh"
+        assert cycle[(URL, "main")]['requests'] == 1
+        assert server.requests["commits"] == 1
+        assert server.requests["trees"] == 0
+
+    def test_moved_head_fetches_changed_blobs(self, server, make_terence, tmp_path):
+        warmer = CacheWarmer(make_terence(tmp_path / "cache"), [URL])
+        warmer.run_once()
+        changed = dict(FILES)
+        path = sorted(changed)[0]
+        changed[path] = b"# changed\n"
+        server.add_repo("owner", "repo", changed)
+        server.reset_counters()
+        cycle = warmer.run_once()
+        assert cycle[(URL, None)]['status'] == "warmed"
+        assert server.requests["blobs"] == 1
+
+    def test_cached_blobs_not_read_back(self, server, make_terence, tmp_path, monkeypatch):
+        files = synthetic_files(depth=1, fanout=2, files_per_dir=5, file_size=2048, binary_ratio=0)
+        server.add_repo("owner", "repo", files)
+        warmer = CacheWarmer(make_terence(tmp_path / "cache"), [URL])
+        warmer.run_once()
+        changed = dict(files)
+        changed[sorted(changed)[0]] = b"# changed\n" * 300
+        server.add_repo("owner", "repo", changed)
+
+        reads = []
+        read_blob = warmer.terence._cache.read_blob
+        monkeypatch.setattr(warmer.terence._cache, "read_blob", lambda sha: reads.append(sha) or read_blob(sha))
+        assert warmer.run_once()[(URL, None)]['status'] == "warmed"
+        assert reads == []
+        # The saved scan still lists every file
+        assert len(make_terence(tmp_path / "cache").load_cached(URL).files) == len(files)
+
+    def test_budget_limits_requests(self, server, make_terence, tmp_path):
+        # 1000 * 0.01 = 10 requests for the warmer
+        warmer = CacheWarmer(make_terence(tmp_path / "cache"), [URL], budget=0.01)
+        cycle = warmer.run_once()
+        assert cycle[(URL, None)]['status'] == "partial"
+        assert 1000 - server.remaining <= 11
+
+        # Blobs fetched so far stay cached and the next windows finish the job
+        statuses = []
+        for _ in range(5):
+            server.reset_counters()
+            statuses.append(warmer.run_once()[(URL, None)]['status'])
+            if statuses[-1] == "warmed":
+                break
+        assert statuses[-1] == "warmed"
+
+    def test_no_budget_defers(self, server, make_terence, tmp_path):
+        warmer = CacheWarmer(make_terence(tmp_path / "cache"), [URL], budget=0.1)
+        server.remaining = 500
+        assert warmer.run_once()[(URL, None)]['status'] == "deferred"
+        assert server.requests["blobs"] == 0
+
+    def test_background_thread(self, make_terence, tmp_path):
+        cycles = threading.Event()
+        warmer = CacheWarmer(make_terence(tmp_path / "cache"), [URL], interval=60, on_cycle=lambda cycle: cycles.set())
+        with warmer:
+            assert cycles.wait(10)
+        assert warmer.status[(URL, None)]['status'] == "warmed"
+
+    def test_requires_cache(self, terence):
+        with pytest.raises(Exception, match="No scan cache"):
+            CacheWarmer(terence, [URL])
@@ -0,0 +1,230 @@
+"""Pytest tests for the scan cache and the push webhook listener"""
+import hmac
+import json
+import hashlib
+import urllib.request
+import urllib.error
+import pytest
+from terence import Terence
+from terence.cache import ScanCache
+from terence.webhook import WebhookListener, verify_signature
+
+BEFORE = {
+    "app.py": b"app = 1\n",
+    "lib/util.py": b"def util(): pass\n",
+    "old.py": b"old = 1\n",
+    "README.md": b"# Readme\n",
+}
+AFTER = {
+    "app.py": b"app = 2\n",
+    "lib/util.py": b"def util(): pass\n",
+    "new.js": b"const x = 1;\n",
+    "README.md": b"# Readme v2\n",
+}
+SECRET = "webhook-secret"
+URL = "https://github.com/owner/repo"
+
+
+@pytest.fixture
+def server(server):
+    server.add_repo("owner", "repo", BEFORE)
+    return server
+
+
+@pytest.fixture
+def terence(make_terence, tmp_path):
+    return make_terence(tmp_path / "cache")
+
+
+def push(server, files, before=None, **extra):
+    """Replace main with files and return the push payload GitHub would send"""
+    old = server.repos[("owner", "repo")]['refs']['main']
+    server.add_repo("owner", "repo", files)
+    new = server.repos[("owner", "repo")]['refs']['main']
+    payload = {
+        'ref': "refs/heads/main",
+        'before': before or old.commit_sha,
+        'after': new.commit_sha,
+        'forced': False,
+        'deleted': False,
+        'repository': {'full_name': "owner/repo", 'html_url': URL},
+        'commits': [
+            {'id': new.commit_sha, 'added': ["new.js"], 'modified': ["app.py", "README.md"], 'removed': ["old.py"]},
+        ],
+    }
+    payload.update(extra)
+    return payload
+
+
+def post(listener, payload, event="push", secret=SECRET):
+    body = json.dumps(payload).encode()
+    signature = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    request = urllib.request.Request(listener.url, data=body, method="POST", headers={
+        'X-GitHub-Event': event, 'X-Hub-Signature-256': signature, 'Content-Type': "application/json",
+    })
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+class TestScanCache:
+    """Test scans saved to and loaded from disk"""
+
+    def test_scan_saved(self, terence):
+        terence.scan_repository(URL)
+        cached = terence._cache.load(URL)
+        assert cached.ref == "main"
+        assert set(cached.files) == {"app.py", "lib/util.py", "old.py"}
+
+    def test_scoped_scans_saved_apart(self, terence):
+        terence.scan_repository(URL)
+        terence.scan(URL + "/tree/main/lib")
+        terence.scan(URL, extensions=["py"], include=["app.py"])
+        # The full scan is still the one loaded by default
+        assert set(terence.load_cached(URL).files) == {"app.py", "lib/util.py", "old.py"}
+        assert set(terence.load_cached(URL + "/tree/main/lib").files) == {"lib/util.py"}
+        assert set(terence.load_cached(URL, extensions=[".py"], include=["app.py"]).files) == {"app.py"}
+        with pytest.raises(Exception, match="No cached scan"):
+            terence.load_cached(URL, include=["old.py"])
+
+    def test_load_cached_without_requests(self, server, terence, tmp_path):
+        terence.scan_repository(URL)
+        server.reset_counters()
+        fresh = Terence(base_url=server.url).cache(str(tmp_path / "cache"))
+        fresh.load_cached(URL)
+        assert fresh.results == {"app.py": "app = 1\n", "lib/util.py": "def util(): pass\n", "old.py": "old = 1\n"}
+        assert sum(server.requests.values()) == 0
+
+    def test_blobs_reused_by_other_instances(self, server, terence, make_terence, tmp_path):
+        terence.scan_repository(URL)
+        server.reset_counters()
+        fresh = make_terence(tmp_path / "cache")
+        fresh.scan_repository(URL)
+        assert server.requests["blobs"] == 0
+        assert fresh.stats.cache_hits == 3
+
+    def test_load_cached_missing(self, terence):
+        with pytest.raises(Exception, match="No cached scan"):
+            terence.load_cached(URL)
+
+
+class TestApplyPush:
+    """Test Terence.apply_push"""
+
+    def test_only_changed_files_fetched(self, server, terence):
+        terence.scan_repository(URL)
+        payload = push(server, AFTER)
+        server.reset_counters()
+        summary = terence.apply_push(payload)
+        assert summary['status'] == "updated"
+        assert summary['updated'] == ["app.py", "new.js"]
+        assert summary['removed'] == ["old.py"]
+        # README.md doesn't pass the filters, so two files cost two requests
+        assert server.requests["contents"] == 2
+        assert server.requests["trees"] == 0
+        assert server.requests["repos"] == 0
+
+        terence.load_cached(URL)
+        assert terence.results == {"app.py": "app = 2\n", "lib/util.py": "def util(): pass\n", "new.js": "const x = 1;\n"}
+
+    def test_scoped_scans_updated(self, server, terence):
+        terence.scan_repository(URL)
+        terence.scan(URL, include=["lib", "old.py"])
+        summary = terence.apply_push(push(server, AFTER))
+        assert summary['updated'] == ["app.py", "new.js"]
+        assert summary['removed'] == ["old.py"]
+        assert set(terence.load_cached(URL).files) == {"app.py", "lib/util.py", "new.js"}
+        assert set(terence.load_cached(URL, include=["lib", "old.py"]).files) == {"lib/util.py"}
+
+    def test_unknown_ref_ignored(self, server, terence):
+        payload = push(server, AFTER)
+        assert terence.apply_push(payload)['status'] == "ignored"
+
+    def test_force_push_drops_cache(self, server, terence):
+        terence.scan_repository(URL)
+        summary = terence.apply_push(push(server, AFTER, forced=True))
+        assert summary['status'] == "stale"
+        assert terence._cache.load(URL, "main") is None
+
+    def test_missed_push_drops_cache(self, server, terence):
+        terence.scan_repository(URL)
+        summary = terence.apply_push(push(server, AFTER, before="0" * 40))
+        assert summary['status'] == "stale"
+
+    def test_truncated_push_drops_cache(self, server, terence):
+        terence.scan_repository(URL)
+        # Events API payloads list 20 commits and count them all in size
+        summary = terence.apply_push(push(server, AFTER, size=25))
+        assert summary['status'] == "stale"
+        assert terence._cache.load(URL, "main") is None
+
+    def test_large_files_skipped(self, server, terence):
+        terence.max_file_size(20).scan_repository(URL)
+        summary = terence.apply_push(push(server, dict(AFTER, **{"app.py": b"app = 2\n" * 10})))
+        assert summary['updated'] == ["new.js"]
+        assert terence.stats.files_skipped == {"too_large": 1}
+        assert "app.py" not in terence.load_cached(URL).files
+
+    def test_lfs_pointers_skipped(self, server, terence):
+        terence.scan_repository(URL)
+        summary = terence.apply_push(push(server, dict(AFTER, **{"app.py": server.add_lfs_object(b"app = 2\n")})))
+        assert summary['updated'] == ["new.js"]
+        assert terence.stats.files_skipped == {"lfs": 1}
+        assert "app.py" not in terence.load_cached(URL).files
+
+    def test_lfs_objects_fetched(self, server, terence):
+        terence.lfs("fetch").scan_repository(URL)
+        summary = terence.apply_push(push(server, dict(AFTER, **{"app.py": server.add_lfs_object(b"app = 2\n")})))
+        assert summary['updated'] == ["app.py", "new.js"]
+        terence.load_cached(URL)
+        assert terence.results["app.py"] == "app = 2\n"
+
+    def test_submodule_bump_skipped(self, server, terence):
+        terence.scan_repository(URL)
+        payload = push(server, AFTER)
+        server.add_repo("owner", "repo", AFTER, submodules={"vendor/chart.js": "b" * 40})
+        payload['after'] = server.repos[("owner", "repo")]['refs']['main'].commit_sha
+        payload['commits'][0]['modified'].append("vendor/chart.js")
+        summary = terence.apply_push(payload)
+        assert summary['updated'] == ["app.py", "new.js"]
+        assert terence.stats.files_skipped == {"submodule": 1}
+        assert terence.stats.files_failed == {}
+
+
+class TestWebhookListener:
+    """Test posting recorded push payloads to the listener"""
+
+    def test_signature(self):
+        body = b'{"zen": "ok"}'
+        signature = "sha256=" + hmac.new(SECRET.encode(), body, hashlib.sha256).hexdigest()
+        assert verify_signature(SECRET, body, signature)
+        assert not verify_signature(SECRET, body, "sha256=" + "0" * 64)
+        assert not verify_signature(SECRET, body, None)
+
+    def test_push_updates_cache(self, server, terence):
+        terence.scan_repository(URL)
+        updates = []
+        with WebhookListener(terence, SECRET, on_update=updates.append) as listener:
+            status, body = post(listener, push(server, AFTER))
+        assert status == 200
+        assert body['status'] == "updated"
+        assert updates[0]['removed'] == ["old.py"]
+        assert "new.js" in terence._cache.load(URL).files
+
+    def test_bad_signature_rejected(self, server, terence):
+        terence.scan_repository(URL)
+        with WebhookListener(terence, SECRET) as listener:
+            status, _ = post(listener, push(server, AFTER), secret="wrong")
+        assert status == 401
+        assert "new.js" not in terence._cache.load(URL).files
+
+    def test_ping_and_other_events(self, terence):
+        with WebhookListener(terence, SECRET) as listener:
+            assert post(listener, {'zen': "hi"}, event="ping")[0] == 200
+            assert post(listener, {}, event="issues")[0] == 202
+
+    def test_secret_required(self, terence):
+        with pytest.raises(ValueError):
+            WebhookListener(terence, "")